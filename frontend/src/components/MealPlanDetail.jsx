@@ -31,7 +31,7 @@ const MealPlanDetail = () => {
     }
     // Fetch all recipes then filter (small dataset; keeps one request)
     axios
-      .get("/api/recipes")
+      .get("/api/recipes?fields=id,name")
       .then((res) => {
         const byId = Object.fromEntries(res.data.map((r) => [r.id, r]));
         const resolved = mealPlan.recipe_ids
@@ -15,7 +15,7 @@ const MealPlanForm = () => {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    const fetchRecipes = axios.get("/api/recipes");
+    const fetchRecipes = axios.get("/api/recipes?fields=id,name");
     const fetches = [fetchRecipes];
     if (id) {
       fetches.push(axios.get(`/api/meal-plans/${id}`));
@@ -1,6 +1,28 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef, useCallback } from "react";
 import { useParams, useNavigate, Link } from "react-router-dom";
 
+// Wait this long after the last keystroke before asking for suggestions.
+const SUGGEST_DELAY_MS = 200;
+
+// Ask the backend for a handful of matching ingredient names instead of
+// downloading the full vocabulary. Aborting `signal` drops the response.
+const fetchIngredientSuggestions = (prefix, onSuggestions, signal) => {
+  const params = new URLSearchParams({ prefix, limit: "10" });
+  fetch(`/api/ingredients/suggest?${params}`, { signal })
+    .then((response) => {
+      if (!response.ok) return [];
+      return response.json();
+    })
+    .then((data) => {
+      if (Array.isArray(data) && !signal.aborted) {
+        onSuggestions(data);
+      }
+    })
+    .catch(() => {
+      // non-fatal for suggestions (including aborted requests)
+    });
+};
+
 const RecipeForm = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -18,6 +40,35 @@ const RecipeForm = () => {
   const [error, setError] = useState(null);
   const [knownIngredients, setKnownIngredients] = useState([]);
   const [knownLocations, setKnownLocations] = useState([]);
+  // The pending suggestion request: its debounce timer and AbortController
+  const suggestTimer = useRef(null);
+  const suggestController = useRef(null);
+
+  // Cancels the pending suggestion request, so a stale (slower) response
+  // can never overwrite the suggestions for what was typed last.
+  const cancelSuggestions = useCallback(() => {
+    clearTimeout(suggestTimer.current);
+    if (suggestController.current) {
+      suggestController.current.abort();
+      suggestController.current = null;
+    }
+  }, []);
+
+  const requestSuggestions = useCallback(
+    (prefix, delay = SUGGEST_DELAY_MS) => {
+      cancelSuggestions();
+      suggestTimer.current = setTimeout(() => {
+        const controller = new AbortController();
+        suggestController.current = controller;
+        fetchIngredientSuggestions(
+          prefix,
+          setKnownIngredients,
+          controller.signal,
+        );
+      }, delay);
+    },
+    [cancelSuggestions],
+  );
 
   useEffect(() => {
     if (isEditing) {
@@ -52,20 +103,7 @@ const RecipeForm = () => {
   }, [id, isEditing]);
 
   useEffect(() => {
-    // Fetch known ingredients for suggestions (cached in this component instance)
-    fetch("/api/ingredients")
-      .then((response) => {
-        if (!response.ok) return [];
-        return response.json();
-      })
-      .then((data) => {
-        if (Array.isArray(data)) {
-          setKnownIngredients(data);
-        }
-      })
-      .catch(() => {
-        // non-fatal for suggestions
-      });
+    requestSuggestions("", 0);
 
     fetch("/api/locations")
       .then((response) => {
@@ -80,7 +118,8 @@ const RecipeForm = () => {
       .catch(() => {
         // non-fatal
       });
-  }, []);
+    return cancelSuggestions;
+  }, [requestSuggestions, cancelSuggestions]);
 
   const handleInputChange = (e) => {
     const { name, value } = e.target;
@@ -97,6 +136,9 @@ const RecipeForm = () => {
       ...prev,
       ingredients: updatedIngredients,
     }));
+    if (field === "name") {
+      requestSuggestions(value);
+    }
   };
 
   const addIngredient = () => {
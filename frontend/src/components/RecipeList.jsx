@@ -3,27 +3,41 @@ import React, { useState, useEffect } from "react";
 import { Link } from "react-router-dom";
 import RecipeItem from "./RecipeItem";
 
+const FIRST_PAGE = "/api/recipes?limit=50&fields=id,name";
+
+// The API advertises the following page in a `Link: <url>; rel="next"` header
+const nextPageUrl = (response) => {
+  const match = /<([^>]+)>;\s*rel="next"/.exec(response.headers.get("Link") || "");
+  return match ? match[1] : null;
+};
+
 const RecipeList = () => {
   const [recipes, setRecipes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextPage, setNextPage] = useState(null);
 
-  useEffect(() => {
-    fetch("/api/recipes") // Assuming Flask serves API at this path
+  const loadPage = (url) => {
+    fetch(url)
       .then((response) => {
         if (!response.ok) {
           throw new Error("Network response was not ok");
         }
+        setNextPage(nextPageUrl(response));
         return response.json();
       })
       .then((data) => {
-        setRecipes(data);
+        setRecipes((loaded) => loaded.concat(data));
         setLoading(false);
       })
       .catch((error) => {
         setError(error.message);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage(FIRST_PAGE);
   }, []);
 
   if (loading) {
@@ -56,6 +70,17 @@ const RecipeList = () => {
           <RecipeItem key={recipe.id} recipe={recipe} />
         ))}
       </ul>
+      {nextPage && (
+        <div className="text-center mt-6">
+          <button
+            type="button"
+            onClick={() => loadPage(nextPage)}
+            className="bg-gray-200 hover:bg-gray-300 text-gray-800 font-semibold py-2 px-4 rounded"
+          >
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -0,0 +1,54 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts in this directory.
+
+MEAL_PLANNER_PRELOAD=1 enables the frozen catalog mode: the app, and with it
+the whole store loaded from the storage backend, is built once in the master
+process and shared copy-on-write by the forked workers. Two things would
+otherwise copy those pages into every worker:
+
+  - the cyclic GC, which writes to the header of every tracked object it
+    examines: the master disables it while loading and gc.freeze()s the
+    loaded objects before forking, so worker collections skip them;
+  - shared connections / file locks: each worker re-opens the storage
+    backend (crud.after_fork).
+
+Plain reads still bump reference counts on the objects they touch, so pages
+holding recipes a worker serves do get copied; everything else stays shared.
+Check with `python -m meal_planner_app.worker_memory <master pid>`.
+"""
+
+import gc
+import os
+
+# Threads per worker (more than 1 selects the gthread worker class). crud
+# serves reads lock-free next to a single writer, so threads are safe.
+threads = int(os.environ.get("MEAL_PLANNER_THREADS", "4"))
+
+preload_app = os.environ.get("MEAL_PLANNER_PRELOAD") == "1"
+
+if preload_app:
+    # Loading must not leave freed holes in pages the workers will share
+    gc.disable()
+
+
+def when_ready(server):
+    """Runs in the master after the (preloaded) app is loaded, before forking."""
+    if preload_app:
+        from meal_planner_app import crud  # pylint: disable=import-outside-toplevel
+
+        # Build the search indexes here, once, so the workers share them (the
+        # build thread would not survive the fork anyway)
+        crud.wait_for_indexes()
+        gc.freeze()
+        server.log.info(
+            "Froze %d objects for copy-on-write sharing", gc.get_freeze_count()
+        )
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Runs in each worker right after it is forked."""
+    if preload_app:
+        gc.enable()
+        from meal_planner_app import crud  # pylint: disable=import-outside-toplevel
+
+        crud.after_fork()
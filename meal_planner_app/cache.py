@@ -0,0 +1,95 @@
+"""
+Small caches used to memoize derived data (e.g. generated shopping lists, encoded
+recipes).
+"""
+
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """A dict-like cache holding at most `maxsize` entries, evicting the least recently used.
+
+    Keys are expected to embed whatever version information makes them valid
+    (so entries never need explicit invalidation); stale entries simply age out.
+
+    Safe to share between threads without a lock: each step is a single
+    OrderedDict call, and an entry evicted by another thread midway is
+    treated as a miss.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Returns the cached value for `key` (marking it recently used), or None."""
+        value = self._entries.get(key)
+        if value is not None:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                pass  # Evicted by another thread; the value is still valid
+        return value
+
+    def put(self, key: Hashable, value: V) -> V:
+        """Caches `value` under `key`, evicting the oldest entry when full."""
+        entries = self._entries
+        entries[key] = value
+        try:
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        except KeyError:
+            pass  # Another thread evicted or cleared entries meanwhile
+        return value
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        self._entries.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DerivedCache(Generic[V]):
+    """Per-key cache of values derived from a stored object (e.g. its encoded JSON).
+
+    Writers publish a new object on every change (see crud.py), so an entry is
+    only returned for the very object it was derived from: a value computed
+    by a reader racing a writer can never be served for the newer object.
+    Writers still discard entries explicitly so replaced objects are freed.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[object, V]] = {}
+
+    def get(self, key: Hashable, obj: object) -> Optional[V]:
+        """Returns the value cached for `key` if it was derived from `obj`, else None."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+        return None
+
+    def put(self, key: Hashable, obj: object, value: V) -> V:
+        """Caches `value`, derived from `obj`, under `key`."""
+        self._entries[key] = (obj, value)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        """Drops the entry for `key`, if any."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,19 +1,176 @@
 """
 CRUD (Create, Read, Update, Delete) operations for managing recipes and meal plans
 using in-memory data structures. Also includes shopping list generation and recipe search.
+
+Records live in IndexedStore instances (see store.py): primary-key lookups and
+deletes are O(1) and iteration keeps insertion order.
+
+Every write is also passed to `storage_backend` (see storage.py). With the
+default MemoryBackend nothing is persisted; with a SQLiteBackend (set
+MEAL_PLANNER_DB) the data survives restarts and is shared between processes,
+which pick up each other's writes through sync(). Writers persist a change
+before publishing it in memory, so a failed write leaves memory as it was.
+
+Threading (read-copy-update): writers are serialized by a single lock (the
+@_writer functions) and never mutate an object or list a reader may hold;
+they build a new one and publish it with a single assignment. Readers take no
+lock, so they never wait for writers, and a record they fetched stays
+internally consistent while they use it.
+
+Loading a large store (see use_backend()) publishes the records first and
+builds the search indexes and name catalogs in a background thread, so a
+restart serves requests right away; only searches and the catalogs wait for
+the build (see wait_for_indexes()).
 """
 
+# pylint: disable=too-many-lines
+
+import dataclasses
+import functools
+import gc
+import hashlib
+import math
+import threading
 import uuid
 from collections import defaultdict
-from typing import List, Dict, Optional, Union
+from typing import (
+    Iterable,
+    List,
+    Dict,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from .models import catalog
 from .models.recipe import Recipe
 from .models.ingredient import Ingredient
 from .models.meal_plan import MealPlan
 from .models.shopping_list import ShoppingList, ShoppingListItem
+from meal_planner_app import storage
+from meal_planner_app.cache import DerivedCache, LRUCache
+from meal_planner_app.search_index import (
+    IngredientIndex,
+    NameCatalog,
+    RankedIndex,
+    TrigramIndex,
+    normalize_term,
+)
+from meal_planner_app.store import IndexedStore, new_sequence
+
+# Ordered by each recipe's persisted creation sequence, so every process lists
+# (and pages) the catalog the same way
+recipes_db: IndexedStore[Recipe] = IndexedStore(
+    "recipe_id", seq_attr="seq", record_of=storage.recipe_record
+)
+# Product / Unit / Location tables shared by every Ingredient (see models/catalog.py)
+products = catalog.products
+units = catalog.units
+locations = catalog.locations
+ingredient_index = IngredientIndex()
+# Substring index over name, description and ingredient names of each recipe
+text_index = TrigramIndex()
+# Ranked full-text index; weights follow the field order used in _index_recipe:
+# name, description, ingredient names, instructions
+RANKED_FIELD_WEIGHTS = (3.0, 1.0, 2.0, 0.5)
+ranked_index = RankedIndex(field_weights=RANKED_FIELD_WEIGHTS)
+# Reference-counted catalogs behind /api/ingredients (+ autocomplete) and /api/locations
+ingredient_names = NameCatalog()
+location_names = NameCatalog()
+# Encoded JSON of each recipe, filled by the API (main.py) and dropped on writes
+recipe_json_cache: DerivedCache[bytes] = DerivedCache()
+# Single-writer lock held by every mutation (see the module docstring)
+_write_lock = threading.RLock()
+# Recipes stored by a load but not yet in the search indexes and name catalogs
+# (see _start_index_build); a subset of recipes_db, changed under the lock
+_unindexed: Set[uuid.UUID] = set()
+# Set while the indexes cover every stored recipe
+_indexes_ready = threading.Event()
+_indexes_ready.set()
+# Loads of at least this many recipes are indexed in the background, in chunks
+# of INDEX_BUILD_CHUNK recipes, each indexed under the writer lock
+BACKGROUND_INDEX_MIN = 5000
+INDEX_BUILD_CHUNK = 500
+
+T = TypeVar("T")
+
+
+def _writer(func):
+    """Runs `func` while holding the writer lock."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _write_lock:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# Where writes are persisted; replaced with use_backend()
+storage_backend: storage.StorageBackend = storage.MemoryBackend()
+
+
+def _persist(*changes: Tuple[str, Optional[uuid.UUID], object]) -> None:
+    """Writes (kind, key, object or None) changes to the storage backend, atomically."""
+    if storage_backend.persistent:
+        storage_backend.write([storage.make_change(*change) for change in changes])
+
+
+def _ingredient_location(ingredient: Ingredient) -> str:
+    """Location key used by the locations catalog: resolved name, else location_id."""
+    loc = getattr(ingredient, "location", None) or getattr(
+        ingredient, "location_id", None
+    )
+    return str(loc) if loc else ""
+
+
+def _index_recipe(recipe: Recipe) -> None:
+    """Adds a stored recipe to the search indexes."""
+    _index_recipes((recipe,))
+
+
+def _index_recipes(recipes: Sequence[Recipe]) -> None:
+    """Adds stored recipes to the search indexes; the name catalogs are updated
+    once for the whole batch.
+    """
+    for recipe in recipes:
+        ingredient_index.add(recipe.recipe_id, (ing.name for ing in recipe.ingredients))
+        texts = [
+            normalize_term(recipe.name or ""),
+            normalize_term(recipe.description or ""),
+        ]
+        texts.extend(normalize_term(ing.name) for ing in recipe.ingredients if ing.name)
+        text_index.add(recipe.recipe_id, texts)
+        ranked_index.add(
+            recipe.recipe_id,
+            (
+                recipe.name,
+                recipe.description,
+                " ".join(ing.name for ing in recipe.ingredients if ing.name),
+                recipe.instructions,
+            ),
+        )
+    ingredient_names.add(ing.name for recipe in recipes for ing in recipe.ingredients)
+    location_names.add(
+        _ingredient_location(ing) for recipe in recipes for ing in recipe.ingredients
+    )
 
-recipes_db: List[Recipe] = []
 
+def _unindex_recipe(recipe: Recipe) -> None:
+    """Removes a recipe from the search indexes (call before mutating or deleting it)."""
+    if recipe.recipe_id in _unindexed:
+        _unindexed.discard(recipe.recipe_id)  # Loaded, never indexed
+        return
+    ingredient_index.remove(recipe.recipe_id, (ing.name for ing in recipe.ingredients))
+    ingredient_names.remove(ing.name for ing in recipe.ingredients)
+    location_names.remove(_ingredient_location(ing) for ing in recipe.ingredients)
+    text_index.remove(recipe.recipe_id)
+    ranked_index.remove(recipe.recipe_id)
 
+
+@_writer
 def create_recipe(
     name: str,
     instructions: str,
@@ -25,39 +182,147 @@ def create_recipe(
     Creates a new recipe and stores it in the in-memory database.
     ingredients_data should be a list of dicts like:
     [{'name': 'sugar', 'quantity': 1, 'unit': 'cup', 'location_id': '4'}]
+    Raises ValueError for arguments recipe_data_error() rejects. The recipe is
+    indexed before it is published, so a failure leaves no partial record.
     """
-    parsed_ingredients = []
-    if ingredients_data:
-        for ing_data in ingredients_data:
-            parsed_ingredients.append(
-                Ingredient(
-                    name=ing_data["name"],
-                    quantity=ing_data["quantity"],
-                    unit=ing_data["unit"],
-                    location_id=ing_data.get("location_id"),
-                    location=ing_data.get("location"),
-                )
-            )
-
+    _check_recipe_data(
+        {
+            "name": name,
+            "instructions": instructions,
+            "ingredients_data": ingredients_data,
+            "description": description,
+            "source_url": source_url,
+        }
+    )
     recipe = Recipe(
         name=name,
         description=description,
-        ingredients=parsed_ingredients,
+        ingredients=_parse_ingredients(ingredients_data or []),
         instructions=instructions,
         source_url=source_url,
+        seq=new_sequence(),
     )
-    recipes_db.append(recipe)
+    _index_recipe(recipe)
+    try:
+        _persist((storage.RECIPE, recipe.recipe_id, recipe))
+    except BaseException:
+        _unindex_recipe(recipe)
+        raise
+    recipes_db.add(recipe)
     return recipe
 
 
+@_writer
+def create_recipes(recipes_data: Iterable[Dict]) -> List[Recipe]:
+    """Creates many recipes at once, in order.
+    Each item holds the create_recipe() arguments (name, instructions and
+    optionally ingredients_data, description, source_url). The batch is
+    written to the storage backend in one go and indexed once.
+
+    All or nothing: if any item is rejected by recipe_data_error() (ValueError)
+    none is created, and the recipes are published only once all are indexed.
+    """
+    recipes_data = list(recipes_data)
+    for data in recipes_data:
+        _check_recipe_data(data)
+    recipes = [
+        Recipe(
+            name=data["name"],
+            description=data.get("description"),
+            ingredients=_parse_ingredients(data.get("ingredients_data") or []),
+            instructions=data["instructions"],
+            source_url=data.get("source_url"),
+            seq=new_sequence(),
+        )
+        for data in recipes_data
+    ]
+    _index_recipes(recipes)
+    try:
+        _persist(*[(storage.RECIPE, recipe.recipe_id, recipe) for recipe in recipes])
+    except BaseException:
+        for recipe in recipes:
+            _unindex_recipe(recipe)
+        raise
+    for recipe in recipes:
+        recipes_db.add(recipe)
+    return recipes
+
+
+def recipe_data_error(data: Dict, partial: bool = False) -> Optional[str]:
+    """Returns why create_recipe() arguments, given as a dict, cannot be stored,
+    or None if they can. With `partial` (update_recipe()), any field may be
+    absent or None.
+    """
+    if not partial and (not data.get("name") or not data.get("instructions")):
+        return "`name` and `instructions` are required."
+    for field in ("name", "instructions", "description", "source_url"):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f"`{field}` must be a string."
+    ingredients = data.get("ingredients_data")
+    if ingredients is not None and (
+        not isinstance(ingredients, list)
+        or not all(_is_ingredient_data(ing) for ing in ingredients)
+    ):
+        return (
+            "`ingredients` must be a list of objects with a string name and unit, "
+            "a quantity (text or number), and optionally a location and location_id."
+        )
+    return None
+
+
+def _is_scalar(value: object) -> bool:
+    """Whether every storage backend can store `value` as a column and read it back."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -(2**63) <= value < 2**63
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return value is None or isinstance(value, str)
+
+
+def _is_ingredient_data(ing: object) -> bool:
+    """Checks one ingredients_data item (see recipe_data_error())."""
+    return (
+        isinstance(ing, dict)
+        and isinstance(ing.get("name"), str)
+        and isinstance(ing.get("unit"), str)
+        and "quantity" in ing
+        and _is_scalar(ing["quantity"])
+        and _is_scalar(ing.get("location_id"))
+        and (ing.get("location") is None or isinstance(ing["location"], str))
+    )
+
+
+def _check_recipe_data(data: Dict, partial: bool = False) -> None:
+    """Raises ValueError if recipe_data_error() rejects `data`."""
+    error = recipe_data_error(data, partial)
+    if error:
+        raise ValueError(error)
+
+
+def _parse_ingredients(
+    ingredients_data: Iterable[Dict[str, Union[str, float]]],
+) -> List[Ingredient]:
+    """Builds Ingredient objects from create_recipe()-style dicts."""
+    return [
+        Ingredient(
+            name=ing_data["name"],
+            quantity=ing_data["quantity"],
+            unit=ing_data["unit"],
+            location_id=ing_data.get("location_id"),
+            location=ing_data.get("location"),
+        )
+        for ing_data in ingredients_data
+    ]
+
+
 def get_recipe(recipe_id: uuid.UUID) -> Optional[Recipe]:
     """Retrieves a recipe by its ID."""
-    for recipe in recipes_db:
-        if recipe.recipe_id == recipe_id:
-            return recipe
-    return None
+    return recipes_db.get(recipe_id)
 
 
+@_writer
 def update_recipe(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     recipe_id: uuid.UUID,
     name: Optional[str] = None,
@@ -66,91 +331,212 @@ def update_recipe(  # pylint: disable=too-many-arguments, too-many-positional-ar
     instructions: Optional[str] = None,
     source_url: Optional[str] = None,
 ) -> Optional[Recipe]:
-    """Updates an existing recipe."""
-    recipe = get_recipe(recipe_id)
-    if not recipe:
+    """Updates an existing recipe.
+    Publishes a new Recipe object: readers holding the previous one keep a
+    consistent (old) version. Raises ValueError for arguments
+    recipe_data_error() rejects.
+    """
+    old = get_recipe(recipe_id)
+    if not old:
         return None
+    _check_recipe_data(
+        {
+            "name": name,
+            "instructions": instructions,
+            "ingredients_data": ingredients_data,
+            "description": description,
+            "source_url": source_url,
+        },
+        partial=True,
+    )
 
-    if name is not None:
-        recipe.name = name
-    if description is not None:
-        recipe.description = description
-    if instructions is not None:
-        recipe.instructions = instructions
-    if source_url is not None:
-        recipe.source_url = source_url
-
+    ingredients = old.ingredients
     if ingredients_data is not None:
-        parsed_ingredients = []
-        for ing_data in ingredients_data:
-            parsed_ingredients.append(
-                Ingredient(
-                    name=ing_data["name"],
-                    quantity=ing_data["quantity"],
-                    unit=ing_data["unit"],
-                    location_id=ing_data.get("location_id"),
-                    location=ing_data.get("location"),
-                )
-            )
-        recipe.ingredients = parsed_ingredients
+        ingredients = _parse_ingredients(ingredients_data)
 
+    recipe = Recipe(
+        name=name if name is not None else old.name,
+        description=description if description is not None else old.description,
+        ingredients=ingredients,
+        instructions=instructions if instructions is not None else old.instructions,
+        source_url=source_url if source_url is not None else old.source_url,
+        recipe_id=recipe_id,
+        seq=old.seq,
+    )
+    _unindex_recipe(old)
+    _index_recipe(recipe)
+    try:
+        _persist((storage.RECIPE, recipe_id, recipe))
+    except BaseException:
+        _unindex_recipe(recipe)
+        _index_recipe(old)
+        raise
+    recipes_db.add(recipe)
+    recipe_json_cache.discard(recipe_id)
     return recipe
 
 
+@_writer
 def delete_recipe(recipe_id: uuid.UUID) -> bool:
-    """Deletes a recipe by its ID."""
-    recipe = get_recipe(recipe_id)
-    if recipe:
-        recipes_db.remove(recipe)
-        return True
-    return False
+    """Deletes a recipe by its ID.
+    The recipe is also removed from every meal plan that references it; the
+    affected plans come from the reverse index, so no other plan is visited.
+    """
+    recipe = recipes_db.get(recipe_id)
+    if recipe is None:
+        return False
+    changes = [(storage.RECIPE, recipe_id, None)]
+    plans = []
+    for meal_plan_id in tuple(plans_by_recipe.get(recipe_id, ())):
+        meal_plan = meal_plans_db.get(meal_plan_id)
+        if meal_plan:
+            recipe_ids = [rid for rid in meal_plan.recipe_ids if rid != recipe_id]
+            plan = _meal_plan_copy(meal_plan, recipe_ids=recipe_ids)
+            plans.append(plan)
+            changes.append((storage.MEAL_PLAN, meal_plan_id, plan))
+    _persist(*changes)
+
+    recipes_db.remove(recipe_id)
+    recipe_json_cache.discard(recipe_id)
+    _unindex_recipe(recipe)
+    plans_by_recipe.pop(recipe_id, None)
+    for meal_plan in plans:
+        meal_plans_db.add(meal_plan)
+    return True
 
 
 def list_recipes() -> List[Recipe]:
-    """Returns all recipes."""
-    return recipes_db
+    """Returns all recipes, in creation order."""
+    return recipes_db.to_list()
+
+
+def list_recipes_page(
+    after: Optional[int] = None, limit: int = 50
+) -> Tuple[List[Recipe], Optional[int]]:
+    """Returns one page of recipes in creation order, and the cursor of the next page.
+    Pass the returned cursor as `after` to continue; it is None on the last page.
+    """
+    return recipes_db.page(after, limit)
 
 
 def list_unique_ingredient_names() -> List[str]:
-    """Returns a sorted list of unique ingredient names present in all recipes."""
-    names: set = set()
-    for recipe in recipes_db:
-        for ing in recipe.ingredients:
-            if ing.name and ing.name.strip():
-                names.add(ing.name.strip())
-    return sorted(names)
+    """Returns a sorted list of unique ingredient names present in all recipes.
+    Served from the reference-counted catalog maintained on recipe writes.
+    """
+    return _when_indexed(ingredient_names).names()
+
+
+def ingredient_names_version() -> int:
+    """Returns a digest that changes whenever list_unique_ingredient_names() would."""
+    return _when_indexed(ingredient_names).digest()
+
+
+def suggest_ingredient_names(prefix: str, limit: int = 10) -> List[str]:
+    """Returns up to `limit` known ingredient names starting with `prefix`.
+    Matching is case- and accent-insensitive; results are in alphabetical
+    (folded) order.
+    """
+    return _when_indexed(ingredient_names).suggest(prefix, limit)
 
 
 def list_unique_locations() -> List[str]:
-    """Returns a sorted list of unique location names (or ids) from ingredients."""
-    locs: set = set()
-    for recipe in recipes_db:
-        for ing in recipe.ingredients:
-            loc = getattr(ing, "location", None) or getattr(ing, "location_id", None)
-            if loc and str(loc).strip():
-                locs.add(str(loc).strip())
-    return sorted(locs)
+    """Returns a sorted list of unique location names (or ids) from ingredients.
+    Served from the reference-counted catalog maintained on recipe writes.
+    """
+    return _when_indexed(location_names).names()
+
+
+def locations_version() -> int:
+    """Returns a digest that changes whenever list_unique_locations() would."""
+    return _when_indexed(location_names).digest()
+
+
+def recipes_version() -> int:
+    """Returns a digest of every recipe, in list_recipes() order."""
+    return recipes_db.collection_digest()
+
+
+def recipes_page_version(page: Sequence[Recipe], *selection: object) -> str:
+    """Returns a digest of a page from list_recipes_page() and `selection`
+    (whatever else picked or shaped the response, e.g. its cursors). Hashes
+    the page's (cached) record digests only, not the whole catalog.
+    """
+    key = (selection, [recipes_db.digest(recipe.recipe_id) for recipe in page])
+    return hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+
+
+def recipe_version(recipe_id: uuid.UUID) -> Optional[int]:
+    """Returns a digest of a recipe's content, or None if absent."""
+    return recipes_db.digest(recipe_id)
 
 
+def version_tag(*versions: object) -> str:
+    """Combines versions (the content digests above) into an ETag value.
+    The digests hash the data itself, so equal tags mean equal data in every
+    worker, whichever process computed them.
+    """
+    return "-".join(
+        f"{version:016x}" if isinstance(version, int) else str(version)
+        for version in versions
+    )
+
+
+@_writer
 def reset_recipes_db():
     """Helper function to reset the database, primarily for testing."""
-    # pylint: disable=global-statement
-    global recipes_db
-    recipes_db = []
+    _persist((storage.RECIPE, None, None))
+    _clear_recipes()
+
+
+def _clear_recipes() -> None:
+    """Empties the recipe store and its indexes (in memory only)."""
+    recipes_db.clear()
+    _unindexed.clear()
+    recipe_json_cache.clear()
+    shopping_list_cache.clear()
+    ingredient_index.clear()
+    text_index.clear()
+    ranked_index.clear()
+    ingredient_names.clear()
+    location_names.clear()
 
 
 # --- MealPlan CRUD Operations ---
 
-meal_plans_db: List[MealPlan] = []
+meal_plans_db: IndexedStore[MealPlan] = IndexedStore(
+    "meal_plan_id", record_of=storage.meal_plan_record
+)
+# Reverse index: recipe_id -> ids of the meal plans that reference it
+plans_by_recipe: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+
 
+def _link_recipes(meal_plan: MealPlan, recipe_ids: List[uuid.UUID]) -> None:
+    """Records that `meal_plan` references each of `recipe_ids`."""
+    for recipe_id in recipe_ids:
+        plans_by_recipe.setdefault(recipe_id, set()).add(meal_plan.meal_plan_id)
 
+
+def _unlink_recipes(meal_plan: MealPlan, recipe_ids: List[uuid.UUID]) -> None:
+    """Drops the reverse-index entries of `meal_plan` for each of `recipe_ids`."""
+    for recipe_id in recipe_ids:
+        plan_ids = plans_by_recipe.get(recipe_id)
+        if plan_ids is None:
+            continue
+        plan_ids.discard(meal_plan.meal_plan_id)
+        if not plan_ids:
+            del plans_by_recipe[recipe_id]
+
+
+@_writer
 def reset_meal_plans_db():
     """Helper function to reset the meal plans database, primarily for testing."""
-    # pylint: disable=global-statement
-    global meal_plans_db
-    meal_plans_db = []
+    _persist((storage.MEAL_PLAN, None, None))
+    meal_plans_db.clear()
+    plans_by_recipe.clear()
+    shopping_list_cache.clear()
 
 
+@_writer
 def create_meal_plan(
     name: str,
     description: str = "",
@@ -160,23 +546,41 @@ def create_meal_plan(
     if recipe_ids is None:
         recipe_ids = []
     meal_plan = MealPlan(name=name, description=description, recipe_ids=recipe_ids)
-    meal_plans_db.append(meal_plan)
+    _persist((storage.MEAL_PLAN, meal_plan.meal_plan_id, meal_plan))
+    meal_plans_db.add(meal_plan)
+    _link_recipes(meal_plan, meal_plan.recipe_ids)
     return meal_plan
 
 
+def _meal_plan_copy(meal_plan: MealPlan, **changes) -> MealPlan:
+    """Returns an unpublished copy of `meal_plan` with some attributes replaced.
+    Writers persist the copy, then publish it in place of the original.
+    """
+    return MealPlan(
+        name=changes.get("name", meal_plan.name),
+        description=changes.get("description", meal_plan.description),
+        recipe_ids=changes.get("recipe_ids", meal_plan.recipe_ids),
+        meal_plan_id=meal_plan.meal_plan_id,
+    )
+
+
 def get_meal_plan(meal_plan_id: uuid.UUID) -> Optional[MealPlan]:
     """Retrieves a meal plan by its ID."""
-    for mp in meal_plans_db:
-        if mp.meal_plan_id == meal_plan_id:
-            return mp
-    return None
+    return meal_plans_db.get(meal_plan_id)
 
 
 def list_meal_plans() -> List[MealPlan]:
     """Returns all meal plans."""
-    return meal_plans_db
+    return meal_plans_db.to_list()
+
 
+def list_meal_plans_for_recipe(recipe_id: uuid.UUID) -> List[MealPlan]:
+    """Returns the meal plans that include a recipe, via the reverse index."""
+    # tuple(): a C-level snapshot, as a writer may be changing the set
+    return meal_plans_db.ordered(tuple(plans_by_recipe.get(recipe_id, ())))
 
+
+@_writer
 def add_recipe_to_meal_plan(
     meal_plan_id: uuid.UUID, recipe_id: uuid.UUID
 ) -> Optional[MealPlan]:
@@ -191,10 +595,16 @@ def add_recipe_to_meal_plan(
         return meal_plan  # Or None, if we want to signify failure due to non-existent recipe
 
     if recipe_id not in meal_plan.recipe_ids:
-        meal_plan.recipe_ids.append(recipe_id)
+        meal_plan = _meal_plan_copy(
+            meal_plan, recipe_ids=meal_plan.recipe_ids + [recipe_id]
+        )
+        _persist((storage.MEAL_PLAN, meal_plan_id, meal_plan))
+        meal_plans_db.add(meal_plan)
+        _link_recipes(meal_plan, [recipe_id])
     return meal_plan
 
 
+@_writer
 def remove_recipe_from_meal_plan(
     meal_plan_id: uuid.UUID, recipe_id: uuid.UUID
 ) -> Optional[MealPlan]:
@@ -204,19 +614,28 @@ def remove_recipe_from_meal_plan(
         return None
 
     if recipe_id in meal_plan.recipe_ids:
-        meal_plan.recipe_ids.remove(recipe_id)
+        recipe_ids = list(meal_plan.recipe_ids)
+        recipe_ids.remove(recipe_id)
+        meal_plan = _meal_plan_copy(meal_plan, recipe_ids=recipe_ids)
+        _persist((storage.MEAL_PLAN, meal_plan_id, meal_plan))
+        meal_plans_db.add(meal_plan)
+        if recipe_id not in meal_plan.recipe_ids:
+            _unlink_recipes(meal_plan, [recipe_id])
     return meal_plan
 
 
+@_writer
 def delete_meal_plan(meal_plan_id: uuid.UUID) -> bool:
     """Deletes a meal plan by its ID."""
-    meal_plan = get_meal_plan(meal_plan_id)
-    if meal_plan:
-        meal_plans_db.remove(meal_plan)
-        return True
-    return False
+    if meal_plan_id not in meal_plans_db:
+        return False
+    _persist((storage.MEAL_PLAN, meal_plan_id, None))
+    meal_plan = meal_plans_db.remove(meal_plan_id)
+    _unlink_recipes(meal_plan, meal_plan.recipe_ids)
+    return True
 
 
+@_writer
 def update_meal_plan(
     meal_plan_id: uuid.UUID,
     name: Optional[str] = None,
@@ -228,23 +647,56 @@ def update_meal_plan(
     if not meal_plan:
         return None
 
-    if name is not None:
-        meal_plan.name = name
-
-    if description is not None:
-        meal_plan.description = description
-
+    changes = {"name": name, "description": description}
     if recipe_ids is not None:
-        # Here we replace the entire list of recipe_ids
-        meal_plan.recipe_ids = recipe_ids
+        changes["recipe_ids"] = list(recipe_ids)  # Replaces the entire list
+    updated = _meal_plan_copy(
+        meal_plan, **{k: v for k, v in changes.items() if v is not None}
+    )
+    _persist((storage.MEAL_PLAN, meal_plan_id, updated))
 
-    return meal_plan
+    meal_plans_db.add(updated)
+    if recipe_ids is not None:
+        _unlink_recipes(meal_plan, meal_plan.recipe_ids)
+        _link_recipes(updated, updated.recipe_ids)
+    return updated
 
 
 # --- Shopping List Generation ---
 
+SHOPPING_LIST_CACHE_SIZE = 256
+
+# Generated shopping lists keyed on
+# (meal_plan_id, plan version, versions of the plan's recipes in order)
+shopping_list_cache: LRUCache[Dict[str, List[Dict]]] = LRUCache(
+    SHOPPING_LIST_CACHE_SIZE
+)
+
+
+def _shopping_list_cache_key(meal_plan: MealPlan) -> tuple:
+    """Cache key that changes whenever the plan or any of its recipes is written."""
+    return (
+        meal_plan.meal_plan_id,
+        meal_plans_db.version_of(meal_plan.meal_plan_id),
+        tuple(recipes_db.version_of(rid) for rid in meal_plan.recipe_ids),
+    )
+
+
+def generated_shopping_list_version(meal_plan_id: uuid.UUID) -> Optional[str]:
+    """Returns a digest that changes whenever generate_shopping_list(meal_plan_id)
+    would return something else, or None if the meal plan does not exist.
+    """
+    meal_plan = get_meal_plan(meal_plan_id)
+    if not meal_plan:
+        return None
+    # Content digests, not the cache key's counters: the same in every worker
+    key = (
+        meal_plans_db.digest(meal_plan_id),
+        [recipes_db.digest(rid) for rid in meal_plan.recipe_ids],
+    )
+    return hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+
 
-# pylint: disable=too-many-locals,too-many-branches
 def generate_shopping_list(
     meal_plan_id: uuid.UUID,
 ) -> Optional[Dict[str, List[Dict[str, Union[str, float, List[str]]]]]]:
@@ -253,12 +705,64 @@ def generate_shopping_list(
     Returns a dict grouped by location (from lokalizacje): {location_name: [items...], ...}
     or None if the meal plan is not found.
     Items without a location use key "".
+
+    Results are memoized on the plan and recipe version counters, so repeated
+    views of an unchanged plan skip aggregation. The returned structure is
+    shared with the cache and must be treated as read-only.
     """
     meal_plan = get_meal_plan(meal_plan_id)
     if not meal_plan:
         return None
 
-    aggregated_ingredients: Dict[str, Dict[str, Union[str, float, List[str]]]] = {}
+    key = _shopping_list_cache_key(meal_plan)
+    result = shopping_list_cache.get(key)
+    if result is None:
+        result = shopping_list_cache.put(key, _aggregate_shopping_list(meal_plan))
+    return result
+
+
+def generate_shopping_lists(
+    meal_plan_ids: List[uuid.UUID],
+) -> Dict[uuid.UUID, Optional[Dict[str, List[Dict]]]]:
+    """
+    Generates shopping lists for many meal plans at once.
+    Returns {meal_plan_id: grouped shopping list, or None if the plan is not found}.
+
+    Plans whose list is cached (by an earlier view or batch) are served from
+    the cache; the rest are aggregated once and added to it, so a follow-up
+    single-plan request is a cache hit. Repeated ids are generated once.
+    Results are shared with the cache and must be treated as read-only.
+    """
+    results = {}
+    for meal_plan_id in meal_plan_ids:
+        if meal_plan_id not in results:
+            results[meal_plan_id] = generate_shopping_list(meal_plan_id)
+    return results
+
+
+def _listed_quantity(ingredient: Ingredient) -> Union[str, float]:
+    """The shopping-list quantity of an ingredient not summed with others: its
+    number when written as a plain number, else the text as entered, so e.g.
+    "1-2" or "1/2" keep their wording (parse_quantity's value is for sums).
+    """
+    if ingredient.quantity_value is not None:
+        try:
+            float(ingredient.quantity)
+            return ingredient.quantity_value
+        except ValueError:
+            pass
+    return str(ingredient.quantity)
+
+
+def _aggregate_shopping_list(
+    meal_plan: MealPlan,
+) -> Dict[str, List[Dict[str, Union[str, float, List[str]]]]]:
+    """Aggregates the ingredients of every recipe in a meal plan, grouped by location."""
+    aggregated_ingredients: Dict[
+        Tuple[int, int, int], Dict[str, Union[str, float, List[str]]]
+    ] = {}
+    # Numeric sum per item while all its quantities are numeric, else None
+    totals: Dict[Tuple[int, int, int], Optional[float]] = {}
 
     for recipe_id in meal_plan.recipe_ids:
         recipe = get_recipe(recipe_id)
@@ -266,61 +770,38 @@ def generate_shopping_list(
             continue  # Skip if a recipe ID in the plan doesn't exist
 
         for ingredient in recipe.ingredients:
-            loc = getattr(ingredient, "location", None) or ""
-            ingredient_key = f"{ingredient.name}_{ingredient.unit}_{loc}"
-            current_quantity_str = str(
-                ingredient.quantity
-            )  # Ensure it's a string for consistency first
-            current_quantity_numeric: Optional[float] = None
-
-            try:
-                current_quantity_numeric = float(current_quantity_str)
-            except (ValueError, TypeError):
-                # Quantity is not a simple float (e.g., "to taste", "1-2", or empty)
-                pass
-
-            if ingredient_key in aggregated_ingredients:
-                existing_entry = aggregated_ingredients[ingredient_key]
-                existing_quantity = existing_entry["quantity"]
-
-                if current_quantity_numeric is not None and isinstance(
-                    existing_quantity, (int, float)
-                ):
-                    # Both are numeric, sum them
-                    existing_entry["quantity"] = (
-                        existing_quantity + current_quantity_numeric
-                    )
-                elif isinstance(existing_quantity, list):
-                    # Existing is already a list, append new quantity string
-                    existing_quantity.append(current_quantity_str)
-                else:
-                    # Existing was a single value (numeric or string), convert to list and add both
-                    existing_entry["quantity"] = [
-                        str(existing_quantity),
-                        current_quantity_str,
-                    ]
-            else:
+            # (product id, unit id, location id): no per-ingredient string building
+            ingredient_key = ingredient.group_key
+            numeric = ingredient.quantity_value  # parsed once at write time
+
+            existing_entry = aggregated_ingredients.get(ingredient_key)
+            if existing_entry is None:
                 # New ingredient for the shopping list
+                totals[ingredient_key] = numeric
                 aggregated_ingredients[ingredient_key] = {
                     "name": ingredient.name,
-                    "quantity": (
-                        current_quantity_numeric
-                        if current_quantity_numeric is not None
-                        else current_quantity_str
-                    ),
+                    "quantity": _listed_quantity(ingredient),
                     "unit": ingredient.unit,
                     "location": getattr(ingredient, "location", None),
                     "location_id": getattr(ingredient, "location_id", None),
                 }
-                # If quantity was empty string and we tried to make it float, it would be None.
-                # Ensure it's stored as original string if not numeric.
-                if (
-                    current_quantity_numeric is None
-                    and aggregated_ingredients[ingredient_key]["quantity"] is None
-                ):
-                    aggregated_ingredients[ingredient_key][
-                        "quantity"
-                    ] = current_quantity_str
+                continue
+
+            existing_quantity = existing_entry["quantity"]
+            if numeric is not None and totals[ingredient_key] is not None:
+                # Both are numeric, sum them
+                totals[ingredient_key] += numeric
+                existing_entry["quantity"] = totals[ingredient_key]
+            elif isinstance(existing_quantity, list):
+                # Existing is already a list, append new quantity string
+                existing_quantity.append(str(ingredient.quantity))
+            else:
+                # Existing was a single value (numeric or string), convert to list and add both
+                totals[ingredient_key] = None
+                existing_entry["quantity"] = [
+                    str(existing_quantity),
+                    str(ingredient.quantity),
+                ]
 
     # Group by location for easy grouping by lokalizacje (aisle/category)
     grouped: Dict[str, List[Dict[str, Union[str, float, List[str]]]]] = defaultdict(
@@ -334,12 +815,10 @@ def generate_shopping_list(
     def _loc_key(l):
         return (l == "", l)  # empty/unknown at end
 
-    result = {}
-    for loc in sorted(grouped.keys(), key=_loc_key):
-        items = sorted(grouped[loc], key=lambda x: str(x.get("name", "")))
-        result[loc] = items
-
-    return result
+    return {
+        loc: sorted(grouped[loc], key=lambda x: str(x.get("name", "")))
+        for loc in sorted(grouped.keys(), key=_loc_key)
+    }
 
 
 def _resolve_item_location(item: ShoppingListItem) -> str:
@@ -393,16 +872,19 @@ def shopping_list_to_pdf_data(
 
 # --- Shopping List CRUD Operations ---
 
-shopping_lists_db: List[ShoppingList] = []
+shopping_lists_db: IndexedStore[ShoppingList] = IndexedStore(
+    "id", record_of=storage.shopping_list_record
+)
 
 
+@_writer
 def reset_shopping_lists_db():
     """Helper function to reset the shopping lists database, for testing."""
-    # pylint: disable=global-statement
-    global shopping_lists_db
-    shopping_lists_db = []
+    _persist((storage.SHOPPING_LIST, None, None))
+    shopping_lists_db.clear()
 
 
+@_writer
 def create_shopping_list(meal_plan_id: uuid.UUID) -> Optional[ShoppingList]:
     """
     Generates a shopping list from a meal plan and saves it to the database.
@@ -429,7 +911,12 @@ def create_shopping_list(meal_plan_id: uuid.UUID) -> Optional[ShoppingList]:
     list_items = [
         ShoppingListItem(
             name=item["name"],
-            quantity=item["quantity"],
+            # Copy list quantities: generated results are shared with the cache
+            quantity=(
+                list(item["quantity"])
+                if isinstance(item["quantity"], list)
+                else item["quantity"]
+            ),
             unit=item["unit"],
             purchased=False,  # Default to not purchased
             location=item.get("location"),
@@ -445,23 +932,32 @@ def create_shopping_list(meal_plan_id: uuid.UUID) -> Optional[ShoppingList]:
         meal_plan_id=meal_plan_id,
     )
 
-    shopping_lists_db.append(new_shopping_list)
+    _persist((storage.SHOPPING_LIST, new_shopping_list.id, new_shopping_list))
+    shopping_lists_db.add(new_shopping_list)
     return new_shopping_list
 
 
 def get_shopping_list(shopping_list_id: uuid.UUID) -> Optional[ShoppingList]:
     """Retrieves a shopping list by its ID."""
-    for sl in shopping_lists_db:
-        if sl.id == shopping_list_id:
-            return sl
-    return None
+    return shopping_lists_db.get(shopping_list_id)
 
 
 def list_shopping_lists() -> List[ShoppingList]:
     """Returns all saved shopping lists."""
-    return shopping_lists_db
+    return shopping_lists_db.to_list()
+
+
+def shopping_lists_version() -> int:
+    """Returns a digest of every shopping list, in list_shopping_lists() order."""
+    return shopping_lists_db.collection_digest()
+
 
+def shopping_list_version(shopping_list_id: uuid.UUID) -> Optional[int]:
+    """Returns a digest of a shopping list's content, or None if absent."""
+    return shopping_lists_db.digest(shopping_list_id)
 
+
+@_writer
 def update_shopping_list(
     shopping_list_id: uuid.UUID,
     name: Optional[str] = None,
@@ -475,83 +971,276 @@ def update_shopping_list(
     if not shopping_list:
         return None
 
-    if name is not None:
-        shopping_list.name = name
-
-    if items is not None:
-        # Re-create the list of ShoppingListItem objects from the provided dicts
-        updated_items = [ShoppingListItem(**item_data) for item_data in items]
-        shopping_list.items = updated_items
-
-    return shopping_list
+    new_name = name if name is not None else shopping_list.name
+    # Re-create the list of ShoppingListItem objects from the provided dicts
+    new_items = (
+        [ShoppingListItem(**item_data) for item_data in items]
+        if items is not None
+        else shopping_list.items
+    )
+    updated = dataclasses.replace(shopping_list, name=new_name, items=new_items)
+    _persist((storage.SHOPPING_LIST, shopping_list_id, updated))
+    shopping_lists_db.add(updated)
+    return updated
 
 
+@_writer
 def delete_shopping_list(shopping_list_id: uuid.UUID) -> bool:
     """Deletes a shopping list by its ID."""
-    shopping_list = get_shopping_list(shopping_list_id)
-    if shopping_list:
-        shopping_lists_db.remove(shopping_list)
-        return True
-    return False
+    if shopping_list_id not in shopping_lists_db:
+        return False
+    _persist((storage.SHOPPING_LIST, shopping_list_id, None))
+    shopping_lists_db.remove(shopping_list_id)
+    return True
 
 
 # --- Recipe Search ---
 
 
-def search_recipes(  # pylint: disable=too-many-branches
-    query: str, filter_ingredient: Optional[str] = None
-) -> List[Recipe]:
+def search_recipes(query: str, filter_ingredient: Optional[str] = None) -> List[Recipe]:
     """
     Searches for recipes based on a query string and optionally filters by an ingredient.
     The query is matched against recipe name, description, and ingredient names.
     If filter_ingredient is provided, results are further filtered to include only
     recipes containing that ingredient.
-    Returns a list of unique matching Recipe objects.
+    Returns a list of unique matching Recipe objects, in catalog (creation) order.
+
+    The query is answered by the trigram text index and the filter by the
+    inverted ingredient index, so neither scans the whole catalog.
     """
-    base_recipes = []
-    if query and query.strip() != "":
-        normalized_query = query.lower().strip()
-        matching_recipes_ids = set()
+    normalized_query = normalize_term(query.strip()) if query else ""
+    normalized_filter = (
+        normalize_term(filter_ingredient.strip()) if filter_ingredient else ""
+    )
+    if not normalized_query and not normalized_filter:
+        return []
 
-        for recipe in recipes_db:
-            # Check name
-            if normalized_query in recipe.name.lower():
-                matching_recipes_ids.add(recipe.recipe_id)
-                continue
+    texts, ingredients = _when_indexed((text_index, ingredient_index))
+    matching_ids = None
+    if normalized_query:
+        matching_ids = texts.search(normalized_query)
 
-            # Check description
-            if recipe.description and normalized_query in recipe.description.lower():
-                matching_recipes_ids.add(recipe.recipe_id)
-                continue
+    if normalized_filter:
+        filter_ids = ingredients.lookup(normalized_filter)
+        matching_ids = filter_ids if matching_ids is None else matching_ids & filter_ids
 
-            # Check ingredients for the main query
-            for ingredient in recipe.ingredients:
-                if normalized_query in ingredient.name.lower():
-                    matching_recipes_ids.add(recipe.recipe_id)
-                    break
-
-        for recipe_id in matching_recipes_ids:
-            recipe = get_recipe(recipe_id)
-            if recipe:
-                base_recipes.append(recipe)
-    elif not filter_ingredient or filter_ingredient.strip() == "":
-        # If no query and no filter_ingredient, return empty or all based on desired behavior.
-        # Current: return empty if both are effectively empty.
-        # If query is empty but filter_ingredient is present, we'll use all recipes as base.
+    return recipes_db.ordered(matching_ids)
+
+
+def rank_recipes(query: str, limit: int = 20) -> List[Tuple[Recipe, float]]:
+    """
+    Ranked full-text search over name, description, ingredients and instructions.
+    Returns up to `limit` (recipe, score) pairs, best match first.
+    Only the top `limit` hits are selected (heap-based), so broad queries
+    do not materialize the whole result set.
+    """
+    if not query or not query.strip():
         return []
-    else:  # No query, but there IS a filter_ingredient
-        base_recipes = list_recipes()
+    results = []
+    for recipe_id, score in _when_indexed(ranked_index).search(query, limit):
+        recipe = recipes_db.get(recipe_id)
+        if recipe:
+            results.append((recipe, score))
+    return results
+
+
+# --- Storage Backend ---
+
+
+def _apply_recipe(key: Optional[str], record: Optional[dict]) -> None:
+    """Applies a stored recipe change to memory (no write-back)."""
+    if key is None:
+        _clear_recipes()
+        return
+    existing = recipes_db.get(uuid.UUID(key))
+    if existing is not None:
+        recipe_json_cache.discard(existing.recipe_id)
+        _unindex_recipe(existing)
+    if record is None:
+        recipes_db.remove(uuid.UUID(key))
+        return
+    recipe = recipes_db.add(storage.recipe_from_record(record))
+    _index_recipe(recipe)
+
+
+def _apply_meal_plan(key: Optional[str], record: Optional[dict]) -> None:
+    """Applies a stored meal plan change to memory (no write-back)."""
+    if key is None:
+        meal_plans_db.clear()
+        plans_by_recipe.clear()
+        shopping_list_cache.clear()
+        return
+    existing = meal_plans_db.get(uuid.UUID(key))
+    if existing is not None:
+        _unlink_recipes(existing, existing.recipe_ids)
+    if record is None:
+        meal_plans_db.remove(uuid.UUID(key))
+        return
+    meal_plan = meal_plans_db.add(storage.meal_plan_from_record(record))
+    _link_recipes(meal_plan, meal_plan.recipe_ids)
+
+
+def _apply_shopping_list(key: Optional[str], record: Optional[dict]) -> None:
+    """Applies a stored shopping list change to memory (no write-back)."""
+    if key is None:
+        shopping_lists_db.clear()
+    elif record is None:
+        shopping_lists_db.remove(uuid.UUID(key))
+    else:
+        shopping_lists_db.add(storage.shopping_list_from_record(record))
+
+
+_APPLY = {
+    storage.RECIPE: _apply_recipe,
+    storage.MEAL_PLAN: _apply_meal_plan,
+    storage.SHOPPING_LIST: _apply_shopping_list,
+}
+
+
+def _load_from_backend() -> None:
+    """Replaces the in-memory state with everything stored in the backend.
 
-    if not filter_ingredient or filter_ingredient.strip() == "":
-        return base_recipes  # No ingredient filter to apply
+    The new stores are filled off to the side and published with one
+    assignment each, so readers see the old records or the new ones, never a
+    partly loaded store. The new search indexes and name catalogs are
+    published empty and filled afterwards (see _start_index_build); readers
+    of those wait for them (see _when_indexed).
+
+    The cyclic GC is paused meanwhile: a load allocates millions of objects
+    that all stay alive, and the collections they trigger find nothing to free.
+    """
+    # pylint: disable=global-statement
+    global recipes_db, meal_plans_db, shopping_lists_db, plans_by_recipe
+    global ingredient_index, text_index, ranked_index, ingredient_names
+    global location_names, recipe_json_cache, shopping_list_cache, _unindexed
+    new_recipes = recipes_db.empty_copy()
+    new_meal_plans = meal_plans_db.empty_copy()
+    new_shopping_lists = shopping_lists_db.empty_copy()
+    links: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # A load yields each stored record once, so records go straight into
+        # the new stores (recipes in one batch)
+        recipes = []
+        for kind, _, record in storage_backend.load():
+            if kind == storage.RECIPE:
+                recipes.append(storage.recipe_from_record(record))
+            elif kind == storage.MEAL_PLAN:
+                meal_plan = new_meal_plans.add(storage.meal_plan_from_record(record))
+                for recipe_id in meal_plan.recipe_ids:
+                    links.setdefault(recipe_id, set()).add(meal_plan.meal_plan_id)
+            else:
+                new_shopping_lists.add(storage.shopping_list_from_record(record))
+        new_recipes.add_many(recipes)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    _indexes_ready.clear()  # Before the empty indexes are published
+    ingredient_index = IngredientIndex()
+    text_index = TrigramIndex()
+    ranked_index = RankedIndex(field_weights=RANKED_FIELD_WEIGHTS)
+    ingredient_names = NameCatalog()
+    location_names = NameCatalog()
+    _unindexed = {recipe.recipe_id for recipe in recipes}
+    # The caches are keyed on the old stores' records and versions
+    recipe_json_cache = DerivedCache()
+    shopping_list_cache = LRUCache(SHOPPING_LIST_CACHE_SIZE)
+    recipes_db = new_recipes
+    plans_by_recipe = links
+    meal_plans_db = new_meal_plans
+    shopping_lists_db = new_shopping_lists
+    _start_index_build()
+
+
+def _start_index_build() -> None:
+    """Indexes the recipes a load left unindexed (all of them): right away
+    for a small store, else in a background thread, so a large one serves
+    requests before its indexes are done.
+    """
+    keys = [recipe.recipe_id for recipe in recipes_db]
+    if len(keys) < BACKGROUND_INDEX_MIN:
+        _build_indexes(keys)
+        return
+    threading.Thread(
+        target=_build_indexes, args=(keys,), name="index-build", daemon=True
+    ).start()
 
-    normalized_filter_ingredient = filter_ingredient.lower().strip()
-    filtered_results = []
 
-    for recipe in base_recipes:
-        for ingredient_obj in recipe.ingredients:
-            if normalized_filter_ingredient in ingredient_obj.name.lower():
-                filtered_results.append(recipe)
-                break  # Found matching ingredient in this recipe, move to next recipe
+def _build_indexes(keys: List[uuid.UUID]) -> None:
+    """Indexes the recipes under `keys` that are still unindexed.
 
-    return filtered_results
+    Takes the writer lock per chunk, so writes wait for one chunk at most.
+    A write to a recipe not indexed yet simply indexes its new version
+    (see _unindex_recipe).
+    """
+    for start in range(0, len(keys), INDEX_BUILD_CHUNK):
+        with _write_lock:
+            recipes = [
+                recipes_db.get(key)
+                for key in keys[start : start + INDEX_BUILD_CHUNK]
+                if key in _unindexed
+            ]
+            _unindexed.difference_update(recipe.recipe_id for recipe in recipes)
+            _index_recipes(recipes)
+    with _write_lock:
+        if not _unindexed:  # Else a later load started its own build
+            _indexes_ready.set()
+
+
+def _when_indexed(index: T) -> T:
+    """Returns `index` (search indexes or name catalogs) once the indexes
+    cover every stored recipe. The caller reads the index before this waits,
+    so a reload publishing new, still empty indexes meanwhile leaves it with
+    the old, complete ones.
+    """
+    wait_for_indexes()
+    return index
+
+
+def wait_for_indexes(timeout: Optional[float] = None) -> bool:
+    """Waits until the search indexes and name catalogs cover every stored
+    recipe (only ever a wait after loading a large store); returns whether
+    they do. Must not be called while holding the writer lock.
+    """
+    return _indexes_ready.wait(timeout)
+
+
+def sync() -> None:
+    """Applies writes made by other processes sharing the storage backend.
+
+    Cheap when nothing changed (a single query for SQLite, nothing at all for
+    the in-memory backend); call it before serving each request. Never waits:
+    if a writer is busy, this request is served from the current state and a
+    later one picks the changes up.
+    """
+    if not _write_lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+        return
+    try:
+        changes = storage_backend.poll()
+        if changes is None:
+            _load_from_backend()
+            return
+        for kind, key, record in changes:
+            _APPLY[kind](key, record)
+        # Recipes created concurrently by other processes may sort before ours
+        recipes_db.reorder()
+    finally:
+        _write_lock.release()
+
+
+def after_fork() -> None:
+    """Re-opens the storage backend in a worker forked from a preloaded master."""
+    storage_backend.reopen()
+
+
+@_writer
+def use_backend(backend: storage.StorageBackend) -> None:
+    """Switches to `backend` and replaces the in-memory state with its contents."""
+    global storage_backend  # pylint: disable=global-statement
+    storage_backend = backend
+    _load_from_backend()
+
+
+use_backend(storage.backend_from_env())
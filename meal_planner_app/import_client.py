@@ -0,0 +1,273 @@
+"""
+Client side of recipe imports (used by migrate_legacy): posts recipes to
+/api/recipes/bulk in batches, several at a time, over a pool of keep-alive
+connections.
+
+How many batches are in flight adapts to the server (additive increase,
+multiplicative decrease): the limit grows while batches come back about as
+fast as the fastest one seen, and halves when their latency rises past
+LATENCY_TOLERANCE times that or a batch fails. A server that gains nothing
+from concurrency (one core, or workers that must each re-index every other
+worker's writes) settles at one batch in flight and is only probed now and
+then; one with spare cores gets more. Progress and throughput are logged as
+batches complete.
+"""
+
+import http.client
+import itertools
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_CONCURRENCY = 8
+LATENCY_TOLERANCE = 1.5
+MAX_PROBE_DELAY = 64
+
+# What sending on a reused keep-alive connection raises when the server
+# closed it while it sat idle. Only a failed send is retried: once a request
+# is out, an error may come after the server applied it, and POSTs (a batch
+# of creates) must not be applied twice.
+_STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError)
+
+
+def _closed_by_server(connection: http.client.HTTPConnection) -> bool:
+    """Whether the server closed an idle keep-alive connection.
+
+    An idle HTTP/1.1 connection has nothing to read, so a readable socket
+    means the server closed it (or broke the protocol): either way it is not
+    reused. Checking before sending, rather than retrying after, keeps
+    requests from being sent twice.
+    """
+    sock = connection.sock
+    if sock is None:
+        return True
+    readable, _, _ = select.select([sock], [], [], 0)
+    return bool(readable)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one server, shared by worker threads.
+
+    Connections are opened on demand, so there are at most as many as
+    concurrent requests; one the server closes is dropped.
+
+    A request is sent at most once, except when sending it on a reused
+    connection fails (see _STALE_CONNECTION_ERRORS).
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        parts = urlsplit(base_url)
+        self._connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._netloc = parts.netloc
+        self._path = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._idle: "queue.SimpleQueue[http.client.HTTPConnection]" = (
+            queue.SimpleQueue()
+        )
+        self.opened = 0
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """Sends a request to base_url + path; returns (status, body)."""
+        connection, reused = self._connection()
+        try:
+            connection.request(method, self._path + path, body, headers or {})
+        except _STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            return self.request(method, path, body, headers)
+        except BaseException:
+            connection.close()
+            raise
+        try:
+            response = connection.getresponse()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        return response.status, data
+
+    def _connection(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Returns an idle connection the server kept open, or a new one, and
+        whether it was reused.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not _closed_by_server(connection):
+                return connection, True
+            connection.close()
+        self.opened += 1
+        return self._connection_class(self._netloc, timeout=self._timeout), False
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class AdaptiveLimit:
+    """Bounds the requests in flight; the bound adapts to their latency (AIMD).
+
+    Call acquire() before sending a request and release() with its latency
+    (None if it failed) when it completes. After a decrease the limit holds
+    still until the requests already in flight are done, plus a delay that
+    doubles with each decrease (up to MAX_PROBE_DELAY completions): a server
+    that never gains from concurrency is only probed now and then.
+    """
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = 1.0
+        self._best: Optional[float] = None
+        self._in_flight = 0
+        # Completions to let pass before the limit moves again, and the
+        # probe delay added after the next decrease
+        self._hold = 0
+        self._backoff = 1
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Waits until fewer than `limit` requests are in flight."""
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: Optional[float]) -> None:
+        """Records a completed request (latency in seconds, None if it failed)."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            if latency is not None and (self._best is None or latency < self._best):
+                self._best = latency
+            if self._hold:
+                self._hold -= 1
+            elif latency is not None and latency <= self._best * LATENCY_TOLERANCE:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            elif self.limit > 1:
+                self.limit = max(1.0, self.limit / 2)
+                self._hold = self._in_flight + self._backoff
+                self._backoff = min(self._backoff * 2, MAX_PROBE_DELAY)
+
+
+@dataclass
+class ImportResult:
+    """Totals of an import_recipes() run."""
+
+    created: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    connections: int = 0
+
+
+def _batches(
+    recipes: Iterable[Dict[str, Any]], size: int
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yields (index of the first recipe, batch) pairs, reading `recipes` lazily."""
+    iterator = iter(recipes)
+    start = 0
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield start, batch
+        start += len(batch)
+
+
+def import_recipes(
+    recipes: Iterable[Dict[str, Any]],
+    base_url: str,
+    batch_size: int = BATCH_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> ImportResult:
+    """POSTs recipes to {base_url}/recipes/bulk as NDJSON batches, concurrently.
+
+    `recipes` may be any iterable (e.g. a generator still parsing an export);
+    at most max_concurrency + 1 batches are held at a time. Recipes the server
+    rejects, and batches that fail, are logged and counted in `failed`.
+    """
+    pool = ConnectionPool(base_url)
+    limit = AdaptiveLimit(max_concurrency)
+    result = ImportResult()
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def post_batch(start: int, batch: List[Dict[str, Any]]) -> None:
+        body = "".join(json.dumps(recipe) + "\n" for recipe in batch).encode("utf-8")
+        sent = time.monotonic()
+        try:
+            status, data = pool.request(
+                "POST",
+                "/recipes/bulk",
+                body,
+                {"Content-Type": "application/x-ndjson"},
+            )
+            if status != 200:
+                raise http.client.HTTPException(f"HTTP {status}: {data[:200]!r}")
+            summary = json.loads(data.decode("utf-8"))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            limit.release(None)
+            logger.warning(
+                "Failed to import recipes %d-%d: %s", start, start + len(batch) - 1, e
+            )
+            created, failed = 0, len(batch)
+        else:
+            limit.release(time.monotonic() - sent)
+            for recipe, item in zip(batch, summary["results"]):
+                if "error" in item:
+                    logger.warning(
+                        "Skipped recipe %s: %s", recipe.get("name"), item["error"]
+                    )
+            created, failed = summary["created"], summary["failed"]
+        with lock:
+            result.created += created
+            result.failed += failed
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Imported %d recipes (%d failed), %.0f recipes/s, %d in flight",
+                result.created,
+                result.failed,
+                (result.created + result.failed) / elapsed,
+                int(limit.limit),
+            )
+
+    try:
+        with ThreadPoolExecutor(max_concurrency) as executor:
+            for start, batch in _batches(recipes, batch_size):
+                limit.acquire()
+                executor.submit(post_batch, start, batch)
+    finally:
+        pool.close()
+    result.seconds = time.monotonic() - started
+    result.connections = pool.opened
+    return result
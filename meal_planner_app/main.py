@@ -4,6 +4,10 @@ Handles web routes, request processing, and rendering HTML templates.
 Integrates with CRUD operations and other services.
 """
 
+# pylint: disable=too-many-lines
+
+import functools
+import json
 import os
 import re
 import uuid  # Required for recipe_id conversion
@@ -15,20 +19,21 @@ from flask import (
     redirect,
     url_for,
     abort,
+    g,
     Response,
     send_from_directory,
     jsonify,
 )
 from markupsafe import escape, Markup
 
-from meal_planner_app import crud
+from meal_planner_app import crud, storage
 from meal_planner_app.seed_db import seed_database
 from meal_planner_app.models.meal_plan import MealPlan
 from meal_planner_app.models.recipe import Recipe
 from meal_planner_app.services import generate_shopping_list_pdf
 from dataclasses import asdict
 from meal_planner_app.models.shopping_list import ShoppingList
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 
 app = Flask(__name__)
 
@@ -55,6 +60,14 @@ def remove_trailing_slash():
     return None
 
 
+@app.before_request
+def sync_storage():
+    """Picks up writes made by other workers sharing the storage backend.
+    A no-op with the default in-memory backend; see crud.sync().
+    """
+    crud.sync()
+
+
 @app.template_filter("nl2br")
 def nl2br(s):
     """Converts newlines in a string to HTML <br> tags."""
@@ -254,14 +267,14 @@ def meal_plan_detail(meal_plan_id: uuid.UUID):
         abort(404)
 
     recipes_in_plan = [
-        crud.get_recipe(recipe_id)
-        for recipe_id in meal_plan.recipe_ids
-        if crud.get_recipe(recipe_id)
+        recipe
+        for recipe in map(crud.get_recipe, meal_plan.recipe_ids)
+        if recipe is not None
     ]
 
-    all_recipes = crud.list_recipes()
+    in_plan = set(meal_plan.recipe_ids)
     available_recipes = [
-        recipe for recipe in all_recipes if recipe.recipe_id not in meal_plan.recipe_ids
+        recipe for recipe in crud.list_recipes() if recipe.recipe_id not in in_plan
     ]
 
     return render_template(
@@ -368,6 +381,39 @@ def shopping_list_detail_route(meal_plan_id: uuid.UUID):
     )
 
 
+def _conditional(version_of: Callable[..., Optional[object]]):
+    """Route decorator adding a strong ETag and If-None-Match handling.
+
+    `version_of` gets the view's URL arguments and returns the version of the
+    data the view serves (see crud.version_tag), or None to skip (e.g. the
+    record does not exist). A matching If-None-Match gets a 304 without the
+    view running. The version is read before the view, so a write racing it
+    can only make the ETag older than the body, never newer: the next
+    request then misses and refetches.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            version = version_of(**kwargs)
+            if version is None:
+                return view(**kwargs)
+            etag = crud.version_tag(version)
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.cache_control.no_cache = True  # Store, but revalidate
+            return response
+
+        return wrapper
+
+    return decorator
+
+
 def _pdf_attachment_response(title: str, grouped_data: dict) -> Response:
     """Build and return a PDF download response for grouped shopping list data."""
     pdf_bytes = generate_shopping_list_pdf(title, grouped_data)
@@ -382,6 +428,7 @@ def _pdf_attachment_response(title: str, grouped_data: dict) -> Response:
 
 
 @app.route("/meal-plans/<uuid:meal_plan_id>/shopping-list/pdf")
+@_conditional(crud.generated_shopping_list_version)
 def download_shopping_list_pdf(meal_plan_id: uuid.UUID):
     """Generates and serves a PDF of the shopping list for a meal plan."""
     meal_plan = crud.get_meal_plan(meal_plan_id)
@@ -398,6 +445,7 @@ def download_shopping_list_pdf(meal_plan_id: uuid.UUID):
 
 
 @app.route("/shopping-lists/<uuid:shopping_list_id>/pdf")
+@_conditional(crud.shopping_list_version)
 def download_persisted_shopping_list_pdf(shopping_list_id: uuid.UUID):
     """Generates and serves a PDF for a persisted (user-editable) shopping list.
     This is the modern path used by React for downloading the current/edited list.
@@ -415,68 +463,272 @@ def download_persisted_shopping_list_pdf(shopping_list_id: uuid.UUID):
 
 
 def _recipe_to_dict(recipe: Recipe) -> dict:
-    """Serializes a Recipe object to a dictionary."""
-    return {
-        "id": str(recipe.recipe_id),
-        "name": recipe.name,
-        "description": recipe.description,
-        "instructions": recipe.instructions,
-        "source_url": recipe.source_url,
-        "ingredients": [
-            {
-                "name": ing.name,
-                "quantity": ing.quantity,
-                "unit": ing.unit,
-                "location_id": getattr(ing, "location_id", None),
-                "location": getattr(ing, "location", None),
-            }
-            for ing in recipe.ingredients
-        ],
-    }
+    """Serializes a Recipe object to a dictionary (the shape it is stored in,
+    without the internal `seq`, which JavaScript numbers cannot hold exactly).
+    """
+    recipe_dict = storage.recipe_record(recipe)
+    del recipe_dict["seq"]
+    return recipe_dict
+
+
+def _encode_json(obj) -> bytes:
+    """Encodes `obj` like jsonify does (compact, with the app's JSON settings)."""
+    return app.json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _recipe_json(recipe: Recipe) -> bytes:
+    """Returns the encoded JSON of a recipe, from crud.recipe_json_cache when possible."""
+    encoded = crud.recipe_json_cache.get(recipe.recipe_id, recipe)
+    if encoded is None:
+        encoded = crud.recipe_json_cache.put(
+            recipe.recipe_id, recipe, _encode_json(_recipe_to_dict(recipe))
+        )
+    return encoded
+
+
+# Size of the chunks a streamed JSON array is written in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _json_array_chunks(fragments: Iterator[bytes]) -> Iterator[bytes]:
+    """Yields a JSON array made of already encoded elements, in chunks of about
+    STREAM_CHUNK_SIZE bytes (one write per element would be far slower).
+    """
+    chunk = bytearray(b"[")
+    for i, fragment in enumerate(fragments):
+        if i:
+            chunk += b","
+        chunk += fragment
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += b"]\n"
+    yield bytes(chunk)
+
+
+def _json_array_response(fragments: Iterator[bytes]) -> Response:
+    """Returns a streamed JSON array response; elements are encoded as it is sent.
+    Only the current chunk is held in memory, however long the collection.
+    """
+    return Response(_json_array_chunks(fragments), mimetype="application/json")
 
 
 def _meal_plan_to_dict(meal_plan: MealPlan) -> dict:
-    """Serializes a MealPlan object to a dictionary."""
-    return {
-        "id": str(meal_plan.meal_plan_id),
-        "name": meal_plan.name,
-        "description": meal_plan.description,
-        "recipe_ids": [str(rid) for rid in meal_plan.recipe_ids],
-    }
+    """Serializes a MealPlan object to a dictionary (the shape it is stored in)."""
+    return storage.meal_plan_record(meal_plan)
+
+
+# Fields selectable with ?fields= on /api/recipes, in response order
+_RECIPE_FIELDS = {
+    "id": lambda recipe: str(recipe.recipe_id),
+    "name": lambda recipe: recipe.name,
+    "description": lambda recipe: recipe.description,
+    "instructions": lambda recipe: recipe.instructions,
+    "source_url": lambda recipe: recipe.source_url,
+    "ingredients": lambda recipe: [
+        storage.ingredient_record(ing) for ing in recipe.ingredients
+    ],
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+_UNSIGNED_INT_RE = re.compile(r"[0-9]+")
+
+
+def _limit_arg(default: int, maximum: int) -> int:
+    """Parses ?limit=: a positive integer, capped at `maximum`; 400 otherwise."""
+    raw = request.args.get("limit")
+    if raw is None:
+        return default
+    if not _UNSIGNED_INT_RE.fullmatch(raw) or int(raw) < 1:
+        abort(400, description="`limit` must be a positive integer.")
+    return min(int(raw), maximum)
+
+
+def _requested_recipe_fields():
+    """Parses ?fields=; returns the selected field names, or None for all fields."""
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested.difference(_RECIPE_FIELDS)
+    if unknown or not requested:
+        abort(
+            400,
+            description="`fields` must list some of: " + ", ".join(_RECIPE_FIELDS),
+        )
+    return [name for name in _RECIPE_FIELDS if name in requested]
+
+
+def _recipes_page() -> Optional[Tuple[List[Recipe], Optional[int], int]]:
+    """Returns the page a paged GET /api/recipes asks for (with `limit` or
+    `after`): its recipes, the next page's cursor and the page size; None for
+    the full list. Read once per request, so the ETag and body agree.
+    """
+    if "limit" not in request.args and "after" not in request.args:
+        return None
+    if "recipes_page" not in g:
+        limit = _limit_arg(DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        after = request.args.get("after")
+        if after is not None and not _UNSIGNED_INT_RE.fullmatch(after):
+            abort(400, description="Invalid `after` cursor.")
+        recipes, cursor = crud.list_recipes_page(
+            int(after) if after is not None else None, limit
+        )
+        g.recipes_page = (recipes, cursor, limit)
+    return g.recipes_page
+
+
+def _recipes_version():
+    """The ETag version of GET /api/recipes: a digest of the whole catalog for
+    the full list, else of the page and the arguments that selected it.
+    """
+    page = _recipes_page()
+    if page is None:
+        return crud.recipes_version()
+    recipes, cursor, limit = page
+    return crud.recipes_page_version(
+        recipes,
+        request.args.get("after"),
+        limit,
+        cursor,
+        _requested_recipe_fields(),
+    )
 
 
 @app.route("/api/recipes", methods=["GET"])
+@_conditional(_recipes_version)
 def api_get_recipes():
-    """API endpoint to get a list of all recipes."""
-    recipes = crud.list_recipes()
-    return jsonify([_recipe_to_dict(recipe) for recipe in recipes])
+    """API endpoint to get a list of recipes.
+    Query params (all optional):
+      fields: comma-separated subset of id, name, description, instructions,
+        source_url, ingredients (default: all of them).
+      limit, after: cursor pagination. With either one, at most `limit`
+        (default 50, max 500) recipes are returned, and a
+        `Link: <...>; rel="next"` header gives the URL of the next page, if
+        any. Without them, every recipe is returned.
+    """
+    fields = _requested_recipe_fields()
+    page = _recipes_page()
+    if page is None:
+        recipes, cursor, limit = crud.list_recipes(), None, None
+    else:
+        recipes, cursor, limit = page
+
+    if fields is None:
+        response = _json_array_response(_recipe_json(recipe) for recipe in recipes)
+    else:
+        response = _json_array_response(
+            _encode_json({name: _RECIPE_FIELDS[name](recipe) for name in fields})
+            for recipe in recipes
+        )
+    if cursor is not None:
+        next_url = url_for(
+            "api_get_recipes",
+            limit=limit,
+            after=cursor,
+            fields=request.args.get("fields"),
+        )
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+@app.route("/api/recipes/search", methods=["GET"])
+def api_search_recipes():
+    """API endpoint for ranked full-text recipe search.
+    Query params: q (required), limit (optional, default 20, max 100).
+    Returns the best matches first, each with a relevance "score".
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        abort(400, description="`q` is required.")
+    limit = _limit_arg(20, 100)
+
+    results = []
+    for recipe, score in crud.rank_recipes(query, limit=limit):
+        recipe_dict = _recipe_to_dict(recipe)
+        recipe_dict["score"] = round(score, 4)
+        results.append(recipe_dict)
+    return jsonify(results)
+
+
+# Serialized catalog responses: {endpoint: (catalog version, JSON bytes)}
+_catalog_responses: Dict[str, tuple] = {}
+
+
+def _cached_catalog_response(key: str, version: int, load) -> Response:
+    """Return the cached JSON body for a catalog, re-serializing only when its version moved."""
+    cached = _catalog_responses.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, app.json.response(load()).get_data())
+        _catalog_responses[key] = cached
+    return Response(cached[1], mimetype="application/json")
 
 
 @app.route("/api/ingredients", methods=["GET"])
+@_conditional(crud.ingredient_names_version)
 def api_get_ingredients():
     """API endpoint to get unique ingredient names (for suggestion/autocomplete in UI)."""
-    names = crud.list_unique_ingredient_names()  # pylint: disable=no-member
-    return jsonify(names)
+    return _cached_catalog_response(
+        "ingredients",
+        crud.ingredient_names_version(),
+        crud.list_unique_ingredient_names,
+    )
+
+
+@app.route("/api/ingredients/suggest", methods=["GET"])
+def api_suggest_ingredients():
+    """API endpoint for ingredient-name autocomplete.
+    Query params: prefix (may be empty), limit (optional, default 10, max 50).
+    """
+    prefix = request.args.get("prefix", "")
+    limit = _limit_arg(10, 50)
+    return jsonify(crud.suggest_ingredient_names(prefix, limit=limit))
 
 
 @app.route("/api/locations", methods=["GET"])
+@_conditional(crud.locations_version)
 def api_get_locations():
     """API endpoint to get unique location names for suggestions (resolved where possible)."""
-    locs = crud.list_unique_locations()  # pylint: disable=no-member
-    return jsonify(locs)
+    return _cached_catalog_response(
+        "locations", crud.locations_version(), crud.list_unique_locations
+    )
+
+
+def _abort_on_recipe_data_error(data: dict, ingredients_data, partial=False) -> None:
+    """Aborts with 400 if crud would reject a recipe payload (see recipe_data_error)."""
+    error = crud.recipe_data_error(
+        {
+            "name": data.get("name"),
+            "instructions": data.get("instructions"),
+            "description": data.get("description"),
+            "source_url": data.get("source_url"),
+            "ingredients_data": ingredients_data,
+        },
+        partial=partial,
+    )
+    if error:
+        abort(400, description=error)
+
+
+def _abort_on_non_strings(data: dict, *fields: str) -> None:
+    """Aborts with 400 if any of `fields` is present in `data` but not a string."""
+    for name in fields:
+        if data.get(name) is not None and not isinstance(data[name], str):
+            abort(400, description=f"`{name}` must be a string.")
 
 
 @app.route("/api/recipes", methods=["POST"])
 def api_create_recipe():
     """API endpoint to create a new recipe."""
     data = request.get_json()
-    if not data or not data.get("name") or not data.get("instructions"):
+    if not isinstance(data, dict):
         abort(400, description="`name` and `instructions` are required.")
 
     # crud.create_recipe expects ingredients_data to be a list of dicts
     # The client should send ingredients in the correct format, e.g.,
     # [{"name": "Flour", "quantity": 2, "unit": "cups"}]
     ingredients_data = data.get("ingredients", [])
+    _abort_on_recipe_data_error(data, ingredients_data)
 
     created_recipe = crud.create_recipe(
         name=data["name"],
@@ -489,24 +741,137 @@ def api_create_recipe():
     return jsonify(_recipe_to_dict(created_recipe)), 201
 
 
+# Recipes per crud.create_recipes() call (one storage write) in bulk imports
+BULK_BATCH_SIZE = 500
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+# Stands in for an NDJSON line that is not valid JSON
+_INVALID_JSON = object()
+
+
+def _read_lines(stream) -> Iterator[bytes]:
+    """Yields the lines of a request body, reading it in STREAM_CHUNK_SIZE blocks.
+    (readline() on werkzeug's stream reads one byte at a time, and the raw
+    wsgi.input of some servers, e.g. gunicorn, has no io buffering support.)
+    """
+    pending = b""
+    while True:
+        block = stream.read(STREAM_CHUNK_SIZE)
+        if not block:
+            break
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _bulk_items():
+    """Yields the items of a bulk import body: a JSON array, or NDJSON read from
+    the request stream one line at a time (blank lines are skipped).
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        for line in _read_lines(request.stream):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield _INVALID_JSON
+        return
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        abort(400, description="Expected a JSON array (or NDJSON) of recipes.")
+    yield from data
+
+
+def _bulk_recipe_data(item) -> Tuple[Optional[dict], Optional[str]]:
+    """Returns (create_recipes() data, None) for a bulk import item, or
+    (None, why it cannot be created).
+    """
+    if item is _INVALID_JSON:
+        return None, "Invalid JSON."
+    if not isinstance(item, dict):
+        return None, "Expected a JSON object."
+    ingredients = item.get("ingredients")
+    data = {
+        "name": item.get("name"),
+        "instructions": item.get("instructions"),
+        "description": item.get("description"),
+        "source_url": item.get("source_url"),
+        "ingredients_data": ingredients if ingredients is not None else [],
+    }
+    error = crud.recipe_data_error(data)
+    return (None, error) if error else (data, None)
+
+
+def _create_bulk_batch(batch: List[tuple], results: List[Optional[dict]]) -> None:
+    """Creates a batch of (result index, recipe data) and fills in their results."""
+    if not batch:
+        return
+    recipes = crud.create_recipes(data for _, data in batch)
+    for (index, _), recipe in zip(batch, recipes):
+        results[index] = {"id": str(recipe.recipe_id)}
+    batch.clear()
+
+
+@app.route("/api/recipes/bulk", methods=["POST"])
+def api_bulk_create_recipes():
+    """API endpoint to import many recipes in one request.
+    Accepts a JSON array of recipes (same shape as POST /api/recipes) or NDJSON
+    (Content-Type: application/x-ndjson, one recipe per line). Valid recipes are
+    created in batches of BULK_BATCH_SIZE; invalid ones are skipped.
+    Returns {"created": n, "failed": n, "results": [...]}, where results[i] is
+    {"id": ...} or {"error": ...} for the i-th recipe of the input.
+    """
+    results: List[Optional[dict]] = []
+    batch: List[tuple] = []
+    for item in _bulk_items():
+        data, error = _bulk_recipe_data(item)
+        if error:
+            results.append({"error": error})
+            continue
+        batch.append((len(results), data))
+        results.append(None)
+        if len(batch) >= BULK_BATCH_SIZE:
+            _create_bulk_batch(batch, results)
+    _create_bulk_batch(batch, results)
+
+    created = sum("id" in result for result in results)
+    return jsonify(
+        {"created": created, "failed": len(results) - created, "results": results}
+    )
+
+
 @app.route("/api/recipes/<uuid:recipe_id>", methods=["GET"])
+@_conditional(crud.recipe_version)
 def api_get_recipe(recipe_id: uuid.UUID):
     """API endpoint to get a single recipe by its ID."""
     recipe = crud.get_recipe(recipe_id)
     if not recipe:
         abort(404)
-    return jsonify(_recipe_to_dict(recipe))
+    return Response(_recipe_json(recipe) + b"\n", mimetype="application/json")
+
+
+@app.route("/api/recipes/<uuid:recipe_id>/meal-plans", methods=["GET"])
+def api_get_recipe_meal_plans(recipe_id: uuid.UUID):
+    """API endpoint listing the meal plans that include a recipe."""
+    if not crud.get_recipe(recipe_id):
+        abort(404)
+    return jsonify(
+        [_meal_plan_to_dict(mp) for mp in crud.list_meal_plans_for_recipe(recipe_id)]
+    )
 
 
 @app.route("/api/recipes/<uuid:recipe_id>", methods=["PUT"])
 def api_update_recipe(recipe_id: uuid.UUID):
     """API endpoint to update an existing recipe."""
     data = request.get_json()
-    if not data:
+    if not data or not isinstance(data, dict):
         abort(400)
 
     # Extract ingredients data if provided
     ingredients_data = data.get("ingredients")
+    _abort_on_recipe_data_error(data, ingredients_data, partial=True)
 
     updated_recipe = crud.update_recipe(
         recipe_id=recipe_id,
@@ -543,6 +908,7 @@ def api_create_meal_plan():
     data = request.get_json()
     if not data or not data.get("name"):
         abort(400, description="Name is required.")
+    _abort_on_non_strings(data, "name", "description")
 
     name = data["name"]
     description = data.get("description", "")
@@ -570,6 +936,7 @@ def api_update_meal_plan(meal_plan_id: uuid.UUID):
     data = request.get_json()
     if not data:
         abort(400)
+    _abort_on_non_strings(data, "name", "description")
 
     name = data.get("name")
     description = data.get("description")
@@ -631,6 +998,26 @@ def api_get_shopping_list(meal_plan_id: uuid.UUID):
     return jsonify(shopping_list)
 
 
+@app.route("/api/shopping-lists/batch", methods=["POST"])
+def api_generate_shopping_lists():
+    """API endpoint to generate the shopping lists of many meal plans at once.
+
+    Expects {"meal_plan_ids": [...]} and returns {meal_plan_id: grouped list},
+    with null for plans that do not exist.
+    """
+    data = request.get_json(silent=True)
+    meal_plan_ids_str = data.get("meal_plan_ids") if isinstance(data, dict) else None
+    if not isinstance(meal_plan_ids_str, list):
+        abort(400, description="meal_plan_ids must be a list.")
+    try:
+        meal_plan_ids = [uuid.UUID(str(mid)) for mid in meal_plan_ids_str]
+    except ValueError:
+        abort(400, description="Invalid meal_plan_id format.")
+
+    shopping_lists = crud.generate_shopping_lists(meal_plan_ids)
+    return jsonify({str(mid): grouped for mid, grouped in shopping_lists.items()})
+
+
 # --- Shopping List API Routes ---
 
 
@@ -662,13 +1049,17 @@ def api_create_shopping_list():
 
 
 @app.route("/api/shopping-lists", methods=["GET"])
+@_conditional(crud.shopping_lists_version)
 def api_list_shopping_lists():
     """API endpoint to get all saved shopping lists."""
     shopping_lists = crud.list_shopping_lists()
-    return jsonify([_shopping_list_to_dict(sl) for sl in shopping_lists])
+    return _json_array_response(
+        _encode_json(_shopping_list_to_dict(sl)) for sl in shopping_lists
+    )
 
 
 @app.route("/api/shopping-lists/<uuid:shopping_list_id>", methods=["GET"])
+@_conditional(crud.shopping_list_version)
 def api_get_single_shopping_list(shopping_list_id: uuid.UUID):
     """API endpoint to get a single shopping list by its ID."""
     shopping_list = crud.get_shopping_list(shopping_list_id)
@@ -683,6 +1074,7 @@ def api_update_shopping_list(shopping_list_id: uuid.UUID):
     data = request.get_json()
     if not data:
         abort(400)
+    _abort_on_non_strings(data, "name")
 
     # The crud function expects 'name' and 'items' as optional kwargs
     updated_list = crud.update_shopping_list(
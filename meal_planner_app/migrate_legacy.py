@@ -14,10 +14,16 @@ CSV gives clean, editable, deterministic data (no binary scraping).
 Still supports direct .odb extraction via heuristics (zip + regex) as fallback.
 Falls back to bundled LEGACY_RECIPES.
 
-Ingestion always happens via the live /api/recipes (same as seed_db).
+Ingestion goes through the live /api/recipes/bulk endpoint, in concurrent
+batches over keep-alive connections (see import_client.py). With --direct no
+server is needed: recipes are written straight into the storage backend
+(MEAL_PLANNER_JOURNAL / MEAL_PLANNER_DB), e.g. before the server first starts:
+
+    MEAL_PLANNER_JOURNAL=/app/data/journal python -m meal_planner_app.migrate_legacy --direct
 """
 
 import csv
+import itertools
 import json
 import logging
 import urllib.request
@@ -25,19 +31,29 @@ import urllib.error
 import zipfile
 import re
 import os
+import time
 from collections import defaultdict
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from meal_planner_app.import_client import BATCH_SIZE, ImportResult, import_recipes
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 API_BASE_URL = "http://localhost:5000/api"
 
+_URL_RE = re.compile(r"https?://[^\s,)]+")
+
+
+def get_recipes() -> Optional[List[Dict[str, Any]]]:
+    """Fetch the id of one existing recipe from the running backend API.
 
-def get_recipes() -> List[Dict[str, Any]]:
-    """Fetch existing recipes from the running backend API."""
+    Enough to tell whether the catalog is empty without downloading it.
+    Returns None if the API is not reachable.
+    """
+    url = f"{API_BASE_URL}/recipes?limit=1&fields=id"
     try:
-        with urllib.request.urlopen(f"{API_BASE_URL}/recipes", timeout=5) as resp:
+        with urllib.request.urlopen(url, timeout=5) as resp:
             if resp.status == 200:
                 return json.loads(resp.read().decode("utf-8"))
     except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError) as e:
@@ -45,26 +61,6 @@ def get_recipes() -> List[Dict[str, Any]]:
     return None
 
 
-def create_recipe(recipe: Dict[str, Any]) -> None:
-    """POST a single recipe to the API (same shape as seed_db)."""
-    data = json.dumps(recipe).encode("utf-8")
-    req = urllib.request.Request(
-        f"{API_BASE_URL}/recipes",
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            if resp.status in (200, 201):
-                created = json.loads(resp.read().decode("utf-8"))
-                logger.info(
-                    "Created recipe: %s", created.get("name", recipe.get("name"))
-                )
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        logger.warning("Failed to create recipe %s: %s", recipe.get("name"), e)
-
-
 # A small bundled fallback (real data lives in the .odb).
 # These are examples extracted from the original legacy set.
 LEGACY_RECIPES: List[Dict[str, Any]] = [
@@ -477,10 +473,139 @@ def extract_from_csv(csv_path: str) -> List[Dict[str, Any]]:
     return recs
 
 
-# pylint: disable=too-many-branches,too-many-statements
+def _csv_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Yield the rows of a UTF-8 CSV export one at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _id_key(value: Optional[str]) -> Tuple[int, Any]:
+    """Sort key for legacy ids: numeric ids in numeric order, then any others.
+
+    A missing id (a short row) counts as "".
+    """
+    value = (value or "").strip()
+    return (0, int(value)) if value.isdigit() else (1, value)
+
+
+def _is_sorted(path: str, column: str, strict: bool) -> bool:
+    """Check in one streaming pass whether a CSV is ordered by `column` ids."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        try:
+            index = next(reader).index(column)
+        except (StopIteration, ValueError):
+            return False
+        previous = None
+        for row in reader:
+            key = _id_key(row[index] if index < len(row) else "")
+            if previous is not None and (
+                key < previous or (strict and key == previous)
+            ):
+                return False
+            previous = key
+    return True
+
+
+def _join_skladniki(
+    przepisy_path: str, skladniki_path: str
+) -> Iterator[Tuple[Dict[str, str], List[Dict[str, str]]]]:
+    """Yield (przepisy row, its skladniki rows) pairs, in przepisy order.
+
+    When both exports are sorted by recipe id (checked with a streaming pass
+    over each), the two files are merge-joined, holding one recipe's
+    skladniki at a time. Otherwise skladniki.csv is grouped by recipe in
+    memory first. Either way ids are matched by _id_key, so "007" is "7".
+    """
+    if _is_sorted(przepisy_path, "id", strict=True) and _is_sorted(
+        skladniki_path, "idPrzepisu", strict=False
+    ):
+        groups = itertools.groupby(
+            _csv_rows(skladniki_path), key=lambda s: _id_key(s.get("idPrzepisu"))
+        )
+        group = next(groups, None)
+        for row in _csv_rows(przepisy_path):
+            key = _id_key(row.get("id"))
+            # Skladniki of recipes missing from przepisy.csv are dropped
+            while group is not None and group[0] < key:
+                group = next(groups, None)
+            if group is not None and group[0] == key:
+                yield row, list(group[1])
+                group = next(groups, None)
+            else:
+                yield row, []
+        return
+
+    logger.info("Relational CSVs are not sorted by recipe id; grouping skladniki")
+    sklad_by_rid: Dict[Tuple[int, Any], List[Dict]] = defaultdict(list)
+    for s in _csv_rows(skladniki_path):
+        sklad_by_rid[_id_key(s.get("idPrzepisu"))].append(s)
+    for row in _csv_rows(przepisy_path):
+        yield row, sklad_by_rid.get(_id_key(row.get("id")), [])
+
+
+def _recipe_from_przepis(
+    row: Dict[str, str],
+    skladniki: List[Dict[str, str]],
+    produkty: Dict[str, Dict[str, str]],
+) -> Optional[Dict[str, Any]]:
+    """Build one recipe (API shape) from a przepisy row and its skladniki rows."""
+    name = (row.get("nazwa") or "").strip()
+    if not name:
+        return None
+
+    instr = row.get("przepis", "") or ""
+    porcje = (row.get("liczbaPorcji") or "").strip()
+
+    # Extract first URL (common pattern in this export)
+    m = _URL_RE.search(instr)
+    source_url = m.group(0).rstrip(".,") if m else ""
+
+    # Clean instructions if the field was primarily/only the source URL
+    instructions = instr
+    if source_url and instr.strip().startswith("http"):
+        instructions = "See source_url for full original instructions. (auto-migrated from przepisy CSV)"  # pylint: disable=line-too-long
+
+    description = "Migrated from legacy przepisy CSV export"
+    if porcje:
+        description += f" (porcje: {porcje})"
+
+    # Build ingredients via join
+    # Each recipe ingredient (from skladniki.csv) links a recipe to a product:
+    #   - name = produkt.nazwa
+    #   - quantity = skladniki.liczba   (the amount; not stored on the master produkt)
+    #   - unit = resolved from produkt.idJednostki via jednostki.csv
+    #   - location_id = produkt.idLokalizacji
+    ingredients: List[Dict[str, Any]] = []
+    for s in skladniki:
+        pid = s.get("idProduktu", "")
+        p = produkty.get(pid, {})
+        qty = (s.get("liczba") or "").strip()
+        unit = p.get("jednostka", "")
+        iname = p.get("nazwa", "")
+        if iname:
+            ingredients.append(
+                {
+                    "name": iname,
+                    "quantity": qty,
+                    "unit": unit,
+                    "location_id": p.get("idLokalizacji") or None,
+                    "location": p.get("location") or None,
+                }
+            )
+
+    return {
+        "name": name,
+        "source_url": source_url,
+        "description": description,
+        "instructions": instructions,
+        "ingredients": ingredients,
+    }
+
+
 def extract_from_csvs(
     base_dir: str = "/app/legacy",
-) -> List[Dict[str, Any]]:
+) -> Iterator[Dict[str, Any]]:
     """Import from the detailed relational CSV export (przepisy + skladniki + produkty + jednostki).
 
     This is the proper normalized export from the legacy Base DB:
@@ -494,6 +619,12 @@ def extract_from_csvs(
 
     URLs are frequently stored inside the "przepis" text field; we extract the first one to
     source_url and provide a clean placeholder for instructions when the field was only a URL.
+
+    Recipes are yielded one at a time, so ingestion can start while the export
+    is still being read; only the product lookup (and, for exports not sorted
+    by recipe id, the skladniki grouping) is held in memory. A parse error
+    is logged and re-raised, so an import never ends quietly with only part
+    of the export.
     """
     files = {
         "przepisy": os.path.join(base_dir, "przepisy.csv"),
@@ -505,128 +636,69 @@ def extract_from_csvs(
         os.path.exists(f)
         for f in (files["przepisy"], files["skladniki"], files["produkty"])
     ):
-        return []
+        return
 
+    count = 0
     try:
         # Units
         jednostki = {}
         if os.path.exists(files["jednostki"]):
-            with open(files["jednostki"], newline="", encoding="utf-8") as f:
-                for row in csv.DictReader(f):
-                    jednostki[row["idJednostki"]] = row["nazwa"]
+            for row in _csv_rows(files["jednostki"]):
+                jednostki[row["idJednostki"]] = row["nazwa"]
 
         # Locations (for grouping by lokalizacje)
         lokalizacje = {}
         lok_path = os.path.join(base_dir, "lokalizacje.csv")
         if os.path.exists(lok_path):
-            with open(lok_path, newline="", encoding="utf-8") as f:
-                for row in csv.DictReader(f):
-                    lokalizacje[row["idLokalizacji"]] = row["lokalizacja"]
+            for row in _csv_rows(lok_path):
+                lokalizacje[row["idLokalizacji"]] = row["lokalizacja"]
 
         # Products
         produkty = {}
-        with open(files["produkty"], newline="", encoding="utf-8") as f:
-            for row in csv.DictReader(f):
-                pid = row["id"]
-                jid = row.get("idJednostki", "")
-                lid = row.get("idLokalizacji", "")
-                produkty[pid] = {
-                    # Master ingredient/product from produkty.csv:
-                    #   id = unique key
-                    #   nazwa = name
-                    #   idJednostki = unit reference (look up in jednostki.csv)
-                    #   idLokalizacji = location id (from lokalizacje.csv)
-                    "nazwa": row.get("nazwa", "").strip(),
-                    "idJednostki": jid,
-                    "jednostka": jednostki.get(jid, ""),
-                    "idLokalizacji": lid,
-                    "location": lokalizacje.get(lid, ""),
-                }
-
-        # Skladniki grouped by recipe
-        sklad_by_rid: Dict[str, List[Dict]] = defaultdict(list)
-        with open(files["skladniki"], newline="", encoding="utf-8") as f:
-            for row in csv.DictReader(f):
-                sklad_by_rid[row["idPrzepisu"]].append(row)
-
-        # Recipes
-        recs: List[Dict[str, Any]] = []
-        url_re = re.compile(r"https?://[^\s,)]+")
-        with open(files["przepisy"], newline="", encoding="utf-8") as f:
-            for row in csv.DictReader(f):
-                rid = row.get("id", "")
-                name = (row.get("nazwa") or "").strip()
-                if not name:
-                    continue
-
-                instr = row.get("przepis", "") or ""
-                porcje = (row.get("liczbaPorcji") or "").strip()
-
-                # Extract first URL (common pattern in this export)
-                m = url_re.search(instr)
-                source_url = m.group(0).rstrip(".,") if m else ""
-
-                # Clean instructions if the field was primarily/only the source URL
-                instructions = instr
-                if source_url and instr.strip().startswith("http"):
-                    instructions = "See source_url for full original instructions. (auto-migrated from przepisy CSV)"  # pylint: disable=line-too-long
-
-                description = "Migrated from legacy przepisy CSV export"
-                if porcje:
-                    description += f" (porcje: {porcje})"
-
-                # Build ingredients via join
-                # Each recipe ingredient (from skladniki.csv) links a recipe to a product:
-                #   - name = produkt.nazwa
-                #   - quantity = skladniki.liczba   (the amount; not stored on the master produkt)
-                #   - unit = resolved from produkt.idJednostki via jednostki.csv
-                #   - location_id = produkt.idLokalizacji
-                ingredients: List[Dict[str, Any]] = []
-                for s in sklad_by_rid.get(rid, []):
-                    pid = s.get("idProduktu", "")
-                    p = produkty.get(pid, {})
-                    qty = (s.get("liczba") or "").strip()
-                    unit = p.get("jednostka", "")
-                    iname = p.get("nazwa", "")
-                    if iname:
-                        ingredients.append(
-                            {
-                                "name": iname,
-                                "quantity": qty,
-                                "unit": unit,
-                                "location_id": p.get("idLokalizacji") or None,
-                                "location": p.get("location") or None,
-                            }
-                        )
-
-                recs.append(
-                    {
-                        "name": name,
-                        "source_url": source_url,
-                        "description": description,
-                        "instructions": instructions,
-                        "ingredients": ingredients,
-                    }
-                )
-
-        if recs:
-            logger.info(
-                "Extracted %d recipes from relational CSV set in %s",
-                len(recs),
-                base_dir,
-            )
-        return recs
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        logger.warning("Failed to parse relational CSVs in %s: %s", base_dir, e)
-        return []
+        for row in _csv_rows(files["produkty"]):
+            pid = row["id"]
+            jid = row.get("idJednostki", "")
+            lid = row.get("idLokalizacji", "")
+            produkty[pid] = {
+                # Master ingredient/product from produkty.csv:
+                #   id = unique key
+                #   nazwa = name
+                #   idJednostki = unit reference (look up in jednostki.csv)
+                #   idLokalizacji = location id (from lokalizacje.csv)
+                "nazwa": row.get("nazwa", "").strip(),
+                "idJednostki": jid,
+                "jednostka": jednostki.get(jid, ""),
+                "idLokalizacji": lid,
+                "location": lokalizacje.get(lid, ""),
+            }
+
+        # Recipes, joined with their skladniki
+        for row, skladniki in _join_skladniki(files["przepisy"], files["skladniki"]):
+            recipe = _recipe_from_przepis(row, skladniki, produkty)
+            if recipe is not None:
+                count += 1
+                yield recipe
+    except Exception as e:
+        logger.error(
+            "Failed to parse relational CSVs in %s after %d recipes: %s",
+            base_dir,
+            count,
+            e,
+        )
+        raise
+    if count:
+        logger.info(
+            "Extracted %d recipes from relational CSV set in %s", count, base_dir
+        )
 
 
-def seed_from_legacy(
+def load_legacy_recipes(
     odb_path: str = "/app/legacy/przepisy_tmp.odb",
     csv_path: str = "/app/legacy/recipes.csv",
     base_dir: str = "/app/legacy",
-) -> None:
-    """Seed using the best available legacy data.
+) -> Iterable[Dict[str, Any]]:
+    """Return recipes (API shape) from the best available legacy data.
+    The relational CSV set is returned as a lazy iterator (see extract_from_csvs).
 
     Priority:
     1. Relational CSVs (przepisy.csv + skladniki.csv + produkty.csv) in base_dir
@@ -634,27 +706,17 @@ def seed_from_legacy(
     3. .odb heuristic
     4. Bundled LEGACY_RECIPES
     """
-    existing = get_recipes()
-    if existing is None:
-        logger.error("API not reachable. Is backend running?")
-        return
-
-    if existing:
-        logger.info(
-            "DB has %d recipes already. Skipping (for new program: remove data or force).",
-            len(existing),
-        )
-        return
-
     recipes: List[Dict[str, Any]] = []
 
     # 1. Best: the detailed relational CSV export the user provided
     #    (przepisy.csv + skladniki.csv + produkty.csv + jednostki.csv)
     rel_files = ["przepisy.csv", "skladniki.csv", "produkty.csv"]
     if all(os.path.exists(os.path.join(base_dir, f)) for f in rel_files):
-        recipes = extract_from_csvs(base_dir)
-        if recipes:
+        relational = extract_from_csvs(base_dir)
+        first = next(relational, None)
+        if first is not None:
             logger.info("Using relational CSV set from %s", base_dir)
+            return itertools.chain([first], relational)
 
     # 2. Fallback: a flat user-exported recipes.csv (from previous 2-step advice)
     if not recipes:
@@ -686,27 +748,134 @@ def seed_from_legacy(
     # 4. Final fallback
     if not recipes:
         recipes = LEGACY_RECIPES
+    return recipes
+
 
-    logger.info("Seeding %d recipes from legacy data...", len(recipes))
-    for r in recipes:
-        create_recipe(r)
+def ingest_directly(
+    recipes: Iterable[Dict[str, Any]], batch_size: int = BATCH_SIZE
+) -> ImportResult:
+    """Create recipes (API shape) in this process, straight into crud's storage
+    backend, then close the backend so a journal is compacted into its snapshot.
 
-    logger.info("Legacy migration seed completed.")
+    Recipes the API would reject (see crud.recipe_data_error) are skipped and
+    counted in `failed`. If `recipes` raises (e.g. the export is malformed
+    halfway through), the recipes created so far are deleted again before the
+    error propagates, so a failed import leaves no partial catalog behind.
+    """
+    # Importing crud loads the store from MEAL_PLANNER_DB / MEAL_PLANNER_JOURNAL
+    from meal_planner_app import crud  # pylint: disable=import-outside-toplevel
+
+    result = ImportResult()
+    started = time.monotonic()
+    batch: List[Dict[str, Any]] = []
+    created_ids: List[Any] = []
+
+    def flush() -> None:
+        created_ids.extend(recipe.recipe_id for recipe in crud.create_recipes(batch))
+        result.created = len(created_ids)
+        batch.clear()
+        logger.info("Imported %d recipes (%d failed)", result.created, result.failed)
+
+    try:
+        for recipe in recipes:
+            data = {
+                "name": recipe.get("name"),
+                "instructions": recipe.get("instructions"),
+                "description": recipe.get("description"),
+                "source_url": recipe.get("source_url"),
+                "ingredients_data": recipe.get("ingredients") or [],
+            }
+            error = crud.recipe_data_error(data)
+            if error:
+                logger.warning("Skipped recipe %s: %s", recipe.get("name"), error)
+                result.failed += 1
+                continue
+            batch.append(data)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except BaseException:
+        logger.error("Import failed; removing the %d recipes created", len(created_ids))
+        for recipe_id in created_ids:
+            crud.delete_recipe(recipe_id)
+        raise
+    finally:
+        crud.storage_backend.close()
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def seed_from_legacy(
+    odb_path: str = "/app/legacy/przepisy_tmp.odb",
+    csv_path: str = "/app/legacy/recipes.csv",
+    base_dir: str = "/app/legacy",
+    direct: bool = False,
+) -> None:
+    """Seed using the best available legacy data (see load_legacy_recipes).
+
+    By default recipes are posted to the running backend. With `direct`, no
+    server is needed: they are written straight into the storage backend
+    selected by MEAL_PLANNER_JOURNAL / MEAL_PLANNER_DB, leaving a data file
+    the server loads on startup.
+    """
+    if direct:
+        from meal_planner_app import crud  # pylint: disable=import-outside-toplevel
+
+        if not crud.storage_backend.persistent:
+            logger.error(
+                "--direct needs MEAL_PLANNER_JOURNAL or MEAL_PLANNER_DB to write to."
+            )
+            return
+        has_recipes = len(crud.recipes_db) > 0
+    else:
+        existing = get_recipes()
+        if existing is None:
+            logger.error("API not reachable. Is backend running?")
+            return
+        has_recipes = bool(existing)
+
+    if has_recipes:
+        logger.info(
+            "DB has recipes already. Skipping (for new program: remove data or force)."
+        )
+        return
+
+    recipes = load_legacy_recipes(odb_path, csv_path, base_dir)
+    logger.info("Seeding recipes from legacy data...")
+    if direct:
+        result = ingest_directly(recipes)
+    else:
+        result = import_recipes(recipes, API_BASE_URL)
+
+    logger.info(
+        "Legacy migration seed completed: %d recipes created, %d failed, "
+        "%.1fs over %d connections.",
+        result.created,
+        result.failed,
+        result.seconds,
+        result.connections,
+    )
 
 
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) > 1:
-        arg = sys.argv[1]
+    # --direct: write into the storage backend instead of a running server
+    direct_mode = "--direct" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--direct"]
+    if args:
+        arg = args[0]
         if os.path.isdir(arg):
             # python -m ... /path/to/dir-containing-the-csvs
             seed_from_legacy(
-                base_dir=arg, odb_path=os.path.join(arg, "przepisy_tmp.odb")
+                base_dir=arg,
+                odb_path=os.path.join(arg, "przepisy_tmp.odb"),
+                direct=direct_mode,
             )
         elif arg.endswith(".csv"):
-            seed_from_legacy(csv_path=arg)
+            seed_from_legacy(csv_path=arg, direct=direct_mode)
         else:
-            seed_from_legacy()
+            seed_from_legacy(direct=direct_mode)
     else:
-        seed_from_legacy()
+        seed_from_legacy(direct=direct_mode)
@@ -0,0 +1,99 @@
+"""
+Defines the Product, Unit and Location catalog models.
+
+Legacy data (produkty.csv, jednostki.csv, lokalizacje.csv) repeats the same
+product, unit and location names across thousands of recipe ingredients.
+Ingredients therefore reference shared catalog entries instead of holding
+their own copies of the strings. Each entry gets a small integer id, so
+ingredients can be grouped on (product id, unit id, location id) tuples.
+
+Entries are interned by name and never removed: ids stay valid for the life
+of the process, and the catalogs are bounded by the vocabulary, not by the
+number of recipes.
+"""
+
+import threading
+from typing import Dict, Generic, Hashable, Iterator, List, Optional, Type, TypeVar
+
+
+class CatalogEntry:  # pylint: disable=too-few-public-methods
+    """A named catalog entry with an interned integer id."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, entry_id: int, name: Optional[str]):
+        self.id = entry_id  # pylint: disable=invalid-name
+        self.name = name
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(id={self.id}, name={self.name!r})>"
+
+
+class Product(CatalogEntry):  # pylint: disable=too-few-public-methods
+    """A product (produkty.nazwa), e.g. "Mąka pszenna"."""
+
+    __slots__ = ()
+
+
+class Unit(CatalogEntry):  # pylint: disable=too-few-public-methods
+    """A unit of measure (jednostki.csv), e.g. "g"."""
+
+    __slots__ = ()
+
+
+class Location(CatalogEntry):  # pylint: disable=too-few-public-methods
+    """A store location / aisle (lokalizacje.csv), e.g. "Pieczywo"."""
+
+    __slots__ = ()
+
+
+E = TypeVar("E", bound=CatalogEntry)
+
+
+class CatalogTable(Generic[E]):
+    """Interns names into entries of one kind, with dense integer ids.
+
+    The empty name is always entry 0, so a blank value has a fixed id.
+    Creating an entry takes a lock: besides crud's writers, readers intern
+    names when they build a recipe's deferred ingredients.
+    """
+
+    def __init__(self, kind: Type[E]):
+        self._kind = kind
+        self._by_name: Dict[Hashable, E] = {}
+        self._entries: List[E] = []
+        self._lock = threading.Lock()
+        self.intern("")
+
+    def intern(self, name: Optional[str]) -> E:
+        """Returns the entry for `name`, creating it on first use."""
+        entry = self._by_name.get(name)
+        if entry is None:
+            with self._lock:
+                entry = self._by_name.get(name)
+                if entry is None:
+                    entry = self._kind(len(self._entries), name)
+                    self._entries.append(entry)
+                    self._by_name[name] = entry
+        return entry
+
+    def get(self, entry_id: int) -> Optional[E]:
+        """Returns the entry with the given id, or None."""
+        if 0 <= entry_id < len(self._entries):
+            return self._entries[entry_id]
+        return None
+
+    def find(self, name: Optional[str]) -> Optional[E]:
+        """Returns the entry for `name` without creating it, or None."""
+        return self._by_name.get(name)
+
+    def __iter__(self) -> Iterator[E]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+products: CatalogTable[Product] = CatalogTable(Product)
+units: CatalogTable[Unit] = CatalogTable(Unit)
+locations: CatalogTable[Location] = CatalogTable(Location)
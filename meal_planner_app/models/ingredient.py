@@ -2,12 +2,68 @@
 Defines the Ingredient data model.
 """
 
-from typing import Optional, Union
+import functools
+import math
+import re
+import sys
+from typing import Optional, Tuple, Union
+
+from .catalog import Location, Product, Unit, locations, products, units
+
+_FRACTION_RE = re.compile(r"^(?:(\d+)\s+)?(\d+)\s*/\s*(\d+)$")
+_RANGE_RE = re.compile(r"^(.+?)\s*[-\u2013]\s*(.+)$")
+
+
+def _parse_amount(text: str) -> Optional[float]:
+    """Parses a single amount: "2", "1.5", "1,5", "1/2" or "1 1/2"."""
+    text = text.replace(",", ".")
+    try:
+        value = float(text)
+    except ValueError:
+        match = _FRACTION_RE.match(text)
+        if not match or not int(match.group(3)):
+            return None
+        whole, numerator, denominator = match.groups()
+        value = int(whole or 0) + int(numerator) / int(denominator)
+    return value if math.isfinite(value) else None
+
+
+def parse_quantity(quantity: Union[float, str, None]) -> Optional[float]:
+    """Returns the numeric value of a recipe quantity, or None if it is not numeric.
+
+    Accepts numbers, decimal commas ("1,5"), fractions ("1/2", "1 1/2") and
+    ranges ("1-2", "1/2-1"); a range counts as its upper bound, so a shopping
+    list summing it buys enough (an item listed once keeps its text). Free
+    text ("to taste", "2 scoops") and empty values are not numeric.
+    """
+    if isinstance(quantity, bool):
+        return None
+    if isinstance(quantity, (int, float)):
+        return float(quantity) if math.isfinite(quantity) else None
+    return _parse_text(str(quantity or "").strip())
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_text(text: str) -> Optional[float]:
+    """Parses a stripped quantity string (cached: equal texts share one float)."""
+    value = _parse_amount(text) if text else None
+    if value is None and text:
+        match = _RANGE_RE.match(text)
+        if match:
+            low, high = _parse_amount(match.group(1)), _parse_amount(match.group(2))
+            if low is not None and high is not None and low <= high:
+                value = high
+    return value
 
 
 class Ingredient:  # pylint: disable=too-few-public-methods
     """Represents a single ingredient *as used in a recipe*.
 
+    Uses __slots__: a catalog holds millions of these, and dropping the
+    per-instance __dict__ more than halves their size. Name, unit and
+    location are stored as shared Product/Unit/Location entries (see
+    catalog.py) and exposed as plain string attributes.
+
     Legacy master data (from produkty.csv) for an "ingredient":
       - id: unique key
       - nazwa: name
@@ -17,8 +73,21 @@ class Ingredient:  # pylint: disable=too-few-public-methods
     In a recipe (skladniki.csv row):
       - quantity = "liczba"
       - name/unit/location_id are denormalized from the linked produkt
+
+    `quantity_value` holds the quantity parsed by parse_quantity (None when it
+    is free text); it is recomputed whenever `quantity` is assigned, so
+    aggregation never has to parse text.
     """
 
+    __slots__ = (
+        "product",
+        "_quantity",
+        "quantity_value",
+        "unit_entry",
+        "_location_id",
+        "location_entry",
+    )
+
     def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
         name: str,
@@ -43,6 +112,68 @@ class Ingredient:  # pylint: disable=too-few-public-methods
         self.location_id = location_id
         self.location = location
 
+    @property
+    def name(self) -> str:
+        """The product name."""
+        return self.product.name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self.product: Product = products.intern(value)
+
+    @property
+    def unit(self) -> str:
+        """The unit name."""
+        return self.unit_entry.name
+
+    @unit.setter
+    def unit(self, value: str) -> None:
+        self.unit_entry: Unit = units.intern(value)
+
+    @property
+    def location(self) -> Optional[str]:
+        """The location name, or None."""
+        entry = self.location_entry
+        return entry.name if entry is not None else None
+
+    @location.setter
+    def location(self, value: Optional[str]) -> None:
+        self.location_entry: Optional[Location] = (
+            locations.intern(value) if value is not None else None
+        )
+
+    @property
+    def location_id(self) -> Optional[str]:
+        """The legacy location id (produkt.idLokalizacji), or None."""
+        return self._location_id
+
+    @location_id.setter
+    def location_id(self, value: Optional[str]) -> None:
+        self._location_id = sys.intern(value) if isinstance(value, str) else value
+
+    @property
+    def group_key(self) -> Tuple[int, int, int]:
+        """(product id, unit id, location id) used to merge shopping list items.
+
+        A missing location shares id 0 with the empty location name.
+        """
+        entry = self.location_entry
+        return (
+            self.product.id,
+            self.unit_entry.id,
+            entry.id if entry is not None else 0,
+        )
+
+    @property
+    def quantity(self) -> Union[float, str]:
+        """The quantity as entered (number or text)."""
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, value: Union[float, str]) -> None:
+        self._quantity = value
+        self.quantity_value = parse_quantity(value)
+
     def __repr__(self):
         return (
             f"<Ingredient(name='{self.name}', quantity={self.quantity}, "
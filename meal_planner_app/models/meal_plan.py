@@ -9,6 +9,8 @@ from typing import List, Optional
 class MealPlan:  # pylint: disable=too-few-public-methods
     """Represents a meal plan, which is a collection of recipes for a period (e.g., a week)."""
 
+    __slots__ = ("meal_plan_id", "name", "description", "recipe_ids")
+
     def __init__(
         self,
         name: str,
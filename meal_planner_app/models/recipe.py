@@ -3,14 +3,30 @@ Defines the Recipe data model.
 """
 
 import uuid
-from typing import List, Optional, TYPE_CHECKING
+from typing import Callable, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .ingredient import Ingredient
 
 
-class Recipe:  # pylint: disable=too-few-public-methods
-    """Represents a culinary recipe."""
+class Recipe:  # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    """Represents a culinary recipe.
+
+    The ingredient list may be built on first access instead (see
+    defer_ingredients()), so a store can be loaded without creating every
+    Ingredient up front.
+    """
+
+    __slots__ = (
+        "recipe_id",
+        "name",
+        "description",
+        "_ingredients",
+        "_ingredients_loader",
+        "instructions",
+        "source_url",
+        "seq",
+    )
 
     def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
@@ -20,6 +36,7 @@ class Recipe:  # pylint: disable=too-few-public-methods
         description: Optional[str] = None,
         source_url: Optional[str] = None,
         recipe_id: Optional[uuid.UUID] = None,
+        seq: Optional[int] = None,
     ):
         """
         Initializes a Recipe instance.
@@ -31,13 +48,43 @@ class Recipe:  # pylint: disable=too-few-public-methods
             description: An optional short description of the recipe.
             source_url: An optional URL to the original source of the recipe.
             recipe_id: An optional UUID for the recipe; one is generated if not provided.
+            seq: The recipe's place in the catalog order (see store.new_sequence),
+                set when it is created and kept by updates.
         """
         self.recipe_id = recipe_id if recipe_id else uuid.uuid4()
         self.name = name
         self.description = description
+        self._ingredients_loader: Optional[Callable[[], List["Ingredient"]]] = None
         self.ingredients = ingredients if ingredients is not None else []
         self.instructions = instructions
         self.source_url = source_url
+        self.seq = seq
+
+    @property
+    def ingredients(self) -> List["Ingredient"]:
+        """The recipe's Ingredient objects (built now if they were deferred)."""
+        ingredients = self._ingredients
+        if ingredients is None:
+            loader = self._ingredients_loader
+            if loader is None:  # Another thread built them meanwhile
+                return self._ingredients
+            ingredients = loader()
+            self._ingredients = ingredients
+            self._ingredients_loader = None
+        return ingredients
+
+    @ingredients.setter
+    def ingredients(self, value: List["Ingredient"]) -> None:
+        self._ingredients = value
+        self._ingredients_loader = None
+
+    def defer_ingredients(self, loader: Callable[[], List["Ingredient"]]) -> None:
+        """Makes the first access to `ingredients` build them with `loader`.
+
+        Concurrent first accesses may each call it; one result is kept.
+        """
+        self._ingredients_loader = loader
+        self._ingredients = None
 
     def __repr__(self):
         return f"<Recipe(recipe_id={self.recipe_id}, name='{self.name}')>"
@@ -1,8 +1,24 @@
 import uuid
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List, Optional, Union
 
 
+def _slotted(cls):
+    """Rebuilds a dataclass with __slots__ for its fields.
+
+    Equivalent to @dataclass(slots=True), which needs Python 3.10.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
 @dataclass
 class ShoppingListItem:
     """Represents a single item in a shopping list."""
@@ -15,6 +31,7 @@ class ShoppingListItem:
     location_id: Optional[str] = None
 
 
+@_slotted
 @dataclass
 class ShoppingList:
     """Represents a shopping list, typically generated from a meal plan."""
@@ -0,0 +1,441 @@
+"""
+Search indexes maintained incrementally by crud.py on recipe writes.
+
+The indexes only map normalized keys to recipe ids; crud resolves ids back to
+Recipe objects through the recipe store. All text is folded with
+normalize_term when it is indexed (once per write), and queries get the same
+folding, so matching is case- and accent-insensitive ("zabek" finds "Ząbek").
+
+Writes are serialized by crud's writer lock, but searches run concurrently
+with them (threaded workers) without locking: read paths only do point
+lookups on live dicts/sets and iterate snapshots taken with single C-level
+copies (set(...), tuple(...)), which the GIL makes atomic.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+import uuid
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from meal_planner_app.store import content_digest
+
+TRIGRAM_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+# Letters that NFKD does not decompose into base letter + combining mark
+_EXTRA_FOLDS = str.maketrans(
+    {
+        "ł": "l",
+        "Ł": "L",
+        "đ": "d",
+        "Đ": "D",
+        "ø": "o",
+        "Ø": "O",
+        "ß": "ss",
+        "æ": "ae",
+        "Æ": "AE",
+        "œ": "oe",
+        "Œ": "OE",
+    }
+)
+
+
+def normalize_term(text: str) -> str:
+    """Normalizes a name or query the same way for indexing and lookup.
+
+    Lower-cases and strips diacritics (NFKD, combining marks dropped, plus
+    letters like 'ł' that have no decomposition). ASCII text takes a fast path.
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.translate(_EXTRA_FOLDS))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Splits text into normalized word tokens for ranked search."""
+    if not text:
+        return []
+    return _WORD_RE.findall(normalize_term(text))
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Returns the set of character trigrams of `text`."""
+    return {text[i : i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """Character-trigram index answering substring queries over short texts.
+
+    Each key (a recipe id, an ingredient name...) is indexed with a tuple of
+    already-normalized texts. A query first intersects the postings of its
+    trigrams to get a small candidate set, then runs the exact
+    `term in text` check on the candidates only, so results are identical
+    to a full scan. Terms shorter than a trigram fall back to checking every
+    stored text.
+    """
+
+    def __init__(self):
+        self._texts: Dict[Hashable, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def add(self, key: Hashable, texts: Iterable[str]) -> None:
+        """Indexes `key` under the given normalized texts (replacing any previous entry)."""
+        self.remove(key)
+        stored = tuple(text for text in texts if text)
+        self._texts[key] = stored
+        for text in stored:
+            for gram in _trigrams(text):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Drops `key` from the index, if present."""
+        stored = self._texts.pop(key, None)
+        if not stored:
+            return
+        for text in stored:
+            for gram in _trigrams(text):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    continue
+                postings.discard(key)
+                if not postings:
+                    del self._postings[gram]
+
+    def _candidates(self, term: str) -> Iterable[Hashable]:
+        """Returns keys that may contain `term` (a superset of the true matches)."""
+        grams = _trigrams(term)
+        if not grams:
+            return list(self._texts)
+        postings: List[Set[Hashable]] = []
+        for gram in grams:
+            gram_postings = self._postings.get(gram)
+            if not gram_postings:
+                return ()
+            postings.append(gram_postings)
+        postings.sort(key=len)
+        # Filter a private copy of the smallest postings with point lookups
+        # (never iterate live postings: a writer may be changing them)
+        candidates = set(postings[0])
+        for gram_postings in postings[1:]:
+            candidates = {key for key in candidates if key in gram_postings}
+        return candidates
+
+    def search(self, term: str) -> Set[Hashable]:
+        """Returns the keys having at least one text that contains `term`.
+
+        `term` must already be normalized (see normalize_term).
+        """
+        texts = self._texts
+        return {
+            key
+            for key in self._candidates(term)
+            if any(term in text for text in texts.get(key, ()))
+        }
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        self._texts.clear()
+        self._postings.clear()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+
+class IngredientIndex:
+    """Inverted index from normalized ingredient names to recipe ids.
+
+    Lookups keep the substring semantics of the old full scan
+    (`term in ingredient.name.lower()`). The vocabulary of distinct names is
+    itself trigram-indexed, so a lookup only verifies the few names sharing
+    the term's trigrams; an exact name match is a single dict lookup.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[uuid.UUID]] = {}
+        self._vocabulary = TrigramIndex()
+
+    def add(self, recipe_id: uuid.UUID, names: Iterable[str]) -> None:
+        """Indexes a recipe under each of its ingredient names."""
+        for key in {normalize_term(name) for name in names if name}:
+            postings = self._postings.get(key)
+            if postings is None:
+                postings = self._postings[key] = set()
+                self._vocabulary.add(key, (key,))
+            postings.add(recipe_id)
+
+    def remove(self, recipe_id: uuid.UUID, names: Iterable[str]) -> None:
+        """Removes a recipe from the postings of the given ingredient names."""
+        for key in {normalize_term(name) for name in names if name}:
+            postings = self._postings.get(key)
+            if postings is None:
+                continue
+            postings.discard(recipe_id)
+            if not postings:
+                del self._postings[key]
+                self._vocabulary.remove(key)
+
+    def lookup(self, term: str) -> Set[uuid.UUID]:
+        """Returns ids of recipes with an ingredient name containing `term`.
+
+        `term` must already be normalized (see normalize_term).
+        """
+        exact = self._postings.get(term)
+        matches = set(exact) if exact else set()
+        for key in self._vocabulary.search(term):
+            if key != term:
+                matches.update(self._postings.get(key, ()))
+        return matches
+
+    def clear(self) -> None:
+        """Drops every posting."""
+        self._postings.clear()
+        self._vocabulary.clear()
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+
+class RankedIndex:  # pylint: disable=too-many-instance-attributes
+    """BM25F-style ranked full-text index over weighted document fields.
+
+    Every document is indexed with one text per field (for recipes: name,
+    description, ingredient names, instructions). Per-field term frequencies
+    are length-normalized against that field's average length, weighted, and
+    summed before BM25 saturation; each query term contributes its IDF times
+    the saturated frequency. search() scores only the documents in the
+    postings of the query terms and keeps the best `limit` with a heap.
+    Query terms are summed in sorted order and equal scores go to the
+    document indexed first, so results never depend on hash order.
+
+    Args:
+        field_weights: Weight of each field, in the order texts are passed to add().
+        k1: Term-frequency saturation parameter.
+        b: Length-normalization strength (0 disables it).
+    """
+
+    def __init__(
+        self, field_weights: Sequence[float], k1: float = 1.2, b: float = 0.75
+    ):
+        self._weights = tuple(field_weights)
+        self._k1 = k1
+        self._b = b
+        # term -> {doc key: per-field term frequencies}
+        self._postings: Dict[str, Dict[Hashable, Tuple[int, ...]]] = {}
+        # doc key -> per-field token counts, and the distinct terms (for removal)
+        self._lengths: Dict[Hashable, Tuple[int, ...]] = {}
+        self._terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._total_lengths = [0] * len(self._weights)
+        # doc key -> order of first indexing, the tiebreak for equal scores
+        self._order: Dict[Hashable, int] = {}
+        self._next_order = 0
+
+    def add(self, key: Hashable, texts: Sequence[Optional[str]]) -> None:
+        """Indexes a document (replacing any previous version of it)."""
+        order = self._order.get(key)
+        self.remove(key)
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        self._order[key] = order
+        field_count = len(self._weights)
+        frequencies: Dict[str, List[int]] = {}
+        lengths = []
+        for field, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                frequencies.setdefault(token, [0] * field_count)[field] += 1
+        self._lengths[key] = tuple(lengths)
+        self._terms[key] = tuple(frequencies)
+        for field, length in enumerate(lengths):
+            self._total_lengths[field] += length
+        for token, per_field in frequencies.items():
+            self._postings.setdefault(token, {})[key] = tuple(per_field)
+
+    def remove(self, key: Hashable) -> None:
+        """Drops a document from the index, if present."""
+        lengths = self._lengths.pop(key, None)
+        if lengths is None:
+            return
+        del self._order[key]
+        for field, length in enumerate(lengths):
+            self._total_lengths[field] -= length
+        for token in self._terms.pop(key):
+            docs = self._postings[token]
+            del docs[key]
+            if not docs:
+                del self._postings[token]
+
+    def _weighted_tf(
+        self,
+        lengths: Tuple[int, ...],
+        per_field: Tuple[int, ...],
+        averages: List[float],
+    ) -> float:
+        """Combines per-field term frequencies into one length-normalized, weighted tf."""
+        weighted_tf = 0.0
+        for field, tf in enumerate(per_field):
+            if tf:
+                norm = 1.0 - self._b + self._b * lengths[field] / averages[field]
+                weighted_tf += self._weights[field] * tf / norm
+        return weighted_tf
+
+    def search(self, query: str, limit: int) -> List[Tuple[Hashable, float]]:
+        """Returns up to `limit` (key, score) pairs, best first."""
+        doc_count = len(self._lengths)
+        if not doc_count or limit <= 0:
+            return []
+        averages = [(total / doc_count) or 1.0 for total in self._total_lengths]
+        scores: Dict[Hashable, float] = {}
+        for token in sorted(set(tokenize(query))):
+            docs = self._postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1.0 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            # Iterate a snapshot: a concurrent write may change the postings
+            for key, per_field in tuple(docs.items()):
+                lengths = self._lengths.get(key)
+                if lengths is None:
+                    continue  # Removed since the snapshot was taken
+                weighted_tf = self._weighted_tf(lengths, per_field, averages)
+                scores[key] = scores.get(key, 0.0) + idf * weighted_tf / (
+                    self._k1 + weighted_tf
+                )
+        order = self._order
+        return heapq.nlargest(
+            limit,
+            scores.items(),
+            key=lambda item: (item[1], -order.get(item[0], self._next_order)),
+        )
+
+    def clear(self) -> None:
+        """Drops every document."""
+        self._postings.clear()
+        self._lengths.clear()
+        self._terms.clear()
+        self._total_lengths = [0] * len(self._weights)
+        self._order.clear()
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+
+class NameCatalog:
+    """Reference-counted set of display names with prefix lookup.
+
+    Names are counted once per occurrence, so a name disappears only when the
+    last recipe using it is updated or deleted. A sorted array of
+    (folded name, display name) pairs is maintained alongside the counts
+    (bisect.insort on a new name, or one merge for a batch of them, bisect
+    deletion on a name's last reference),
+    so prefix suggestions are a binary search plus a short scan.
+
+    `version` changes only when the set of names changes (not on reference
+    count changes), so callers can cache anything derived from names().
+    digest() identifies the set itself, equally in every process.
+    """
+
+    # New names per add() call inserted one by one; more are merged in a sort
+    INSORT_LIMIT = 8
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._sorted: List[Tuple[str, str]] = []
+        self._names: Optional[Tuple[int, List[str]]] = None
+        self._digest: Optional[Tuple[int, int]] = None
+        self.version = 0
+
+    def _changed(self) -> None:
+        self._names = None
+        self.version += 1
+
+    def add(self, names: Iterable[str]) -> None:
+        """Adds one reference for each of `names` (blank names are ignored)."""
+        new_entries = []
+        for name in names:
+            name = name.strip() if name else ""
+            if not name:
+                continue
+            count = self._counts.get(name, 0)
+            self._counts[name] = count + 1
+            if not count:
+                new_entries.append((normalize_term(name), name))
+        if not new_entries:
+            return
+        if len(new_entries) <= self.INSORT_LIMIT:
+            for entry in new_entries:
+                bisect.insort(self._sorted, entry)
+        else:
+            # One merge instead of an O(n) insertion per name (bulk imports);
+            # sorted into a new list, so concurrent readers never see it half done
+            merged = self._sorted + new_entries
+            merged.sort()
+            self._sorted = merged
+        self._changed()
+
+    def remove(self, names: Iterable[str]) -> None:
+        """Drops one reference for each of `names`."""
+        for name in names:
+            name = name.strip() if name else ""
+            count = self._counts.get(name)
+            if not count:
+                continue
+            if count > 1:
+                self._counts[name] = count - 1
+                continue
+            del self._counts[name]
+            entry = (normalize_term(name), name)
+            position = bisect.bisect_left(self._sorted, entry)
+            if position < len(self._sorted) and self._sorted[position] == entry:
+                del self._sorted[position]
+            self._changed()
+
+    def names(self) -> List[str]:
+        """Returns all names in plain sorted() order (cached until the set changes)."""
+        cached = self._names
+        if cached is None or cached[0] != self.version:
+            # Tagged with the version it was built from, so a list built while
+            # a writer changes the names is never served after that write
+            cached = (self.version, sorted(self._counts))
+            self._names = cached
+        return list(cached[1])
+
+    def digest(self) -> int:
+        """Returns a digest of names(), the same in every process holding the
+        same names (cached until the set changes).
+        """
+        cached = self._digest
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, content_digest(sorted(self._counts)))
+            self._digest = cached
+        return cached[1]
+
+    def suggest(self, prefix: str, limit: int) -> List[str]:
+        """Returns up to `limit` names whose folded form starts with the folded `prefix`."""
+        folded = normalize_term(prefix.strip())
+        position = bisect.bisect_left(self._sorted, (folded,))
+        suggestions = []
+        for key, name in self._sorted[position : position + limit]:
+            if not key.startswith(folded):
+                break
+            suggestions.append(name)
+        return suggestions
+
+    def clear(self) -> None:
+        """Drops every name."""
+        self._counts.clear()
+        self._sorted.clear()
+        self._changed()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
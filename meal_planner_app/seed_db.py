@@ -8,7 +8,7 @@ test-only /api/test/seed-db endpoint.
 """
 
 from meal_planner_app.crud import (
-    create_recipe,
+    create_recipes,
     reset_recipes_db,
     list_recipes,
     list_meal_plans,
@@ -16,7 +16,7 @@ from meal_planner_app.crud import (
 )
 
 # Single source of truth for seeded recipe data.
-# Keys match the kwargs expected by crud.create_recipe.
+# Keys match the kwargs expected by crud.create_recipe (and crud.create_recipes).
 RECIPES_TO_SEED = [
     {
         "name": "Classic Pancakes",
@@ -68,8 +68,7 @@ def seed_database():
     reset_recipes_db()
 
     print(f"Seeding database with {len(RECIPES_TO_SEED)} recipes...")
-    for recipe_data in RECIPES_TO_SEED:
-        create_recipe(**recipe_data)
+    create_recipes(RECIPES_TO_SEED)
 
     print("Database seeding complete!")
 
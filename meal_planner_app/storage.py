@@ -0,0 +1,797 @@
+"""
+Pluggable persistence behind crud.py.
+
+crud keeps serving every read from its in-memory stores and indexes; a
+storage backend only persists writes and, for backends shared between
+processes, reports writes made elsewhere so each process can refresh its
+in-memory copy.
+
+Writes are expressed as changes: (kind, key, record) tuples where kind is
+RECIPE, MEAL_PLAN or SHOPPING_LIST, key is the record id as a string, and
+record is a plain dict (see recipe_record() and friends) or None for a
+delete. A change with key None clears every record of that kind.
+
+Backends:
+    MemoryBackend  - nothing is persisted (the default, used by the tests).
+    SQLiteBackend  - a SQLite database in WAL mode, shareable by several
+                     gunicorn workers / processes on one host.
+    JournalBackend - an append-only journal plus compacted snapshots, for a
+                     single process; the fastest to restart from.
+
+backend_from_env() picks the backend from the MEAL_PLANNER_DB (path of the
+SQLite file) or MEAL_PLANNER_JOURNAL (journal directory) environment
+variables; with neither set, data is kept in memory only.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: journal directories are not locked
+    fcntl = None
+
+from .models.ingredient import Ingredient
+from .models.meal_plan import MealPlan
+from .models.recipe import Recipe
+from .models.shopping_list import ShoppingList, ShoppingListItem
+
+RECIPE = "recipe"
+MEAL_PLAN = "meal_plan"
+SHOPPING_LIST = "shopping_list"
+
+Record = Dict[str, Any]
+Change = Tuple[str, Optional[str], Optional[Record]]
+
+DB_PATH_ENV = "MEAL_PLANNER_DB"
+JOURNAL_DIR_ENV = "MEAL_PLANNER_JOURNAL"
+
+
+# --- Record conversion ---
+
+
+def recipe_record(recipe: Recipe) -> Record:
+    """Converts a Recipe to a plain record."""
+    return {
+        "id": str(recipe.recipe_id),
+        "name": recipe.name,
+        "description": recipe.description,
+        "instructions": recipe.instructions,
+        "source_url": recipe.source_url,
+        "ingredients": [ingredient_record(ing) for ing in recipe.ingredients],
+        "seq": recipe.seq,
+    }
+
+
+def ingredient_record(ingredient: Ingredient) -> Record:
+    """Converts an Ingredient to a plain record."""
+    return {
+        "name": ingredient.name,
+        "quantity": ingredient.quantity,
+        "unit": ingredient.unit,
+        "location_id": ingredient.location_id,
+        "location": ingredient.location,
+    }
+
+
+def recipe_from_record(record: Record) -> Recipe:
+    """Builds a Recipe from a record made by recipe_record(), or packed by
+    _pack_record() (its ingredients are then built on first access).
+    """
+    ingredients = record["ingredients"]
+    packed = isinstance(ingredients, bytes)
+    recipe_id = record["id"]
+    recipe = Recipe(
+        name=record["name"],
+        instructions=record["instructions"],
+        ingredients=None if packed else [Ingredient(**ing) for ing in ingredients],
+        description=record["description"],
+        source_url=record["source_url"],
+        recipe_id=(
+            uuid.UUID(int=recipe_id)
+            if isinstance(recipe_id, int)
+            else uuid.UUID(recipe_id)
+        ),
+        seq=record.get("seq"),  # Absent in records written before it existed
+    )
+    if packed:
+        recipe.defer_ingredients(functools.partial(_unpack_ingredients, ingredients))
+    return recipe
+
+
+def _unpack_ingredients(packed: bytes) -> List[Ingredient]:
+    """Builds the ingredients of a recipe record packed by _pack_record()."""
+    return [Ingredient(**ing) for ing in pickle.loads(packed)]
+
+
+def _pack_record(kind: str, record: Record) -> Record:
+    """Returns the snapshot form of a record: a recipe's ingredient records are
+    pickled into one bytes value, which loads as a single object and is only
+    decoded when the recipe's ingredients are first used, and its id is kept
+    as an integer, which is quicker to turn back into a UUID than a string.
+    """
+    if kind == RECIPE and isinstance(record["id"], str):
+        return dict(
+            record,
+            id=uuid.UUID(record["id"]).int,
+            ingredients=pickle.dumps(
+                record["ingredients"], protocol=pickle.HIGHEST_PROTOCOL
+            ),
+        )
+    return record
+
+
+def meal_plan_record(meal_plan: MealPlan) -> Record:
+    """Converts a MealPlan to a plain record."""
+    return {
+        "id": str(meal_plan.meal_plan_id),
+        "name": meal_plan.name,
+        "description": meal_plan.description,
+        "recipe_ids": [str(rid) for rid in meal_plan.recipe_ids],
+    }
+
+
+def meal_plan_from_record(record: Record) -> MealPlan:
+    """Builds a MealPlan from a record made by meal_plan_record()."""
+    return MealPlan(
+        name=record["name"],
+        description=record["description"],
+        recipe_ids=[uuid.UUID(rid) for rid in record["recipe_ids"]],
+        meal_plan_id=uuid.UUID(record["id"]),
+    )
+
+
+def shopping_list_record(shopping_list: ShoppingList) -> Record:
+    """Converts a ShoppingList to a plain record."""
+    return {
+        "id": str(shopping_list.id),
+        "name": shopping_list.name,
+        "meal_plan_id": str(shopping_list.meal_plan_id),
+        "items": [
+            {
+                "name": item.name,
+                "quantity": item.quantity,
+                "unit": item.unit,
+                "purchased": item.purchased,
+                "location": item.location,
+                "location_id": item.location_id,
+            }
+            for item in shopping_list.items
+        ],
+    }
+
+
+def shopping_list_from_record(record: Record) -> ShoppingList:
+    """Builds a ShoppingList from a record made by shopping_list_record()."""
+    return ShoppingList(
+        name=record["name"],
+        items=[ShoppingListItem(**item) for item in record["items"]],
+        id=uuid.UUID(record["id"]),
+        meal_plan_id=uuid.UUID(record["meal_plan_id"]),
+    )
+
+
+_TO_RECORD = {
+    RECIPE: recipe_record,
+    MEAL_PLAN: meal_plan_record,
+    SHOPPING_LIST: shopping_list_record,
+}
+
+
+def make_change(kind: str, key: Optional[uuid.UUID], obj: Any = None) -> Change:
+    """Builds a change for a saved object (or a delete when obj is None)."""
+    return (
+        kind,
+        str(key) if key is not None else None,
+        _TO_RECORD[kind](obj) if obj is not None else None,
+    )
+
+
+# --- Backends ---
+
+
+class StorageBackend:
+    """Interface implemented by every backend.
+
+    `persistent` tells crud whether writes need to be converted to changes at
+    all (the in-memory backend skips that work).
+    """
+
+    persistent = False
+
+    def load(self) -> Iterator[Change]:
+        """Yields every stored record as an upsert change, in insertion order."""
+        return iter(())
+
+    def write(self, changes: List[Change]) -> None:
+        """Persists the changes of one crud operation atomically."""
+
+    def poll(self) -> Optional[List[Change]]:
+        """Returns changes written by other processes since the last load/poll.
+
+        Returns None when too much has changed to replay (the caller should
+        reload everything with load()).
+        """
+        return []
+
+    def reopen(self) -> None:
+        """Re-opens connections and files in a forked child process.
+
+        Database connections and file locks must not be shared across fork();
+        gunicorn calls this (via crud.after_fork) in each preloaded worker.
+        """
+
+    def close(self) -> None:
+        """Releases any resources held by the backend."""
+
+
+class MemoryBackend(StorageBackend):
+    """No persistence: crud's in-memory stores are the only copy of the data."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    instructions TEXT,
+    source_url TEXT,
+    seq INTEGER
+);
+CREATE TABLE IF NOT EXISTS ingredients (
+    recipe_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    quantity,
+    unit TEXT,
+    location_id,
+    location TEXT,
+    PRIMARY KEY (recipe_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ingredients_by_name ON ingredients (name);
+CREATE TABLE IF NOT EXISTS meal_plans (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS meal_plan_recipes (
+    meal_plan_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    recipe_id TEXT NOT NULL,
+    PRIMARY KEY (meal_plan_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS meal_plan_recipes_by_recipe
+    ON meal_plan_recipes (recipe_id);
+CREATE TABLE IF NOT EXISTS shopping_lists (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    meal_plan_id TEXT,
+    items TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shopping_lists_by_meal_plan
+    ON shopping_lists (meal_plan_id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite (WAL mode) storage shared by every process that opens the same file.
+
+    Records are stored in normalized tables (ingredients and meal-plan
+    membership in their own indexed tables). Every write also appends to a
+    `changes` log tagged with this backend's origin id; poll() reads the log
+    entries written by other origins, and `PRAGMA data_version` makes the
+    common "nothing changed" case a single cheap query.
+
+    Args:
+        path: Database file (created if missing).
+        changes_kept: How many change-log entries to keep; a process that falls
+            further behind reloads everything instead of replaying.
+    """
+
+    persistent = True
+    # The change log is trimmed by the write that crosses each multiple of this
+    TRIM_EVERY = 1000
+
+    def __init__(self, path: str, changes_kept: int = 10000):
+        self.path = path
+        self._changes_kept = changes_kept
+        self._origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._last_seq = 0
+        self._data_version = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate(self) -> None:
+        """Upgrades a database created by an older version of this backend."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(recipes)")]
+            if "seq" not in columns:
+                # Recipes stored before sequence numbers keep their order
+                conn.execute("ALTER TABLE recipes ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE recipes SET seq = rowid")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reopen(self) -> None:
+        # The inherited connection is abandoned, not closed: closing it here
+        # could disturb the parent's locks. A new origin keeps this process
+        # from skipping the changes its siblings write.
+        self._lock = threading.Lock()
+        self._origin = uuid.uuid4().hex
+        self._conn = self._connect()
+        self._data_version = None
+
+    # -- writes --
+
+    def write(self, changes: List[Change]) -> None:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                first = seq = None
+                for kind, key, record in changes:
+                    self._write_one(kind, key, record)
+                    seq = conn.execute(
+                        "INSERT INTO changes (origin, kind, key) VALUES (?, ?, ?)",
+                        (self._origin, kind, key),
+                    ).lastrowid
+                    if first is None:
+                        first = seq
+                # Trim the log now and then: a bulk write adds many entries, so
+                # check whether this write's entries crossed a multiple
+                if seq and (first - 1) // self.TRIM_EVERY != seq // self.TRIM_EVERY:
+                    conn.execute(
+                        "DELETE FROM changes WHERE seq < "
+                        "(SELECT MAX(seq) FROM changes) - ?",
+                        (self._changes_kept,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _write_one(self, kind: str, key: Optional[str], record: Optional[Record]):
+        conn = self._conn
+        if kind == RECIPE:
+            if key is None:
+                conn.execute("DELETE FROM recipes")
+                conn.execute("DELETE FROM ingredients")
+                return
+            conn.execute("DELETE FROM ingredients WHERE recipe_id = ?", (key,))
+            if record is None:
+                conn.execute("DELETE FROM recipes WHERE id = ?", (key,))
+                return
+            conn.execute(
+                "INSERT INTO recipes"
+                " (id, name, description, instructions, source_url, seq)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+                " name = excluded.name, description = excluded.description,"
+                " instructions = excluded.instructions,"
+                " source_url = excluded.source_url,"
+                " seq = COALESCE(excluded.seq, seq)",
+                (
+                    key,
+                    record["name"],
+                    record["description"],
+                    record["instructions"],
+                    record["source_url"],
+                    record.get("seq"),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO ingredients (recipe_id, position, name, quantity, unit,"
+                " location_id, location) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        position,
+                        ing["name"],
+                        ing["quantity"],
+                        ing["unit"],
+                        ing["location_id"],
+                        ing["location"],
+                    )
+                    for position, ing in enumerate(record["ingredients"])
+                ],
+            )
+        elif kind == MEAL_PLAN:
+            if key is None:
+                conn.execute("DELETE FROM meal_plans")
+                conn.execute("DELETE FROM meal_plan_recipes")
+                return
+            conn.execute("DELETE FROM meal_plan_recipes WHERE meal_plan_id = ?", (key,))
+            if record is None:
+                conn.execute("DELETE FROM meal_plans WHERE id = ?", (key,))
+                return
+            conn.execute(
+                "INSERT INTO meal_plans (id, name, description) VALUES (?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET"
+                " name = excluded.name, description = excluded.description",
+                (key, record["name"], record["description"]),
+            )
+            conn.executemany(
+                "INSERT INTO meal_plan_recipes (meal_plan_id, position, recipe_id)"
+                " VALUES (?, ?, ?)",
+                [(key, pos, rid) for pos, rid in enumerate(record["recipe_ids"])],
+            )
+        elif kind == SHOPPING_LIST:
+            if key is None:
+                conn.execute("DELETE FROM shopping_lists")
+            elif record is None:
+                conn.execute("DELETE FROM shopping_lists WHERE id = ?", (key,))
+            else:
+                conn.execute(
+                    "INSERT INTO shopping_lists (id, name, meal_plan_id, items)"
+                    " VALUES (?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+                    " name = excluded.name, meal_plan_id = excluded.meal_plan_id,"
+                    " items = excluded.items",
+                    (
+                        key,
+                        record["name"],
+                        record["meal_plan_id"],
+                        json.dumps(record["items"]),
+                    ),
+                )
+        else:
+            raise ValueError(f"Unknown record kind: {kind!r}")
+
+    # -- reads --
+
+    def load(self) -> Iterator[Change]:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                self._data_version = self._query_data_version()
+                self._last_seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM changes"
+                ).fetchone()[0]
+                changes = list(self._load_all())
+            finally:
+                conn.execute("COMMIT")
+        return iter(changes)
+
+    def _load_all(self) -> Iterator[Change]:
+        conn = self._conn
+        ingredients: Dict[str, List[Record]] = {}
+        for row in conn.execute(
+            "SELECT recipe_id, name, quantity, unit, location_id, location"
+            " FROM ingredients ORDER BY recipe_id, position"
+        ):
+            ingredients.setdefault(row[0], []).append(_ingredient(row[1:]))
+        for row in conn.execute(
+            "SELECT id, name, description, instructions, source_url, seq"
+            " FROM recipes ORDER BY seq, rowid"
+        ):
+            yield RECIPE, row[0], _recipe(row, ingredients.get(row[0], []))
+
+        members: Dict[str, List[str]] = {}
+        for plan_id, recipe_id in conn.execute(
+            "SELECT meal_plan_id, recipe_id FROM meal_plan_recipes"
+            " ORDER BY meal_plan_id, position"
+        ):
+            members.setdefault(plan_id, []).append(recipe_id)
+        for row in conn.execute(
+            "SELECT id, name, description FROM meal_plans ORDER BY rowid"
+        ):
+            yield MEAL_PLAN, row[0], _meal_plan(row, members.get(row[0], []))
+
+        for row in conn.execute(
+            "SELECT id, name, meal_plan_id, items FROM shopping_lists ORDER BY rowid"
+        ):
+            yield SHOPPING_LIST, row[0], _shopping_list(row)
+
+    def _load_one(self, kind: str, key: str) -> Optional[Record]:
+        conn = self._conn
+        if kind == RECIPE:
+            row = conn.execute(
+                "SELECT id, name, description, instructions, source_url, seq"
+                " FROM recipes WHERE id = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(
+                "SELECT name, quantity, unit, location_id, location"
+                " FROM ingredients WHERE recipe_id = ? ORDER BY position",
+                (key,),
+            )
+            return _recipe(row, [_ingredient(r) for r in rows])
+        if kind == MEAL_PLAN:
+            row = conn.execute(
+                "SELECT id, name, description FROM meal_plans WHERE id = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(
+                "SELECT recipe_id FROM meal_plan_recipes"
+                " WHERE meal_plan_id = ? ORDER BY position",
+                (key,),
+            )
+            return _meal_plan(row, [r[0] for r in rows])
+        row = conn.execute(
+            "SELECT id, name, meal_plan_id, items FROM shopping_lists WHERE id = ?",
+            (key,),
+        ).fetchone()
+        return _shopping_list(row) if row is not None else None
+
+    def _query_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self) -> Optional[List[Change]]:
+        with self._lock:
+            data_version = self._query_data_version()
+            if data_version == self._data_version:
+                return []
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                self._data_version = data_version
+                oldest = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+                if oldest is not None and oldest > self._last_seq + 1:
+                    return None  # Entries we have not seen were trimmed
+                # Last change per record (or per kind, for clears), in log order
+                pending: Dict[Tuple[str, Optional[str]], None] = {}
+                for seq, origin, kind, key in conn.execute(
+                    "SELECT seq, origin, kind, key FROM changes WHERE seq > ?"
+                    " ORDER BY seq",
+                    (self._last_seq,),
+                ):
+                    self._last_seq = seq
+                    if origin != self._origin:
+                        pending.pop((kind, key), None)
+                        pending[(kind, key)] = None
+                return [
+                    (kind, key, self._load_one(kind, key) if key is not None else None)
+                    for kind, key in pending
+                ]
+            finally:
+                conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _ingredient(row) -> Record:
+    name, quantity, unit, location_id, location = row
+    return {
+        "name": name,
+        "quantity": quantity,
+        "unit": unit,
+        "location_id": location_id,
+        "location": location,
+    }
+
+
+def _recipe(row, ingredients: List[Record]) -> Record:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "instructions": row[3],
+        "source_url": row[4],
+        "ingredients": ingredients,
+        "seq": row[5],
+    }
+
+
+def _meal_plan(row, recipe_ids: List[str]) -> Record:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "recipe_ids": recipe_ids,
+    }
+
+
+def _shopping_list(row) -> Record:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "meal_plan_id": row[2],
+        "items": json.loads(row[3]),
+    }
+
+
+class JournalBackend(StorageBackend):
+    """Append-only journal plus compacted snapshots in a directory, for one process.
+
+    Each write appends one length-prefixed pickle of its changes to
+    `journal.bin`. Every `compact_every` writes (and on close) the current
+    state is rewritten as `snapshot.bin` (all records as upserts, written to
+    a temporary file and renamed into place) and the journal is truncated.
+    Snapshot records are packed (see _pack_record), so load() may return
+    recipe records whose ingredients are one bytes value.
+    Compaction waits for at least as many journal entries as the snapshot
+    has records, so its cost stays proportional to the writes.
+    Startup reads the snapshot and replays the journal tail; no HTTP
+    re-import is needed.
+
+    Replaying a change is idempotent, so a crash between the snapshot rename
+    and the journal truncation is harmless. A torn last entry (crash during
+    an append) is dropped on load.
+
+    Appends and compactions take a file lock (where fcntl is available), so
+    a seeding script or the dev server's reloader can share the directory,
+    but a process only sees other processes' writes after a restart: serve
+    from one process, and use SQLiteBackend to share data between workers.
+
+    Args:
+        directory: Where the snapshot and journal live (created if missing).
+        compact_every: Journal entries written between compactions.
+        fsync: fsync every append (survives power loss, not just a crash of
+            the process, at the cost of one disk flush per write).
+    """
+
+    persistent = True
+
+    SNAPSHOT = "snapshot.bin"
+    JOURNAL = "journal.bin"
+    _HEADER = struct.Struct("<I")
+
+    def __init__(self, directory: str, compact_every: int = 10000, fsync: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._compact_every = compact_every
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._journal = open(  # pylint: disable=consider-using-with
+            os.path.join(directory, self.JOURNAL), "ab"
+        )
+        self._entries = 0
+        self._snapshot_size = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Serializes journal access between threads and processes."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._journal, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._journal, fcntl.LOCK_UN)
+
+    def write(self, changes: List[Change]) -> None:
+        data = pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._locked():
+            self._journal.write(self._HEADER.pack(len(data)) + data)
+            self._journal.flush()
+            if self._fsync:
+                os.fsync(self._journal.fileno())
+            self._entries += 1
+            if self._entries >= max(self._compact_every, self._snapshot_size):
+                self._compact()
+
+    def load(self) -> Iterator[Change]:
+        with self._locked():
+            return iter(
+                [(kind, key, record) for (kind, key), record in self._replay().items()]
+            )
+
+    def _replay(self) -> Dict[Tuple[str, str], Record]:
+        """Returns the current records, in insertion order, from snapshot + journal."""
+        records: Dict[Tuple[str, str], Record] = {}
+        try:
+            with open(self._path(self.SNAPSHOT), "rb") as f:
+                _apply_changes(records, pickle.load(f))
+        except FileNotFoundError:
+            pass
+        self._snapshot_size = len(records)
+
+        with open(self._path(self.JOURNAL), "rb") as f:
+            data = f.read()
+        offset = entries = 0
+        size = self._HEADER.size
+        while offset + size <= len(data):
+            (length,) = self._HEADER.unpack_from(data, offset)
+            end = offset + size + length
+            if end > len(data):
+                break
+            try:
+                changes = pickle.loads(data[offset + size : end])
+            except Exception:  # pylint: disable=broad-exception-caught
+                break
+            _apply_changes(records, changes)
+            offset, entries = end, entries + 1
+        if offset < len(data):
+            self._journal.truncate(offset)  # Drop a torn last entry
+        self._entries = entries
+        return records
+
+    def compact(self) -> None:
+        """Rewrites the snapshot from the current state and empties the journal."""
+        with self._locked():
+            self._compact()
+
+    def _compact(self) -> None:
+        records = self._replay()
+        tmp_path = self._path(self.SNAPSHOT + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                [
+                    (kind, key, _pack_record(kind, record))
+                    for (kind, key), record in records.items()
+                ],
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(self.SNAPSHOT))
+        self._journal.truncate(0)
+        self._entries = 0
+        self._snapshot_size = len(records)
+
+    def reopen(self) -> None:
+        # A fresh open file description, so flock() excludes the parent too
+        self._lock = threading.Lock()
+        self._journal = open(  # pylint: disable=consider-using-with
+            self._path(self.JOURNAL), "ab"
+        )
+
+    def close(self) -> None:
+        if self._journal.closed:
+            return
+        with self._locked():
+            if self._entries:
+                self._compact()
+        self._journal.close()
+
+
+def _apply_changes(records: Dict[Tuple[str, str], Record], changes: List[Change]):
+    """Applies changes to a {(kind, key): record} map, keeping insertion order."""
+    for kind, key, record in changes:
+        if key is None:
+            for stale in [k for k in records if k[0] == kind]:
+                del records[stale]
+        elif record is None:
+            records.pop((kind, key), None)
+        else:
+            records[(kind, key)] = record
+
+
+def backend_from_env() -> StorageBackend:
+    """Returns a SQLiteBackend if MEAL_PLANNER_DB is set, else a JournalBackend if
+    MEAL_PLANNER_JOURNAL is set, else a MemoryBackend.
+    """
+    path = os.environ.get(DB_PATH_ENV)
+    if path:
+        return SQLiteBackend(path)
+    directory = os.environ.get(JOURNAL_DIR_ENV)
+    if directory:
+        return JournalBackend(directory)
+    return MemoryBackend()
@@ -0,0 +1,353 @@
+"""
+In-memory record store used by crud.py.
+
+Keeps a primary-key hash index over the stored objects so lookups and
+deletes are O(1), while iteration still follows insertion order (the
+order `list_recipes()` and friends have always returned).
+
+Records may carry their own position in that order (`seq_attr`, set from
+new_sequence() when they are created and persisted with them): then every
+process sharing a storage backend orders them, and numbers page cursors,
+the same way, whatever order it learned about them in. Without one, a
+per-store counter numbers records as they are added.
+
+Each store also keeps version counters: `version` moves on every write to the
+collection, and version_of(key) is the collection version at which that
+record last changed. Caches key derived data on these counters. The counters
+are per process; digest(key) and collection_digest() instead hash the
+records' content, so they agree in every process holding the same records
+(the API's ETags are built from them).
+
+Writes must be serialized by the caller (crud's writer lock); reads may run
+concurrently with them. Records are replaced, not mutated, by writers
+(add() with a new object publishes it in one dict assignment), and readers
+never iterate the live dicts.
+"""
+
+import bisect
+import hashlib
+import itertools
+import operator
+import os
+import threading
+import time
+import uuid
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Low bits of a sequence number that identify the process that made it
+_PROCESS_BITS = 10
+_sequence_lock = threading.Lock()
+_last_sequence_time = 0  # pylint: disable=invalid-name
+
+
+def content_digest(record: object) -> int:
+    """Returns a 64-bit digest of a plain record (dicts, lists, strings,
+    numbers and None), the same in every process: repr() of such values does
+    not depend on hash randomization.
+    """
+    encoded = repr(record).encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "big")
+
+
+def new_sequence() -> int:
+    """Returns a creation sequence number for a record.
+
+    Sequence numbers are the creation time in microseconds, shifted left to
+    make room for bits of the process id: they increase within a process and
+    order records by creation time across the processes of one host, with no
+    coordination. They fit in a signed 64-bit integer (an SQLite INTEGER).
+    """
+    global _last_sequence_time  # pylint: disable=global-statement
+    with _sequence_lock:
+        _last_sequence_time = max(time.time_ns() // 1000, _last_sequence_time + 1)
+        return (_last_sequence_time << _PROCESS_BITS) | (
+            os.getpid() & ((1 << _PROCESS_BITS) - 1)
+        )
+
+
+class IndexedStore(Generic[T]):  # pylint: disable=too-many-instance-attributes
+    """An insertion-ordered collection of records keyed by a UUID attribute.
+
+    Args:
+        key_attr: Name of the attribute holding each record's primary key
+            (e.g. "recipe_id" for Recipe, "id" for ShoppingList).
+        seq_attr: Name of the attribute holding each record's sequence number
+            (see new_sequence()), if records carry one. Records where it is
+            None are numbered by the store, ahead of any new_sequence() value.
+        record_of: Converts a record to the plain data content_digest()
+            hashes (e.g. storage.recipe_record); needed by digest() and
+            collection_digest().
+    """
+
+    def __init__(
+        self,
+        key_attr: str,
+        seq_attr: Optional[str] = None,
+        record_of: Optional[Callable[[T], object]] = None,
+    ):
+        self._key_attr = key_attr
+        self._seq_attr = seq_attr
+        self._record_of = record_of
+        self._items: Dict[uuid.UUID, T] = {}
+        # Sequence number per key, used to order subsets of keys
+        self._seq: Dict[uuid.UUID, int] = {}
+        self._counter = itertools.count()
+        # Ordered log for cursor pagination: (sequence numbers, keys) as
+        # parallel lists, seqs increasing. Removed keys stay behind as
+        # tombstones until they outnumber the live records.
+        self._log: Tuple[List[int], List[uuid.UUID]] = ([], [])
+        # Whether _items iterates in sequence order; false after a record
+        # arrived out of order, until reorder()
+        self._in_order = True
+        # Collection version and the version at which each record last changed.
+        # Never reset, so a (key, version) pair is never reused.
+        self.version = 0
+        self._versions: Dict[uuid.UUID, int] = {}
+        # Content digests, computed on demand and tagged with the version they
+        # were computed at: (version_of(key), digest) per key, and
+        # (version, digest) for the whole collection
+        self._digests: Dict[uuid.UUID, Tuple[int, int]] = {}
+        self._collection_digest: Tuple[int, int] = (-1, 0)
+
+    def empty_copy(self) -> "IndexedStore[T]":
+        """Returns a new, empty store configured like this one."""
+        return IndexedStore(self._key_attr, self._seq_attr, self._record_of)
+
+    def key_of(self, item: T) -> uuid.UUID:
+        """Returns the primary key of a record."""
+        return getattr(item, self._key_attr)
+
+    def add(self, item: T) -> T:
+        """Stores a record; a new one takes its place in the sequence order
+        (usually the end), a replaced one keeps its place.
+        """
+        key = self.key_of(item)
+        if key not in self._items:
+            seq = getattr(item, self._seq_attr) if self._seq_attr else None
+            if seq is None:
+                seq = next(self._counter)
+            self._seq[key] = seq
+            seqs, keys = self._log
+            if not seqs or seq > seqs[-1]:
+                keys.append(key)  # Key first: readers bound their scan by len(seqs)
+                seqs.append(seq)
+            else:
+                # Created elsewhere before records already here: publish a new
+                # log with it in place (readers may be scanning the old one)
+                position = bisect.bisect_left(seqs, seq)
+                self._log = (
+                    seqs[:position] + [seq] + seqs[position:],
+                    keys[:position] + [key] + keys[position:],
+                )
+                self._in_order = False
+        self._items[key] = item
+        self.touch(key)
+        return item
+
+    def add_many(self, items: Iterable[T]) -> None:
+        """Stores records whose keys are not in the store yet, like add() for
+        each of them but with one sort and one publish (for loading a store).
+        """
+        key_of = operator.attrgetter(self._key_attr)
+        seq_of = operator.attrgetter(self._seq_attr) if self._seq_attr else None
+        entries = []
+        for item in items:
+            seq = seq_of(item) if seq_of else None
+            if seq is None:
+                seq = next(self._counter)
+            entries.append((seq, key_of(item), item))
+        if not entries:
+            return
+        entries.sort(key=operator.itemgetter(0))
+        seqs, keys = self._log
+        if seqs and seqs[-1] > entries[0][0]:  # Merge into the log (rare)
+            merged = sorted(
+                itertools.chain(zip(seqs, keys), (entry[:2] for entry in entries)),
+                key=operator.itemgetter(0),
+            )
+            self._log = ([entry[0] for entry in merged], [entry[1] for entry in merged])
+            self._in_order = False
+        else:
+            self._log = (
+                seqs + [entry[0] for entry in entries],
+                keys + [entry[1] for entry in entries],
+            )
+        self.version += 1
+        version = self.version
+        for seq, key, item in entries:
+            self._items[key] = item
+            self._seq[key] = seq
+            self._versions[key] = version
+        self.reorder()
+
+    def reorder(self) -> None:
+        """Restores the iteration order of _items after out-of-order adds,
+        so to_list() is a plain copy again. Call after a batch of adds.
+        """
+        if not self._in_order:
+            self._items = {key: self._items[key] for key in self._live_keys()}
+            self._in_order = True
+
+    def _live_keys(self) -> List[uuid.UUID]:
+        """Returns the keys of the stored records, in sequence order."""
+        seqs, keys = self._log
+        live_seqs = self._seq
+        return [key for seq, key in zip(seqs, keys) if live_seqs.get(key) == seq]
+
+    def touch(self, key: uuid.UUID) -> None:
+        """Records that the record under `key` changed (call after mutating it in place)."""
+        self.version += 1
+        self._versions[key] = self.version
+
+    def version_of(self, key: uuid.UUID) -> Optional[int]:
+        """Returns the collection version at which `key` last changed, or None if absent."""
+        return self._versions.get(key)
+
+    def digest(self, key: uuid.UUID) -> Optional[int]:
+        """Returns the content digest of the record under `key`, or None if absent.
+
+        Equal in every process holding the same record. Computed on first use
+        and kept until the record changes.
+        """
+        # The version is read before the record: one computed while a writer
+        # runs is tagged as older than it is, so it is recomputed next time
+        version = self._versions.get(key)
+        item = self._items.get(key)
+        if item is None or version is None:
+            return None
+        cached = self._digests.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = content_digest(self._record_of(item))
+        self._digests[key] = (version, value)
+        return value
+
+    def collection_digest(self) -> int:
+        """Returns a digest of every record in sequence order (see to_list()).
+
+        Equal in every process holding the same records in the same order.
+        Combines the per-record digests, so after a write only the records
+        replaced since are hashed again; cached until the next write.
+        """
+        version = self.version
+        cached = self._collection_digest
+        if cached[0] == version:
+            return cached[1]
+        combined = hashlib.blake2b(digest_size=8)
+        for item in self.to_list():
+            value = self.digest(self.key_of(item))
+            if value is not None:
+                combined.update(value.to_bytes(8, "big"))
+        value = int.from_bytes(combined.digest(), "big")
+        # Tagged with the version read first: one built while a writer runs
+        # is recomputed on the next call rather than served after that write
+        self._collection_digest = (version, value)
+        return value
+
+    def get(self, key: uuid.UUID) -> Optional[T]:
+        """Returns the record stored under `key`, or None."""
+        return self._items.get(key)
+
+    def remove(self, key: uuid.UUID) -> Optional[T]:
+        """Removes and returns the record stored under `key`, or None if absent."""
+        item = self._items.pop(key, None)
+        if item is not None:
+            del self._seq[key]
+            del self._versions[key]
+            self._digests.pop(key, None)
+            self.version += 1
+            if len(self._log[0]) > 2 * len(self._items) + 64:
+                self._compact_log()
+        return item
+
+    def _compact_log(self) -> None:
+        """Drops the tombstones from the ordered log."""
+        keys = self._live_keys()
+        self._log = ([self._seq[key] for key in keys], keys)
+
+    def clear(self) -> None:
+        """Removes every record. Store-assigned numbers restart, so reloading
+        the same records numbers them as before.
+        """
+        self._items.clear()
+        self._seq.clear()
+        self._counter = itertools.count()
+        self._log = ([], [])
+        self._in_order = True
+        self._versions.clear()
+        self._digests.clear()
+        self.version += 1
+
+    def to_list(self) -> List[T]:
+        """Returns the records as a new list, in sequence order."""
+        if self._in_order:
+            return list(self._items.values())
+        items = self._items
+        return [items[key] for key in self._live_keys() if key in items]
+
+    def ordered(self, keys: Iterable[uuid.UUID]) -> List[T]:
+        """Returns the records for `keys` in sequence order, skipping unknown keys.
+
+        Costs O(k log k) in the number of keys rather than a full-store scan.
+        """
+        items, seq = self._items, self._seq
+        found = []
+        for key in keys:
+            item = items.get(key)
+            position = seq.get(key)
+            if item is not None and position is not None:
+                found.append((position, item))
+        found.sort(key=lambda entry: entry[0])
+        return [item for _, item in found]
+
+    def page(self, after: Optional[int], limit: int) -> Tuple[List[T], Optional[int]]:
+        """Returns up to `limit` records following cursor `after`, in sequence order.
+
+        `after` is None for the first page, else the cursor returned with the
+        previous page. Also returns the cursor of the next page, or None when
+        no records follow. A cursor is the sequence number of the last record
+        returned, so it stays valid if that record is deleted, and (with
+        `seq_attr`) in every process sharing the records.
+        Costs O(log n + limit) plus any tombstones skipped.
+        """
+        seqs, keys = self._log
+        end = len(seqs)
+        position = 0 if after is None else bisect.bisect_right(seqs, after, 0, end)
+        items, live_seqs = self._items, self._seq
+        found: List[T] = []
+        cursor = None
+        while position < end:
+            key, seq = keys[position], seqs[position]
+            position += 1
+            item = items.get(key)
+            if item is None or live_seqs.get(key) != seq:
+                continue  # Tombstone
+            if len(found) == limit:
+                return found, cursor
+            found.append(item)
+            cursor = seq
+        return found, None
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.to_list())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self):
+        return f"<IndexedStore(key={self._key_attr}, size={len(self._items)})>"
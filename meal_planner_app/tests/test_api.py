@@ -2,15 +2,17 @@
 Tests for the Flask API endpoints and Jinja2 form routes.
 """
 
+import io
 import unittest
 import json
 import uuid
+from unittest import mock
 from meal_planner_app.main import app
-from meal_planner_app import crud
+from meal_planner_app import crud, main
 from meal_planner_app.models.ingredient import Ingredient
 
 
-class TestApi(unittest.TestCase):
+class TestApi(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """Tests for the main API and form routes."""
 
     def setUp(self):
@@ -36,6 +38,99 @@ class TestApi(unittest.TestCase):
         self.assertEqual(data[0]["name"], "API Test Recipe")
         self.assertIn("ingredients", data[0])  # Check that the full dict is returned
 
+    def test_recipe_responses_keep_their_keys(self):
+        """Test that every recipe response has the same keys, and no internal ones."""
+        keys = {
+            "id",
+            "name",
+            "description",
+            "instructions",
+            "source_url",
+            "ingredients",
+        }
+        created = self.client.post(
+            "/api/recipes", json={"name": "Soup", "instructions": "Boil."}
+        )
+        self.assertEqual(set(created.get_json()), keys)
+        url = f"/api/recipes/{created.get_json()['id']}"
+        responses = [
+            self.client.get(url).get_json(),
+            self.client.put(url, json={"name": "Soup"}).get_json(),
+            self.client.get("/api/recipes").get_json()[0],
+            self.client.get("/api/recipes?limit=1").get_json()[0],
+        ]
+        for data in responses:
+            self.assertEqual(set(data), keys)
+        found = self.client.get("/api/recipes/search?q=soup").get_json()[0]
+        self.assertEqual(set(found), keys | {"score"})
+
+    def test_get_recipes_api_pages_and_fields(self):
+        """Test cursor pagination and ?fields= on GET /api/recipes."""
+        for i in range(5):
+            crud.create_recipe(name=f"Recipe {i}", instructions="...")
+
+        response = self.client.get("/api/recipes?limit=2&fields=id,name")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([r["name"] for r in data], ["Recipe 0", "Recipe 1"])
+        self.assertEqual(set(data[0]), {"id", "name"})
+
+        names = [r["name"] for r in data]
+        link = response.headers["Link"]
+        while link:
+            self.assertTrue(link.endswith('>; rel="next"'))
+            response = self.client.get(link[1 : link.index(">")])
+            names.extend(r["name"] for r in response.get_json())
+            self.assertEqual(set(response.get_json()[0]), {"id", "name"})
+            link = response.headers.get("Link")
+        self.assertEqual(names, [f"Recipe {i}" for i in range(5)])
+
+        # No paging params: every recipe, all fields (no Link header)
+        response = self.client.get("/api/recipes")
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertNotIn("Link", response.headers)
+
+    def test_get_recipes_api_rejects_bad_params(self):
+        """Test 400s for unknown fields, bad limits and bad cursors."""
+        for query in (
+            "fields=id,secret",
+            "fields=",
+            "limit=0",
+            "limit=-5",
+            "limit=abc",
+            "limit=",
+            "limit=1.5",
+            "after=abc",
+            "after=",
+            "after=-1",
+            "after=\u00b2",
+            "limit=2&after=1e3",
+        ):
+            response = self.client.get(f"/api/recipes?{query}")
+            self.assertEqual(response.status_code, 400, query)
+        for url in ("/api/recipes/search?q=soup&", "/api/ingredients/suggest?"):
+            response = self.client.get(f"{url}limit=abc")
+            self.assertEqual(response.status_code, 400, url)
+
+    def test_get_recipes_api_streams_chunks(self):
+        """Test that recipe lists are streamed in bounded chunks that form valid JSON."""
+        for i in range(20):
+            crud.create_recipe(name=f"Recipe {i}", instructions="..." * 10)
+        with mock.patch.object(main, "STREAM_CHUNK_SIZE", 100):
+            for url in (
+                "/api/recipes",
+                "/api/recipes?fields=name",
+                "/api/recipes?limit=5",
+            ):
+                response = self.client.get(url, buffered=False)
+                self.assertTrue(response.is_streamed, url)
+                chunks = list(response.response)
+                self.assertGreater(len(chunks), 1, url)
+                data = json.loads(b"".join(chunks))
+                self.assertEqual(data[0]["name"], "Recipe 0", url)
+                response.close()
+        self.assertEqual(len(self.client.get("/api/recipes").get_json()), 20)
+
     def test_create_recipe_api(self):
         """Test the POST /api/recipes endpoint."""
         recipe_data = {
@@ -74,6 +169,135 @@ class TestApi(unittest.TestCase):
         self.assertEqual(len(get_data), 1)
         self.assertEqual(get_data[0]["name"], "API Recipe")
 
+    def test_create_recipe_api_rejects_bad_types(self):
+        """Test that POST /api/recipes answers 400 to values of the wrong type."""
+        salt = {"name": "Salt", "quantity": 1, "unit": "g"}
+        for bad in (
+            {"name": 123},
+            {"instructions": ["a"]},
+            {"description": 7},
+            {"source_url": {}},
+            {"ingredients": [dict(salt, name=5)]},
+            {"ingredients": [dict(salt, unit=None)]},
+            {"ingredients": [dict(salt, quantity=[1, 2])]},
+            {"ingredients": [dict(salt, location_id={"id": 1})]},
+            {"ingredients": "Salt"},
+        ):
+            data = dict({"name": "Soup", "instructions": "...", "ingredients": [salt]})
+            data.update(bad)
+            response = self.client.post("/api/recipes", json=data)
+            self.assertEqual(response.status_code, 400, bad)
+        self.assertEqual(crud.list_recipes(), [])
+        self.assertEqual(crud.list_unique_ingredient_names(), [])
+
+    def test_bulk_create_recipes_api(self):
+        """Test POST /api/recipes/bulk with a JSON array, across several batches."""
+        recipes = [
+            {
+                "name": f"Recipe {i}",
+                "instructions": "...",
+                "ingredients": [{"name": "Salt", "quantity": "1", "unit": "g"}],
+            }
+            for i in range(5)
+        ]
+        recipes.insert(2, {"name": "No instructions"})
+        with mock.patch.object(main, "BULK_BATCH_SIZE", 2):
+            response = self.client.post("/api/recipes/bulk", json=recipes)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data["created"], data["failed"]), (5, 1))
+        self.assertIn("error", data["results"][2])
+        stored = [r.name for r in crud.list_recipes()]
+        self.assertEqual(stored, [f"Recipe {i}" for i in range(5)])
+        self.assertEqual(
+            [r["id"] for r in data["results"] if "id" in r],
+            [str(r.recipe_id) for r in crud.list_recipes()],
+        )
+        self.assertEqual(len(crud.search_recipes("", filter_ingredient="salt")), 5)
+
+    def test_bulk_create_recipes_rejects_bad_types(self):
+        """Test that mistyped items are per-item errors next to created ones."""
+        response = self.client.post(
+            "/api/recipes/bulk",
+            json=[
+                {"name": "good", "instructions": "x"},
+                {"name": 5, "instructions": "x"},
+                {"name": "Tea", "instructions": "x", "source_url": 1},
+                {
+                    "name": "Soup",
+                    "instructions": "x",
+                    "ingredients": [{"name": "Salt", "quantity": 1, "unit": 2}],
+                },
+            ],
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data["created"], data["failed"]), (1, 3))
+        self.assertEqual(
+            [sorted(result) for result in data["results"]],
+            [["id"], ["error"], ["error"], ["error"]],
+        )
+        self.assertEqual([r.name for r in crud.list_recipes()], ["good"])
+        self.assertEqual(crud.list_unique_ingredient_names(), [])
+
+    def test_bulk_create_recipes_ndjson(self):
+        """Test NDJSON bodies, with per-line errors and a 400 for a non-array body."""
+        lines = [
+            json.dumps({"name": "Soup", "instructions": "Boil."}),
+            "",
+            "{not json",
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"name": "Tea", "instructions": "Steep.", "ingredients": [{}]}),
+            json.dumps({"name": "Toast", "instructions": "Toast it."}),
+        ]
+        response = self.client.post(
+            "/api/recipes/bulk",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        data = response.get_json()
+        self.assertEqual((data["created"], data["failed"]), (2, 3))
+        self.assertEqual(
+            [sorted(result) for result in data["results"]],
+            [["id"], ["error"], ["error"], ["error"], ["id"]],
+        )
+        self.assertEqual([r.name for r in crud.list_recipes()], ["Soup", "Toast"])
+
+        response = self.client.post("/api/recipes/bulk", json={"name": "Soup"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_recipes_from_raw_input(self):
+        """Test NDJSON read from a bare wsgi.input (as gunicorn passes it)."""
+
+        class RawInput:  # pylint: disable=too-few-public-methods
+            """A wsgi.input offering nothing but read()."""
+
+            def __init__(self, data):
+                self._data = io.BytesIO(data)
+
+            def read(self, size=-1):
+                """Reads up to `size` bytes."""
+                return self._data.read(size)
+
+        body = "".join(
+            json.dumps({"name": f"Recipe {i}", "instructions": "..."}) + "\n"
+            for i in range(300)
+        ).encode()
+        with mock.patch.object(main, "STREAM_CHUNK_SIZE", 1000):
+            response = self.client.post(
+                "/api/recipes/bulk",
+                content_type="application/x-ndjson",
+                environ_overrides={
+                    "wsgi.input": RawInput(body),
+                    "wsgi.input_terminated": True,
+                    "CONTENT_LENGTH": str(len(body)),
+                },
+            )
+        self.assertEqual(response.get_json()["created"], 300)
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], [f"Recipe {i}" for i in range(300)]
+        )
+
     def test_create_recipe_via_form(self):
         """Test creating a recipe via the Jinja2 form POST."""
         response = self.client.post(
@@ -202,6 +426,79 @@ class TestApi(unittest.TestCase):
         self.assertEqual(len(data["ingredients"]), 2)
         self.assertEqual(data["ingredients"][0]["name"], "Sugar")
 
+    def test_recipe_json_cache_follows_writes(self):
+        """Test that cached recipe bodies are reused, and replaced after writes."""
+        recipe = crud.create_recipe(name="Soup", instructions="Boil.")
+        url = f"/api/recipes/{recipe.recipe_id}"
+        first = self.client.get(url)
+        self.assertEqual(first.get_json(), json.loads(self.client.get(url).data))
+        self.assertEqual(len(crud.recipe_json_cache), 1)
+        self.assertEqual(self.client.get("/api/recipes").get_json(), [first.get_json()])
+
+        self.client.put(url, json={"name": "Broth"})
+        self.assertEqual(self.client.get(url).get_json()["name"], "Broth")
+        self.assertEqual(
+            [r["name"] for r in self.client.get("/api/recipes").get_json()], ["Broth"]
+        )
+
+        self.client.delete(url)
+        self.assertEqual(len(crud.recipe_json_cache), 0)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get("/api/recipes").get_json(), [])
+
+    def test_conditional_get_recipes(self):
+        """Test ETags and 304s on the recipe endpoints, and that writes change them."""
+        recipe = crud.create_recipe(name="Soup", instructions="Boil.")
+        for url in ("/api/recipes", f"/api/recipes/{recipe.recipe_id}"):
+            first = self.client.get(url)
+            etag = first.headers["ETag"]
+            self.assertFalse(etag.startswith("W/"))
+            cached = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(cached.status_code, 304, url)
+            self.assertEqual(cached.data, b"")
+            self.assertEqual(cached.headers["ETag"], etag)
+
+            crud.update_recipe(recipe.recipe_id, name=f"Soup {url}")
+            changed = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(changed.status_code, 200, url)
+            self.assertNotEqual(changed.headers["ETag"], etag)
+
+        # Unaffected collections keep their tags
+        etag = self.client.get("/api/ingredients").headers["ETag"]
+        crud.update_recipe(recipe.recipe_id, name="Stew")
+        self.assertEqual(
+            self.client.get(
+                "/api/ingredients", headers={"If-None-Match": etag}
+            ).status_code,
+            304,
+        )
+        missing = self.client.get(f"/api/recipes/{uuid.uuid4()}")
+        self.assertEqual(missing.status_code, 404)
+        self.assertNotIn("ETag", missing.headers)
+
+    def test_conditional_get_recipes_page(self):
+        """Test that a page's ETag covers the page only, without hashing the catalog."""
+        recipes = [
+            crud.create_recipe(name=f"Recipe {i}", instructions="...") for i in range(4)
+        ]
+        url = "/api/recipes?limit=2&fields=id,name"
+        with mock.patch.object(
+            crud.recipes_db, "collection_digest", side_effect=AssertionError
+        ):
+            etag = self.client.get(url).headers["ETag"]
+            self.assertNotEqual(
+                self.client.get("/api/recipes?limit=2").headers["ETag"], etag
+            )
+
+            crud.update_recipe(recipes[3].recipe_id, name="Off the page")
+            cached = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(cached.status_code, 304)
+
+            crud.update_recipe(recipes[1].recipe_id, name="On the page")
+            changed = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(changed.status_code, 200)
+            self.assertEqual(changed.get_json()[1]["name"], "On the page")
+
     def test_get_recipe_by_id_not_found(self):
         """Test GET /api/recipes/<id> with non-existent recipe."""
         non_existent_id = uuid.uuid4()
@@ -241,6 +538,15 @@ class TestApi(unittest.TestCase):
         self.assertEqual(updated_recipe.name, "Updated Recipe")
         self.assertEqual(len(updated_recipe.ingredients), 2)
 
+    def test_update_recipe_api_rejects_bad_types(self):
+        """Test that PUT /api/recipes/<id> answers 400 and keeps the recipe."""
+        recipe = crud.create_recipe(name="Soup", instructions="...")
+        for bad in ({"name": 1}, {"ingredients": [{"name": "Salt"}]}):
+            response = self.client.put(f"/api/recipes/{recipe.recipe_id}", json=bad)
+            self.assertEqual(response.status_code, 400, bad)
+        self.assertIs(crud.get_recipe(recipe.recipe_id), recipe)
+        self.assertEqual(crud.search_recipes("soup"), [recipe])
+
     def test_update_recipe_not_found(self):
         """Test PUT /api/recipes/<id> with non-existent recipe."""
         non_existent_id = uuid.uuid4()
@@ -260,6 +566,58 @@ class TestApi(unittest.TestCase):
         self.assertIsNone(crud.get_recipe(recipe_id))
         self.assertEqual(len(crud.list_recipes()), 0)
 
+    def test_ranked_search_api(self):
+        """Test GET /api/recipes/search ranks matches and honours limit."""
+        crud.create_recipe(
+            name="Chicken Curry",
+            instructions="Fry onions, add chicken and curry paste.",
+            ingredients_data=[{"name": "Chicken", "quantity": 500, "unit": "g"}],
+        )
+        crud.create_recipe(
+            name="Vegetable Soup",
+            instructions="Optionally add leftover chicken stock.",
+        )
+        crud.create_recipe(name="Pancakes", instructions="Mix and fry.")
+
+        response = self.client.get("/api/recipes/search?q=chicken")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([r["name"] for r in data], ["Chicken Curry", "Vegetable Soup"])
+        self.assertGreater(data[0]["score"], data[1]["score"])
+        self.assertIn("ingredients", data[0])
+
+        response = self.client.get("/api/recipes/search?q=chicken&limit=1")
+        self.assertEqual(len(json.loads(response.data)), 1)
+
+        self.assertEqual(self.client.get("/api/recipes/search").status_code, 400)
+        response = self.client.get("/api/recipes/search?q=chicken&limit=0")
+        self.assertEqual(response.status_code, 400)
+
+    def test_suggest_ingredients_api(self):
+        """Test GET /api/ingredients/suggest follows recipe writes."""
+        recipe = crud.create_recipe(
+            name="Soup",
+            instructions="Boil.",
+            ingredients_data=[
+                {"name": "Carrot", "quantity": 1, "unit": "pc"},
+                {"name": "Cauliflower", "quantity": 1, "unit": "pc"},
+                {"name": "Onion", "quantity": 1, "unit": "pc"},
+            ],
+        )
+        response = self.client.get("/api/ingredients/suggest?prefix=ca")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), ["Carrot", "Cauliflower"])
+
+        response = self.client.get("/api/ingredients/suggest?prefix=c&limit=1")
+        self.assertEqual(json.loads(response.data), ["Carrot"])
+
+        crud.update_recipe(
+            recipe.recipe_id,
+            ingredients_data=[{"name": "Onion", "quantity": 2, "unit": "pc"}],
+        )
+        response = self.client.get("/api/ingredients/suggest?prefix=ca")
+        self.assertEqual(json.loads(response.data), [])
+
     def test_delete_recipe_not_found(self):
         """Test DELETE /api/recipes/<id> with non-existent recipe."""
         non_existent_id = uuid.uuid4()
@@ -312,6 +670,17 @@ class TestMealPlanApi(unittest.TestCase):
         self.assertEqual(mp.name, "New API Plan")
         self.assertEqual(mp.description, "A plan for the new API.")
 
+    def test_meal_plan_api_rejects_non_string_names(self):
+        """Test that meal plan names and descriptions must be strings."""
+        response = self.client.post("/api/meal-plans", json={"name": ["Week"]})
+        self.assertEqual(response.status_code, 400)
+        meal_plan = crud.create_meal_plan("Week")
+        response = self.client.put(
+            f"/api/meal-plans/{meal_plan.meal_plan_id}", json={"description": 1}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(crud.list_meal_plans(), [meal_plan])
+
     def test_get_meal_plan_by_id_api(self):
         """Test GET /api/meal-plans/<id>."""
         mp = crud.create_meal_plan(
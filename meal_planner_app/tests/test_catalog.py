@@ -0,0 +1,65 @@
+"""
+Tests for the Product/Unit/Location catalogs referenced by Ingredient.
+"""
+
+import unittest
+
+from meal_planner_app.models.catalog import CatalogTable, Unit, products
+from meal_planner_app.models.ingredient import Ingredient
+
+
+class TestCatalogTable(unittest.TestCase):
+    """Tests for name interning."""
+
+    def test_intern_returns_shared_entries(self):
+        """Test that equal names map to one entry with a stable id."""
+        table = CatalogTable(Unit)
+        grams = table.intern("g")
+        self.assertIs(table.intern("g"), grams)
+        self.assertIs(table.get(grams.id), grams)
+        self.assertEqual(table.intern("").id, 0)
+        self.assertIsNone(table.find("kg"))
+        self.assertIsNone(table.get(99))
+        self.assertEqual(len(table), 2)
+
+
+class TestIngredientCatalogReferences(unittest.TestCase):
+    """Tests that Ingredient keeps its string API on top of catalog entries."""
+
+    def test_ingredients_share_entries(self):
+        """Test that equal names resolve to the same Product/Unit/Location."""
+        first = Ingredient("Mąka pszenna", "500", "g", "3", "Pieczywo")
+        second = Ingredient("".join(["Mąka ", "pszenna"]), "1", "g", "3", "Pieczywo")
+        self.assertIs(first.product, second.product)
+        self.assertIs(first.unit_entry, second.unit_entry)
+        self.assertIs(first.location_entry, second.location_entry)
+        self.assertIs(products.find("Mąka pszenna"), first.product)
+        self.assertEqual(first.group_key, second.group_key)
+
+    def test_attributes_round_trip(self):
+        """Test reads and assignments of name, unit and location."""
+        ingredient = Ingredient("Sól", "1", "szczypta")
+        self.assertEqual(
+            (ingredient.name, ingredient.unit, ingredient.location),
+            ("Sól", "szczypta", None),
+        )
+        self.assertIsNone(ingredient.location_id)
+        ingredient.name = "Pieprz"
+        ingredient.location = "Przyprawy"
+        self.assertEqual(ingredient.name, "Pieprz")
+        self.assertEqual(ingredient.location, "Przyprawy")
+
+    def test_missing_and_blank_location_group_together(self):
+        """Test that None and "" locations share a shopping list group."""
+        blank = Ingredient("Sól", "1", "g", location="")
+        missing = Ingredient("Sól", "2", "g")
+        self.assertEqual(blank.location, "")
+        self.assertIsNone(missing.location)
+        self.assertEqual(blank.group_key, missing.group_key)
+        self.assertNotEqual(
+            blank.group_key, Ingredient("Sól", "1", "g", location="Przyprawy").group_key
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 Tests for the CRUD operations in crud.py.
 """
 
+import sys
+import threading
 import unittest
 import uuid
 
@@ -50,6 +52,53 @@ class TestRecipeCRUD(unittest.TestCase):
         self.assertEqual(recipe.ingredients[1].name, "Sugar")
         self.assertEqual(recipe.ingredients[1].quantity, "0.25")
 
+    def test_create_recipes_in_bulk(self):
+        """Test creating a batch of recipes: stored in order, indexed and searchable."""
+        existing = crud.create_recipe(name="Toast", instructions="Toast it.")
+        recipes = crud.create_recipes(
+            [
+                {
+                    "name": "Pancakes",
+                    "instructions": "Mix and fry.",
+                    "ingredients_data": [
+                        {"name": "Flour", "quantity": "200", "unit": "g"},
+                        {
+                            "name": "Milk",
+                            "quantity": "1",
+                            "unit": "l",
+                            "location": "Dairy",
+                        },
+                    ],
+                },
+                {"name": "Tea", "instructions": "Steep.", "description": "Hot"},
+            ]
+        )
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], ["Toast", "Pancakes", "Tea"]
+        )
+        self.assertEqual(recipes[1].description, "Hot")
+        self.assertEqual(crud.search_recipes("pan"), [recipes[0]])
+        self.assertEqual(
+            crud.search_recipes("", filter_ingredient="milk"), [recipes[0]]
+        )
+        self.assertEqual(crud.list_unique_ingredient_names(), ["Flour", "Milk"])
+        self.assertEqual(crud.list_unique_locations(), ["Dairy"])
+        self.assertEqual(crud.rank_recipes("tea")[0][0], recipes[1])
+        self.assertIs(crud.get_recipe(existing.recipe_id), existing)
+        self.assertEqual(crud.create_recipes([]), [])
+
+    def test_create_recipes_is_all_or_nothing(self):
+        """Test that one rejected item leaves the whole batch uncreated."""
+        with self.assertRaises(ValueError):
+            crud.create_recipes(
+                [
+                    {"name": "good", "instructions": "x"},
+                    {"name": 5, "instructions": "x"},
+                ]
+            )
+        self.assertEqual(crud.list_recipes(), [])
+        self.assertEqual(crud.rank_recipes("good"), [])
+
     def test_update_recipe(self):
         """Test updating various fields of a recipe."""
         recipe = crud.create_recipe(name="Old Soup", instructions="Old instructions.")
@@ -106,6 +155,24 @@ class TestRecipeCRUD(unittest.TestCase):
         self.assertTrue(any(r.name == "Pasta" for r in recipes))
         self.assertTrue(any(r.name == "Salad" for r in recipes))
 
+    def test_invalid_recipe_data_is_rejected(self):
+        """Test that values of the wrong type raise ValueError and store nothing."""
+        with self.assertRaises(ValueError):
+            crud.create_recipe(name="Soup", instructions=["a"])
+        with self.assertRaises(ValueError):
+            crud.create_recipe(
+                name="Soup",
+                instructions="...",
+                ingredients_data=[{"name": 5, "quantity": 1, "unit": "g"}],
+            )
+        self.assertEqual(crud.list_recipes(), [])
+        self.assertEqual(crud.rank_recipes("soup"), [])
+
+        recipe = crud.create_recipe(name="Soup", instructions="...")
+        with self.assertRaises(ValueError):
+            crud.update_recipe(recipe.recipe_id, description=7)
+        self.assertIs(crud.get_recipe(recipe.recipe_id), recipe)
+
     def test_get_nonexistent_recipe(self):
         """Test that get_recipe returns None for an invalid ID."""
         non_existent_id = uuid.uuid4()
@@ -204,7 +271,7 @@ class TestMealPlanCRUD(unittest.TestCase):
         """Test removing recipes from a meal plan."""
         mp = crud.create_meal_plan(name="Plan With Recipes")
         crud.add_recipe_to_meal_plan(mp.meal_plan_id, self.recipe1.recipe_id)
-        crud.add_recipe_to_meal_plan(mp.meal_plan_id, self.recipe2.recipe_id)
+        mp = crud.add_recipe_to_meal_plan(mp.meal_plan_id, self.recipe2.recipe_id)
         self.assertEqual(len(mp.recipe_ids), 2)
 
         # Remove existing recipe
@@ -270,8 +337,66 @@ class TestMealPlanCRUD(unittest.TestCase):
         # Update non-existent
         self.assertIsNone(crud.update_meal_plan(uuid.uuid4(), name="Doesn't Matter"))
 
+    def test_list_meal_plans_for_recipe(self):
+        """Test the reverse index follows every meal plan write."""
+        mp1 = crud.create_meal_plan(name="MP1", recipe_ids=[self.recipe1.recipe_id])
+        mp2 = crud.create_meal_plan(name="MP2")
+        crud.add_recipe_to_meal_plan(mp2.meal_plan_id, self.recipe1.recipe_id)
+        self.assertEqual(
+            crud.list_meal_plans_for_recipe(self.recipe1.recipe_id),
+            [mp1, crud.get_meal_plan(mp2.meal_plan_id)],
+        )
+
+        crud.remove_recipe_from_meal_plan(mp1.meal_plan_id, self.recipe1.recipe_id)
+        mp2 = crud.update_meal_plan(
+            mp2.meal_plan_id, recipe_ids=[self.recipe2.recipe_id]
+        )
+        self.assertEqual(crud.list_meal_plans_for_recipe(self.recipe1.recipe_id), [])
+        self.assertEqual(crud.list_meal_plans_for_recipe(self.recipe2.recipe_id), [mp2])
+
+        crud.delete_meal_plan(mp2.meal_plan_id)
+        self.assertEqual(crud.list_meal_plans_for_recipe(self.recipe2.recipe_id), [])
+
+    def test_writers_publish_copies(self):
+        """Test that updates replace published plans and lists instead of
+        changing objects a reader may hold."""
+        mp = crud.create_meal_plan(name="Week", recipe_ids=[self.recipe1.recipe_id])
+        renamed = crud.update_meal_plan(
+            mp.meal_plan_id, name="Month", recipe_ids=[self.recipe2.recipe_id]
+        )
+        self.assertIs(crud.get_meal_plan(mp.meal_plan_id), renamed)
+        self.assertEqual((mp.name, mp.recipe_ids), ("Week", [self.recipe1.recipe_id]))
+
+        shopping_list = crud.create_shopping_list(mp.meal_plan_id)
+        items = shopping_list.items
+        updated = crud.update_shopping_list(shopping_list.id, name="Shop", items=[])
+        self.assertIs(crud.get_shopping_list(shopping_list.id), updated)
+        self.assertEqual((updated.name, updated.items), ("Shop", []))
+        self.assertIs(shopping_list.items, items)
+        self.assertNotEqual(shopping_list.name, "Shop")
+
+    def test_delete_recipe_removes_it_from_meal_plans(self):
+        """Test that deleting a recipe leaves no dangling ids in meal plans."""
+        mp1 = crud.create_meal_plan(
+            name="MP1", recipe_ids=[self.recipe1.recipe_id, self.recipe2.recipe_id]
+        )
+        mp2 = crud.create_meal_plan(name="MP2", recipe_ids=[self.recipe2.recipe_id])
+        untouched = crud.create_meal_plan(
+            name="MP3", recipe_ids=[self.recipe1.recipe_id]
+        )
 
-class TestRecipeSearch(unittest.TestCase):
+        self.assertTrue(crud.delete_recipe(self.recipe2.recipe_id))
+        self.assertEqual(
+            crud.get_meal_plan(mp1.meal_plan_id).recipe_ids, [self.recipe1.recipe_id]
+        )
+        self.assertEqual(crud.get_meal_plan(mp2.meal_plan_id).recipe_ids, [])
+        self.assertIs(crud.get_meal_plan(untouched.meal_plan_id), untouched)
+        # Published plans are replaced, never changed
+        self.assertEqual(mp2.recipe_ids, [self.recipe2.recipe_id])
+        self.assertEqual(crud.list_meal_plans_for_recipe(self.recipe2.recipe_id), [])
+
+
+class TestRecipeSearch(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """Tests for the recipe search functionality."""
 
     def setUp(self):
@@ -478,3 +603,128 @@ class TestRecipeSearch(unittest.TestCase):
         self.assertEqual(len(results), 0)  # Based on current logic in search_recipes
         results_space = crud.search_recipes(query="  ", filter_ingredient="  ")
         self.assertEqual(len(results_space), 0)
+
+    def test_search_results_follow_catalog_order(self):
+        """Test that search results are returned in recipe creation order."""
+        results = crud.search_recipes("a")
+        self.assertEqual(
+            [r.recipe_id for r in results],
+            [r.recipe_id for r in crud.list_recipes() if r in results],
+        )
+        self.assertEqual(results[0].recipe_id, self.recipe1.recipe_id)
+
+    def test_ingredient_index_follows_update_and_delete(self):
+        """Test that ingredient matches track update_recipe and delete_recipe."""
+        crud.update_recipe(
+            self.recipe3.recipe_id,
+            ingredients_data=[{"name": "Cucumber", "quantity": 1, "unit": "pc"}],
+        )
+        results = crud.search_recipes(query="", filter_ingredient="milk")
+        self.assertEqual([r.recipe_id for r in results], [self.recipe1.recipe_id])
+        results = crud.search_recipes("cucumber")
+        self.assertEqual([r.recipe_id for r in results], [self.recipe3.recipe_id])
+
+        crud.delete_recipe(self.recipe1.recipe_id)
+        self.assertEqual(crud.search_recipes(query="", filter_ingredient="milk"), [])
+
+    def test_search_is_accent_insensitive(self):
+        """Test that queries match regardless of Polish diacritics, both ways."""
+        garlic = crud.create_recipe(
+            name="Zupa czosnkowa",
+            description="Rozgrzewająca zupa.",
+            ingredients_data=[{"name": "Ząbek czosnku", "quantity": 3, "unit": "szt"}],
+            instructions="Gotować.",
+        )
+        for query in ("zabek", "ZĄBEK", "rozgrzewajaca"):
+            results = crud.search_recipes(query)
+            self.assertEqual([r.recipe_id for r in results], [garlic.recipe_id], query)
+
+        results = crud.search_recipes(query="", filter_ingredient="zabek czosnku")
+        self.assertEqual([r.recipe_id for r in results], [garlic.recipe_id])
+
+        ranked = crud.rank_recipes("czosnku zabek")
+        self.assertEqual(ranked[0][0].recipe_id, garlic.recipe_id)
+
+
+class TestConcurrentAccess(unittest.TestCase):
+    """Tests that lock-free readers can run alongside a writer thread."""
+
+    def setUp(self):
+        crud.reset_recipes_db()
+        crud.reset_meal_plans_db()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+
+    def tearDown(self):
+        sys.setswitchinterval(self._switch_interval)
+        crud.reset_recipes_db()
+        crud.reset_meal_plans_db()
+
+    @staticmethod
+    def _ingredients(version):
+        return [
+            {
+                "name": f"Produkt {version % 7}-{i}",
+                "quantity": str(version),
+                "unit": "g",
+            }
+            for i in range(5)
+        ]
+
+    def test_readers_see_consistent_records_during_writes(self):
+        """Test that searches and shopping lists never fail or see torn recipes."""
+        recipes = [
+            crud.create_recipe(
+                name="Zupa 0", instructions="...", ingredients_data=self._ingredients(0)
+            )
+            for _ in range(30)
+        ]
+        plan = crud.create_meal_plan("Week", recipe_ids=[r.recipe_id for r in recipes])
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            try:
+                for version in range(1, 300):
+                    recipe = recipes[version % len(recipes)]
+                    crud.update_recipe(
+                        recipe.recipe_id,
+                        name=f"Zupa {version}",
+                        ingredients_data=self._ingredients(version),
+                    )
+                    crud.remove_recipe_from_meal_plan(
+                        plan.meal_plan_id, recipe.recipe_id
+                    )
+                    crud.add_recipe_to_meal_plan(plan.meal_plan_id, recipe.recipe_id)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+            finally:
+                done.set()
+
+        def reader():
+            try:
+                while not done.is_set():
+                    for recipe in crud.search_recipes("zupa", "produkt"):
+                        version = recipe.name.split()[1]
+                        self.assertTrue(
+                            all(i.quantity == version for i in recipe.ingredients)
+                        )
+                    crud.rank_recipes("zupa produkt")
+                    crud.generate_shopping_list(plan.meal_plan_id)
+                    crud.list_meal_plans_for_recipe(recipes[0].recipe_id)
+                    crud.suggest_ingredient_names("prod")
+                    crud.list_unique_ingredient_names()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            len(crud.get_meal_plan(plan.meal_plan_id).recipe_ids), len(recipes)
+        )
@@ -0,0 +1,185 @@
+"""
+Tests for the concurrent bulk import client.
+"""
+
+import http.client
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from werkzeug.serving import make_server
+
+from meal_planner_app import crud, migrate_legacy
+from meal_planner_app.import_client import (
+    AdaptiveLimit,
+    ConnectionPool,
+    import_recipes,
+)
+from meal_planner_app.main import app
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every request with a small body on a kept-alive connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Sends the request path back; closes the connection after /close."""
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = self.path.endswith("/close")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Reads the body, then drops the connection without answering."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.posts += 1
+        self.close_connection = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for connection reuse."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.server.posts = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.pool = ConnectionPool(f"http://127.0.0.1:{self.server.server_port}/api/")
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def test_connections_are_kept_alive(self):
+        """Test that sequential requests share one connection."""
+        for i in range(5):
+            self.assertEqual(
+                self.pool.request("GET", f"/{i}"), (200, f"/api/{i}".encode())
+            )
+        self.assertEqual(self.pool.opened, 1)
+
+    def test_closed_idle_connections_are_not_reused(self):
+        """Test that a connection the server closed while idle is replaced."""
+        self.pool.request("GET", "/close")  # Kept idle, then closed by the server
+        time.sleep(0.1)
+        self.assertEqual(self.pool.request("GET", "/2"), (200, b"/api/2"))
+        self.assertEqual(self.pool.opened, 2)
+
+    def test_sent_requests_are_not_retried(self):
+        """Test that a POST the server received is not sent again on failure."""
+        self.pool.request("GET", "/1")  # Leaves a connection to reuse
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.pool.request("POST", "/bulk", b"[]")
+        self.assertEqual(self.server.posts, 1)
+
+
+class TestAdaptiveLimit(unittest.TestCase):
+    """Tests for the AIMD concurrency limit."""
+
+    def _complete(self, limit, latency):
+        limit.acquire()
+        limit.release(latency)
+
+    def test_grows_while_fast_and_halves_when_slow(self):
+        """Test additive increase up to the maximum, and halving on slow batches."""
+        limit = AdaptiveLimit(maximum=4)
+        for _ in range(50):
+            self._complete(limit, 0.1)
+        self.assertEqual(limit.limit, 4.0)
+
+        # Requests sent before a decrease only halve the limit once
+        for _ in range(4):
+            limit.acquire()
+        for _ in range(4):
+            limit.release(0.5)
+        self.assertEqual(limit.limit, 2.0)
+
+        self._complete(limit, 0.1)  # The probe delay after the first decrease
+        self.assertEqual(limit.limit, 2.0)
+        self._complete(limit, None)
+        self.assertEqual(limit.limit, 1.0)
+        self._complete(limit, None)  # Nothing below one
+        self.assertEqual(limit.limit, 1.0)
+
+    def test_probe_delay_doubles(self):
+        """Test that a server slowed down by concurrency is probed less and less."""
+        limit = AdaptiveLimit(maximum=4)
+        self._complete(limit, 0.1)
+        fast_batches = []
+        for _ in range(4):
+            fast = 0
+            while limit.limit < 2:
+                self._complete(limit, 0.1)
+                fast += 1
+            fast_batches.append(fast)
+            self._complete(limit, 0.5)  # Two in flight is slow
+            self.assertEqual(limit.limit, 1.0)
+        self.assertEqual(fast_batches, [0, 2, 3, 5])
+
+
+class TestImportRecipes(unittest.TestCase):
+    """Tests importing recipes into a live server."""
+
+    def setUp(self):
+        crud.reset_recipes_db()
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        crud.reset_recipes_db()
+
+    def test_imports_every_recipe(self):
+        """Test that every valid recipe of a generator arrives, in batches."""
+        recipes = (
+            {
+                "name": f"Recipe {i}",
+                "instructions": "..." if i != 7 else "",
+                "ingredients": [{"name": "Salt", "quantity": "1", "unit": "g"}],
+            }
+            for i in range(120)
+        )
+        result = import_recipes(
+            recipes, self.base_url, batch_size=10, max_concurrency=3
+        )
+        self.assertEqual((result.created, result.failed), (119, 1))
+        self.assertEqual(
+            sorted(r.name for r in crud.list_recipes()),
+            sorted(f"Recipe {i}" for i in range(120) if i != 7),
+        )
+
+    def test_existing_recipes_are_checked_cheaply(self):
+        """Test that the seed check fetches a single recipe id, not the catalog."""
+        with mock.patch.object(migrate_legacy, "API_BASE_URL", self.base_url):
+            self.assertEqual(migrate_legacy.get_recipes(), [])
+            recipe = crud.create_recipe(name="Soup", instructions="...")
+            crud.create_recipe(name="Stew", instructions="...")
+            self.assertEqual(
+                migrate_legacy.get_recipes(), [{"id": str(recipe.recipe_id)}]
+            )
+
+    def test_failed_batches_are_counted(self):
+        """Test that batches the server rejects are counted instead of raising."""
+        url = self.base_url.replace("/api", "/missing")
+        recipes = [{"name": "Soup", "instructions": "..."}] * 3
+        result = import_recipes(recipes, url, batch_size=2)
+        self.assertEqual((result.created, result.failed), (0, 3))
+        self.assertEqual(crud.list_recipes(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
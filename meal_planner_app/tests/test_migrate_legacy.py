@@ -0,0 +1,212 @@
+"""
+Tests for the legacy migration: the relational CSV join and direct ingestion.
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from meal_planner_app import crud, storage
+from meal_planner_app.migrate_legacy import (
+    LEGACY_RECIPES,
+    extract_from_csvs,
+    ingest_directly,
+    seed_from_legacy,
+)
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+class TestExtractFromCsvs(unittest.TestCase):
+    """Tests for joining przepisy.csv with skladniki.csv and produkty.csv."""
+
+    PRZEPISY = [
+        ["2", "Zupa", "https://example.com/zupa", "4"],
+        ["9", "Sałatka", "Pokroić.", ""],
+        ["10", "", "No name", ""],
+        ["11", "Chleb", "Upiec.", "1"],
+    ]
+    SKLADNIKI = [
+        ["1", "1", "5"],  # Recipe missing from przepisy.csv
+        ["2", "1", "200"],
+        ["2", "2", "1"],
+        ["10", "1", "3"],
+        ["11", "2", "2"],
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        _write_csv(
+            os.path.join(self.tmpdir, "jednostki.csv"),
+            ["idJednostki", "nazwa"],
+            [["1", "g"], ["2", "szt"]],
+        )
+        _write_csv(
+            os.path.join(self.tmpdir, "produkty.csv"),
+            ["id", "nazwa", "idJednostki", "idLokalizacji"],
+            [["1", "Mąka", "1", ""], ["2", "Jajko", "2", "3"]],
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _extract(self, przepisy, skladniki):
+        _write_csv(
+            os.path.join(self.tmpdir, "przepisy.csv"),
+            ["id", "nazwa", "przepis", "liczbaPorcji"],
+            przepisy,
+        )
+        _write_csv(
+            os.path.join(self.tmpdir, "skladniki.csv"),
+            ["idPrzepisu", "idProduktu", "liczba"],
+            skladniki,
+        )
+        return {
+            r["name"]: [(i["name"], i["quantity"], i["unit"]) for i in r["ingredients"]]
+            for r in extract_from_csvs(self.tmpdir)
+        }
+
+    def test_sorted_exports_are_merge_joined(self):
+        """Test the join of exports sorted by (numeric) recipe id."""
+        self.assertEqual(
+            self._extract(self.PRZEPISY, self.SKLADNIKI),
+            {
+                "Zupa": [("Mąka", "200", "g"), ("Jajko", "1", "szt")],
+                "Sałatka": [],
+                "Chleb": [("Jajko", "2", "szt")],
+            },
+        )
+
+    def test_unsorted_exports_give_the_same_recipes(self):
+        """Test that exports out of recipe id order are joined all the same."""
+        skladniki = [self.SKLADNIKI[i] for i in (4, 1, 3, 0, 2)]
+        self.assertEqual(
+            self._extract(self.PRZEPISY[::-1], skladniki),
+            self._extract(self.PRZEPISY, self.SKLADNIKI),
+        )
+
+    def test_zero_padded_ids_join_like_sorted_ones(self):
+        """Test that unsorted exports match "007" to "7" like the merge join."""
+        padded = [["0" + row[0]] + row[1:] for row in self.SKLADNIKI]
+        with self.assertLogs("meal_planner_app.migrate_legacy", "INFO") as logs:
+            unsorted = self._extract(self.PRZEPISY[::-1], padded)
+        self.assertIn("not sorted", "\n".join(logs.output))
+        self.assertEqual(unsorted, self._extract(self.PRZEPISY, padded))
+        self.assertEqual(unsorted, self._extract(self.PRZEPISY, self.SKLADNIKI))
+
+    def test_recipes_are_yielded_lazily(self):
+        """Test that extraction returns an iterator, and nothing without the files."""
+        self._extract(self.PRZEPISY, self.SKLADNIKI)
+        recipes = extract_from_csvs(self.tmpdir)
+        self.assertEqual(next(recipes)["source_url"], "https://example.com/zupa")
+        recipes.close()
+        os.remove(os.path.join(self.tmpdir, "skladniki.csv"))
+        self.assertEqual(list(extract_from_csvs(self.tmpdir)), [])
+
+    def test_short_rows_have_no_recipe_id(self):
+        """Test that skladniki rows cut short before the recipe id are skipped."""
+        _write_csv(
+            os.path.join(self.tmpdir, "przepisy.csv"),
+            ["id", "nazwa", "przepis"],
+            [["2", "Zupa", "Gotować."], ["3", "Chleb", "Upiec."]],
+        )
+        _write_csv(
+            os.path.join(self.tmpdir, "skladniki.csv"),
+            ["idProduktu", "liczba", "idPrzepisu"],
+            [["1", "200", "2"], ["2", "1", "3"], ["2", "4"]],
+        )
+        recipes = list(extract_from_csvs(self.tmpdir))
+        self.assertEqual(
+            [(r["name"], len(r["ingredients"])) for r in recipes],
+            [("Zupa", 1), ("Chleb", 1)],
+        )
+
+    def test_parse_error_fails_the_extraction(self):
+        """Test that an error halfway through is raised, not a quiet end."""
+        self._extract(self.PRZEPISY, self.SKLADNIKI)
+        with mock.patch(
+            "meal_planner_app.migrate_legacy._recipe_from_przepis",
+            side_effect=[{"name": "Zupa"}, ValueError("bad row")],
+        ):
+            recipes = extract_from_csvs(self.tmpdir)
+            self.assertEqual(next(recipes), {"name": "Zupa"})
+            with self.assertRaises(ValueError):
+                next(recipes)
+
+
+class TestDirectIngestion(unittest.TestCase):
+    """Tests for writing migrated recipes straight into the storage backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.journal_dir = os.path.join(self.tmpdir, "journal")
+        crud.use_backend(storage.JournalBackend(self.journal_dir))
+
+    def tearDown(self):
+        crud.storage_backend.close()
+        crud.use_backend(storage.MemoryBackend())
+        shutil.rmtree(self.tmpdir)
+
+    def test_ingest_leaves_a_loadable_snapshot(self):
+        """Test that recipes end up compacted in the snapshot, ready to load."""
+        recipes = (
+            {
+                "name": f"Recipe {i}",
+                "instructions": "..." if i != 3 else "",
+                "ingredients": [{"name": "Salt", "quantity": "1", "unit": "g"}],
+            }
+            for i in range(10)
+        )
+        result = ingest_directly(recipes, batch_size=4)
+        self.assertEqual((result.created, result.failed), (9, 1))
+        journal = os.path.join(self.journal_dir, storage.JournalBackend.JOURNAL)
+        self.assertEqual(os.path.getsize(journal), 0)
+
+        crud.use_backend(storage.JournalBackend(self.journal_dir))
+        recipes = crud.list_recipes()
+        self.assertEqual(
+            [r.name for r in recipes], [f"Recipe {i}" for i in range(10) if i != 3]
+        )
+        self.assertEqual(recipes[0].ingredients[0].name, "Salt")
+
+    def test_failed_import_leaves_no_recipes(self):
+        """Test that an import cut short by an error is rolled back."""
+
+        def recipes():
+            for i in range(6):
+                yield {"name": f"Recipe {i}", "instructions": "..."}
+            raise ValueError("export is truncated")
+
+        with self.assertRaises(ValueError):
+            ingest_directly(recipes(), batch_size=4)
+        crud.use_backend(storage.JournalBackend(self.journal_dir))
+        self.assertEqual(crud.list_recipes(), [])
+
+    def test_seed_without_server(self):
+        """Test that --direct seeding falls back to the bundled recipes, once."""
+        empty = os.path.join(self.tmpdir, "legacy")
+        os.mkdir(empty)
+        seed_from_legacy(
+            odb_path=os.path.join(empty, "missing.odb"),
+            csv_path=os.path.join(empty, "missing.csv"),
+            base_dir=empty,
+            direct=True,
+        )
+        crud.use_backend(storage.JournalBackend(self.journal_dir))
+        self.assertEqual(len(crud.list_recipes()), len(LEGACY_RECIPES))
+
+        seed_from_legacy(base_dir=empty, direct=True)  # Data present: skipped
+        crud.use_backend(storage.JournalBackend(self.journal_dir))
+        self.assertEqual(len(crud.list_recipes()), len(LEGACY_RECIPES))
+
+
+if __name__ == "__main__":
+    unittest.main()
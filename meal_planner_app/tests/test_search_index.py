@@ -0,0 +1,177 @@
+"""
+Tests for the search indexes in search_index.py.
+"""
+
+import random
+import unittest
+
+from meal_planner_app.search_index import (
+    IngredientIndex,
+    NameCatalog,
+    RankedIndex,
+    TrigramIndex,
+    normalize_term,
+)
+
+
+class TestNormalizeTerm(unittest.TestCase):
+    """Tests for case and diacritic folding."""
+
+    def test_folds_polish_diacritics(self):
+        """Test that Polish letters fold to their ASCII base letters."""
+        self.assertEqual(normalize_term("Ząbek"), "zabek")
+        self.assertEqual(
+            normalize_term("ŻÓŁW źdźbło ćma śnięty"), "zolw zdzblo cma sniety"
+        )
+        self.assertEqual(normalize_term("Mąka Pszenna"), "maka pszenna")
+
+    def test_ascii_is_lowercased(self):
+        """Test the ASCII fast path."""
+        self.assertEqual(normalize_term("Chicken Breast"), "chicken breast")
+
+
+class TestTrigramIndex(unittest.TestCase):
+    """Tests that trigram lookups match a plain substring scan."""
+
+    def setUp(self):
+        rng = random.Random(1234)
+        alphabet = "abcde "
+        self.docs = {
+            key: tuple(
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+                for _ in range(rng.randint(1, 3))
+            )
+            for key in range(300)
+        }
+        self.index = TrigramIndex()
+        for key, texts in self.docs.items():
+            self.index.add(key, texts)
+
+    def _scan(self, term):
+        return {
+            key
+            for key, texts in self.docs.items()
+            if any(term in text for text in texts if text)
+        }
+
+    def test_search_matches_full_scan(self):
+        """Test queries of every length against a brute-force scan."""
+        for term in ["a", "ab", "abc", "cab", "e d", "abcde", "dddd", "zzz"]:
+            self.assertEqual(self.index.search(term), self._scan(term), term)
+
+    def test_remove_and_replace(self):
+        """Test that removed and re-added keys are reflected in results."""
+        self.index.remove(0)
+        del self.docs[0]
+        self.index.add(1, ("xyzzy",))
+        self.docs[1] = ("xyzzy",)
+        self.assertEqual(self.index.search("yzz"), {1})
+        for term in ["abc", "bca", "e"]:
+            self.assertEqual(self.index.search(term), self._scan(term), term)
+
+
+class TestIngredientIndex(unittest.TestCase):
+    """Tests for the inverted ingredient-name index."""
+
+    def test_lookup_by_exact_and_partial_name(self):
+        """Test that lookups use substring semantics over normalized names."""
+        index = IngredientIndex()
+        index.add("r1", ["Milk", "Flour"])
+        index.add("r2", ["Buttermilk"])
+        index.add("r3", ["Egg"])
+        self.assertEqual(index.lookup("milk"), {"r1", "r2"})
+        self.assertEqual(index.lookup("flo"), {"r1"})
+        self.assertEqual(index.lookup("g"), {"r3"})
+
+        index.remove("r2", ["Buttermilk"])
+        self.assertEqual(index.lookup("milk"), {"r1"})
+        self.assertEqual(len(index), 3)
+
+
+class TestRankedIndex(unittest.TestCase):
+    """Tests for BM25F-style ranked search."""
+
+    def setUp(self):
+        # Fields: title (heavy), body (light)
+        self.index = RankedIndex(field_weights=(3.0, 1.0))
+        self.index.add("title", ("Pumpkin soup", "Simmer everything."))
+        self.index.add("body", ("Chicken stew", "Serve with pumpkin seeds."))
+        self.index.add("none", ("Pancakes", "Mix and fry."))
+
+    def test_field_weights_drive_ranking(self):
+        """Test that a title match outranks a body match and misses are excluded."""
+        results = self.index.search("pumpkin", limit=10)
+        self.assertEqual([key for key, _ in results], ["title", "body"])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_more_matching_terms_score_higher(self):
+        """Test that documents matching more query terms rank first."""
+        results = self.index.search("chicken pumpkin", limit=10)
+        self.assertEqual(results[0][0], "body")
+
+    def test_limit_and_remove(self):
+        """Test top-k truncation and document removal."""
+        self.assertEqual(len(self.index.search("pumpkin", limit=1)), 1)
+        self.index.remove("title")
+        self.assertEqual(
+            [key for key, _ in self.index.search("pumpkin", limit=10)], ["body"]
+        )
+        self.assertEqual(self.index.search("soup", limit=10), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_ties_go_to_first_indexed(self):
+        """Test that equal scores are ordered by indexing, not by hash order."""
+        index = RankedIndex(field_weights=(1.0,))
+        keys = ["d", "a", "c", "b"]
+        for key in keys:
+            index.add(key, ("carrot onion",))
+        index.add("a", ("onion carrot",))  # Re-indexing keeps its place
+        results = index.search("onion carrot", limit=10)
+        self.assertEqual([key for key, _ in results], keys)
+        self.assertEqual(len({score for _, score in results}), 1)
+        self.assertEqual(index.search("carrot onion", limit=2), results[:2])
+
+
+class TestNameCatalog(unittest.TestCase):
+    """Tests for the reference-counted prefix catalog."""
+
+    def setUp(self):
+        self.catalog = NameCatalog()
+        self.catalog.add(["Mąka pszenna", "Marchew", "Masło", "Mleko", "Cebula"])
+        self.catalog.add(["Marchew", "  ", "Mąka żytnia"])
+
+    def test_suggest_prefix_is_folded_and_sorted(self):
+        """Test accent-insensitive prefix matching in folded alphabetical order."""
+        self.assertEqual(
+            self.catalog.suggest("ma", limit=10),
+            ["Mąka pszenna", "Mąka żytnia", "Marchew", "Masło"],
+        )
+        self.assertEqual(self.catalog.suggest("MĄK", limit=1), ["Mąka pszenna"])
+        self.assertEqual(self.catalog.suggest("x", limit=10), [])
+        self.assertEqual(len(self.catalog), 6)
+
+    def test_names_live_until_last_reference(self):
+        """Test that a name is only dropped once every reference is removed."""
+        self.catalog.remove(["Marchew"])
+        self.assertIn("Marchew", self.catalog)
+        self.catalog.remove(["Marchew"])
+        self.assertNotIn("Marchew", self.catalog)
+        self.assertEqual(self.catalog.suggest("mar", limit=10), [])
+
+    def test_batch_add_merges_new_names(self):
+        """Test that a large batch of new names is merged into sorted order."""
+        version = self.catalog.version
+        batch = [f"Przyprawa {i:02d}" for i in range(20, 0, -1)] + ["Marchew", "Ananas"]
+        self.catalog.add(batch)
+        self.assertEqual(self.catalog.version, version + 1)
+        self.assertEqual(self.catalog.suggest("a", limit=1), ["Ananas"])
+        self.assertEqual(
+            self.catalog.suggest("przyprawa", limit=3),
+            ["Przyprawa 01", "Przyprawa 02", "Przyprawa 03"],
+        )
+        self.catalog.remove(["Przyprawa 01"])
+        self.assertEqual(self.catalog.suggest("przyprawa 0", limit=1), ["Przyprawa 02"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,11 @@ Tests for the shopping list generation functionality in crud.py.
 
 import unittest
 import uuid
+from dataclasses import asdict
 
 from meal_planner_app import crud
+from meal_planner_app.models.ingredient import Ingredient, parse_quantity
+from meal_planner_app.models.shopping_list import ShoppingList, ShoppingListItem
 
 
 class TestShoppingList(
@@ -230,6 +233,170 @@ class TestShoppingList(
         shopping_list = crud.generate_shopping_list(non_existent_id)
         self.assertIsNone(shopping_list)
 
+    def test_shopping_list_is_cached_until_plan_changes(self):
+        """Test that unchanged plans hit the cache and plan edits invalidate it."""
+        plan_id = self.meal_plan1.meal_plan_id
+        first = crud.generate_shopping_list(plan_id)
+        self.assertIs(crud.generate_shopping_list(plan_id), first)
+
+        crud.add_recipe_to_meal_plan(plan_id, self.recipe3.recipe_id)
+        updated = crud.generate_shopping_list(plan_id)
+        self.assertIsNot(updated, first)
+        self.assertIsNotNone(self.find_ingredient(updated, "Milk", "ml"))
+
+        crud.remove_recipe_from_meal_plan(plan_id, self.recipe3.recipe_id)
+        self.assertIsNone(
+            self.find_ingredient(crud.generate_shopping_list(plan_id), "Milk", "ml")
+        )
+
+    def test_shopping_list_cache_follows_recipe_updates(self):
+        """Test that editing or deleting a recipe invalidates cached lists using it."""
+        plan_id = self.meal_plan1.meal_plan_id
+        crud.generate_shopping_list(plan_id)
+
+        crud.update_recipe(
+            self.recipe1.recipe_id,
+            ingredients_data=[{"name": "Flour", "quantity": 5, "unit": "cup"}],
+        )
+        shopping_list = crud.generate_shopping_list(plan_id)
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Flour", "cup")["quantity"], 5.0
+        )
+
+        crud.delete_recipe(self.recipe1.recipe_id)
+        shopping_list = crud.generate_shopping_list(plan_id)
+        self.assertIsNone(self.find_ingredient(shopping_list, "Flour", "cup"))
+
+    def test_shopping_list_sums_parsed_quantities(self):
+        """Test that decimal commas, fractions and ranges are summed as numbers."""
+        recipe = crud.create_recipe(
+            name="Sauce",
+            instructions="Stir.",
+            ingredients_data=[
+                {"name": "Flour", "quantity": "1,5", "unit": "cup"},
+                {"name": "Sugar", "quantity": "1/2", "unit": "cup"},
+                {"name": "Egg", "quantity": "1-2", "unit": "pc"},
+            ],
+        )
+        crud.add_recipe_to_meal_plan(self.meal_plan1.meal_plan_id, recipe.recipe_id)
+
+        shopping_list = crud.generate_shopping_list(self.meal_plan1.meal_plan_id)
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Flour", "cup")["quantity"], 3.5
+        )
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Sugar", "cup")["quantity"], 1.0
+        )
+        # Ranges count as their upper bound: R1 1 + R2 3 + Sauce 2
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Egg", "pc")["quantity"], 6.0
+        )
+
+    def test_single_quantities_keep_their_wording(self):
+        """Test that a quantity listed once is shown as entered, unless it is a
+        plain number, and is only parsed when summed."""
+        recipe = crud.create_recipe(
+            name="Omelette",
+            instructions="Fry.",
+            ingredients_data=[
+                {"name": "Chives", "quantity": "1-2", "unit": "bunch"},
+                {"name": "Cream", "quantity": "1/2", "unit": "cup"},
+                {"name": "Cheese", "quantity": "50", "unit": "g"},
+            ],
+        )
+        plan = crud.create_meal_plan("Brunch", recipe_ids=[recipe.recipe_id])
+        shopping_list = crud.generate_shopping_list(plan.meal_plan_id)
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Chives", "bunch")["quantity"], "1-2"
+        )
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Cream", "cup")["quantity"], "1/2"
+        )
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Cheese", "g")["quantity"], 50.0
+        )
+
+        twice = crud.create_recipe(
+            name="Omelette for two",
+            instructions="Fry.",
+            ingredients_data=[{"name": "Chives", "quantity": "1", "unit": "bunch"}],
+        )
+        crud.add_recipe_to_meal_plan(plan.meal_plan_id, twice.recipe_id)
+        shopping_list = crud.generate_shopping_list(plan.meal_plan_id)
+        self.assertEqual(
+            self.find_ingredient(shopping_list, "Chives", "bunch")["quantity"], 3.0
+        )
+
+    def test_generate_shopping_lists_batch(self):
+        """Test batch generation: one list per id, None for unknown plans, shared cache."""
+        plan_id = self.meal_plan1.meal_plan_id
+        cached = crud.generate_shopping_list(plan_id)
+        missing_id = uuid.uuid4()
+
+        results = crud.generate_shopping_lists(
+            [plan_id, self.meal_plan2_complex.meal_plan_id, missing_id, plan_id]
+        )
+        self.assertEqual(len(results), 3)
+        self.assertIs(results[plan_id], cached)
+        self.assertIsNone(results[missing_id])
+        self.assertIs(
+            crud.generate_shopping_list(self.meal_plan2_complex.meal_plan_id),
+            results[self.meal_plan2_complex.meal_plan_id],
+        )
+
+
+class TestParseQuantity(unittest.TestCase):
+    """Tests for the write-time quantity parser."""
+
+    def test_numeric_forms(self):
+        """Test numbers, decimal commas, fractions and ranges."""
+        cases = {
+            2: 2.0,
+            "2": 2.0,
+            " 1,5 ": 1.5,
+            "1/2": 0.5,
+            "1 1/2": 1.5,
+            "1-2": 2.0,
+            "1/2 - 1": 1.0,
+        }
+        for quantity, expected in cases.items():
+            self.assertEqual(parse_quantity(quantity), expected, quantity)
+
+    def test_free_text_is_not_numeric(self):
+        """Test that text, empty values and malformed ranges stay non-numeric."""
+        for quantity in ["to taste", "2 scoops", "", None, "1/0", "2-1", "nan"]:
+            self.assertIsNone(parse_quantity(quantity), quantity)
+
+    def test_ingredient_reparses_on_assignment(self):
+        """Test that quantity_value follows the quantity attribute."""
+        ingredient = Ingredient(name="Salt", quantity="a pinch", unit="")
+        self.assertIsNone(ingredient.quantity_value)
+        ingredient.quantity = "0,5"
+        self.assertEqual(ingredient.quantity_value, 0.5)
+        self.assertEqual(ingredient.quantity, "0,5")
+
+
+class TestSlottedModels(unittest.TestCase):
+    """Tests that the slotted models keep their attribute and dataclass API."""
+
+    def test_models_have_no_instance_dict(self):
+        """Test that instances carry no __dict__ and reject unknown attributes."""
+        ingredient = Ingredient(name="Salt", quantity="1", unit="g")
+        item = ShoppingListItem(name="Salt", quantity=1.0, unit="g")
+        for obj in (ingredient, item):
+            self.assertFalse(hasattr(obj, "__dict__"))
+            with self.assertRaises(AttributeError):
+                obj.colour = "white"
+
+    def test_dataclass_helpers_still_work(self):
+        """Test defaults, equality and asdict on the slotted dataclasses."""
+        item = ShoppingListItem(name="Salt", quantity=1.0, unit="g")
+        self.assertFalse(item.purchased)
+        self.assertEqual(item, ShoppingListItem(name="Salt", quantity=1.0, unit="g"))
+        shopping_list = ShoppingList(name="List", items=[item])
+        self.assertEqual(asdict(shopping_list)["items"][0]["name"], "Salt")
+        self.assertNotEqual(shopping_list.id, ShoppingList(name="Other").id)
+
 
 if __name__ == "__main__":
     unittest.main()
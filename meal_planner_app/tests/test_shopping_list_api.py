@@ -256,6 +256,91 @@ class ShoppingListApiTestCase(unittest.TestCase):
         self.assertIn("Dairy", locs)
         self.assertIn("Bakery", locs)
 
+    def test_catalog_responses_follow_recipe_writes(self):
+        """Cached /api/ingredients and /api/locations bodies are refreshed on change only."""
+        version = crud.ingredient_names_version()
+        second = crud.create_recipe(
+            name="Second",
+            instructions="...",
+            ingredients_data=[
+                {"name": "Eggs", "quantity": 1, "unit": "", "location": "Dairy"},
+                {"name": "Basil", "quantity": 1, "unit": "", "location": "Herbs"},
+            ],
+        )
+        self.assertNotEqual(crud.ingredient_names_version(), version)
+        self.assertIn("Basil", self.client.get("/api/ingredients").get_json())
+        self.assertEqual(
+            self.client.get("/api/locations").get_json(), ["Dairy", "Herbs"]
+        )
+
+        # "Eggs" is still used by the first recipe after the second is deleted
+        crud.delete_recipe(second.recipe_id)
+        self.assertEqual(
+            self.client.get("/api/ingredients").get_json(),
+            ["Eggs", "Pancetta", "Spaghetti"],
+        )
+        self.assertEqual(self.client.get("/api/locations").get_json(), [])
+
+        # Re-adding a reference to an existing name does not change the catalog
+        version = crud.ingredient_names_version()
+        crud.create_recipe(
+            name="Third",
+            instructions="...",
+            ingredients_data=[{"name": "Eggs", "quantity": 2, "unit": ""}],
+        )
+        self.assertEqual(crud.ingredient_names_version(), version)
+
+    def test_conditional_get_shopping_lists_and_pdfs(self):
+        """ETags on shopping lists and their PDFs follow content versions."""
+        sl_id = crud.create_shopping_list(self.meal_plan.meal_plan_id).id
+        plan_pdf = f"/meal-plans/{self.meal_plan.meal_plan_id}/shopping-list/pdf"
+        urls = [
+            "/api/shopping-lists",
+            f"/api/shopping-lists/{sl_id}",
+            f"/shopping-lists/{sl_id}/pdf",
+            plan_pdf,
+        ]
+        etags = {url: self.client.get(url).headers["ETag"] for url in urls}
+        for url, etag in etags.items():
+            response = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304, url)
+
+        crud.update_shopping_list(sl_id, name="Renamed")
+        for url in urls[:3]:
+            response = self.client.get(url, headers={"If-None-Match": etags[url]})
+            self.assertEqual(response.status_code, 200, url)
+        response = self.client.get(plan_pdf, headers={"If-None-Match": etags[plan_pdf]})
+        self.assertEqual(response.status_code, 304)
+
+        # The generated list follows its recipes
+        crud.update_recipe(self.recipe1.recipe_id, name="Carbonara")
+        response = self.client.get(plan_pdf, headers={"If-None-Match": etags[plan_pdf]})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data.startswith(b"%PDF"))
+
+    def test_batch_shopping_lists(self):
+        """Batch generation returns one grouped list per id, null for unknown plans."""
+        missing_id = str(uuid.uuid4())
+        plan_id = str(self.meal_plan.meal_plan_id)
+        response = self.client.post(
+            "/api/shopping-lists/batch",
+            content_type="application/json",
+            data=json.dumps({"meal_plan_ids": [plan_id, missing_id]}),
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertIsNone(data[missing_id])
+        single = self.client.get(f"/api/meal-plans/{plan_id}/shopping-list")
+        self.assertEqual(data[plan_id], single.get_json())
+
+        for body in [{}, {"meal_plan_ids": "nope"}, {"meal_plan_ids": ["bad-id"]}]:
+            response = self.client.post(
+                "/api/shopping-lists/batch",
+                content_type="application/json",
+                data=json.dumps(body),
+            )
+            self.assertEqual(response.status_code, 400, body)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,425 @@
+"""
+Tests for the storage backends behind crud.py.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from meal_planner_app import crud, storage
+from meal_planner_app.main import app
+from meal_planner_app.models.recipe import Recipe
+from meal_planner_app.store import new_sequence
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """Tests for persisting crud writes in SQLite and sharing them between processes."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "meal_planner.db")
+        crud.use_backend(storage.SQLiteBackend(self.path))
+        # Stands in for another gunicorn worker writing to the same file
+        self.other = storage.SQLiteBackend(self.path)
+
+    def tearDown(self):
+        crud.storage_backend.close()
+        self.other.close()
+        crud.use_backend(storage.MemoryBackend())
+        shutil.rmtree(self.tmpdir)
+
+    def _create_plan(self):
+        recipe = crud.create_recipe(
+            name="Pancakes",
+            instructions="Mix and fry.",
+            ingredients_data=[
+                {"name": "Flour", "quantity": "200", "unit": "g", "location": "Baking"},
+                {"name": "Milk", "quantity": "1/2", "unit": "l", "location_id": 7},
+            ],
+        )
+        meal_plan = crud.create_meal_plan("Week", recipe_ids=[recipe.recipe_id])
+        return recipe, meal_plan
+
+    def test_data_survives_reload(self):
+        """Test that a fresh backend on the same file loads every record, in order."""
+        recipe, meal_plan = self._create_plan()
+        second = crud.create_recipe(name="Toast", instructions="Toast it.")
+        shopping_list = crud.create_shopping_list(meal_plan.meal_plan_id)
+        crud.update_recipe(recipe.recipe_id, name="Crepes")
+
+        crud.use_backend(storage.SQLiteBackend(self.path))
+
+        self.assertEqual([r.name for r in crud.list_recipes()], ["Crepes", "Toast"])
+        loaded = crud.get_recipe(recipe.recipe_id)
+        self.assertEqual(
+            [
+                (i.name, i.quantity, i.unit, i.location_id, i.location)
+                for i in loaded.ingredients
+            ],
+            [("Flour", "200", "g", None, "Baking"), ("Milk", "1/2", "l", 7, None)],
+        )
+        self.assertEqual(
+            crud.get_meal_plan(meal_plan.meal_plan_id).recipe_ids, [recipe.recipe_id]
+        )
+        self.assertEqual(
+            crud.get_shopping_list(shopping_list.id).items, shopping_list.items
+        )
+        self.assertEqual(
+            crud.search_recipes("toast"), [crud.get_recipe(second.recipe_id)]
+        )
+
+    def test_sync_applies_writes_from_another_process(self):
+        """Test that sync() picks up upserts, deletes and cascades written elsewhere."""
+        recipe, meal_plan = self._create_plan()
+        self.assertEqual(len(self.other.poll()), 2)  # the creates
+
+        other_recipe = storage.recipe_record(recipe)
+        other_recipe["name"] = "Crepes"
+        self.other.write([(storage.RECIPE, other_recipe["id"], other_recipe)])
+        crud.sync()
+        self.assertEqual(crud.get_recipe(recipe.recipe_id).name, "Crepes")
+        self.assertEqual(crud.search_recipes("crepes")[0].recipe_id, recipe.recipe_id)
+        self.assertEqual(crud.search_recipes("pancakes"), [])
+
+        crud.delete_recipe(recipe.recipe_id)
+        changes = self.other.poll()
+        self.assertEqual(
+            changes,
+            [
+                (storage.RECIPE, str(recipe.recipe_id), None),
+                (
+                    storage.MEAL_PLAN,
+                    str(meal_plan.meal_plan_id),
+                    storage.meal_plan_record(
+                        crud.get_meal_plan(meal_plan.meal_plan_id)
+                    ),
+                ),
+            ],
+        )
+        self.assertEqual(crud.storage_backend.poll(), [])  # own writes are skipped
+
+    def test_reopen_gets_a_new_connection_and_origin(self):
+        """Test that a reopened (forked) backend sees writes from its parent."""
+        recipe, _ = self._create_plan()
+        self.other.load()
+        self.other.reopen()
+        crud.update_recipe(recipe.recipe_id, name="Crepes")
+        changes = self.other.poll()
+        self.assertEqual(
+            [(kind, key) for kind, key, _ in changes],
+            [(storage.RECIPE, str(recipe.recipe_id))],
+        )
+        self.assertEqual(changes[0][2]["name"], "Crepes")
+
+    def test_falling_behind_trimmed_log_reloads(self):
+        """Test that a reader that missed trimmed log entries reloads everything."""
+        crud.storage_backend.close()
+        crud.use_backend(storage.SQLiteBackend(self.path, changes_kept=0))
+        for i in range(1000):
+            crud.create_meal_plan(f"Plan {i}")
+        self.assertIsNone(self.other.poll())
+
+        reader = storage.SQLiteBackend(self.path)
+        self.assertEqual(len(list(reader.load())), 1000)
+        self.assertEqual(reader.poll(), [])
+        reader.close()
+
+    def test_reload_serves_the_old_state_until_published(self):
+        """Test that readers see the complete old state while a reload runs."""
+        recipe, meal_plan = self._create_plan()
+        load = crud.storage_backend.load
+        seen = []
+
+        def observed_load():
+            for change in load():
+                seen.append(
+                    (
+                        [r.recipe_id for r in crud.list_recipes()],
+                        crud.get_meal_plan(meal_plan.meal_plan_id) is not None,
+                        [r.recipe_id for r in crud.search_recipes("pancakes")],
+                        crud.list_unique_ingredient_names(),
+                    )
+                )
+                yield change
+
+        with mock.patch.object(crud.storage_backend, "load", observed_load):
+            with crud._write_lock:  # pylint: disable=protected-access
+                crud._load_from_backend()  # pylint: disable=protected-access
+        expected = ([recipe.recipe_id], True, [recipe.recipe_id], ["Flour", "Milk"])
+        self.assertEqual(seen, [expected] * 2)
+        self.assertEqual(
+            [r.recipe_id for r in crud.search_recipes("pancakes")], [recipe.recipe_id]
+        )
+
+    def test_bulk_writes_trim_the_change_log(self):
+        """Test that writes of several changes still trim the change log."""
+        crud.storage_backend.close()
+        crud.use_backend(storage.SQLiteBackend(self.path, changes_kept=5))
+        with mock.patch.object(storage.SQLiteBackend, "TRIM_EVERY", 10):
+            for i in range(9):  # 3 log entries each: never exactly at 10 or 20
+                crud.create_recipes(
+                    [{"name": f"R{i}.{j}", "instructions": "..."} for j in range(3)]
+                )
+        with sqlite3.connect(self.path) as conn:
+            kept = conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        conn.close()
+        self.assertLess(kept, 5 + 10 + 3)
+
+    def test_resets_clear_stored_data(self):
+        """Test that the reset helpers also clear the database."""
+        self._create_plan()
+        crud.reset_recipes_db()
+        crud.reset_meal_plans_db()
+        crud.reset_shopping_lists_db()
+        self.assertEqual(list(self.other.load()), [])
+
+    def test_processes_agree_on_order_and_cursors(self):
+        """Test that recipes written concurrently elsewhere are listed and paged
+        by creation, with the same cursors after a full reload.
+        """
+        other_recipe = Recipe(name="B0", instructions="...", seq=new_sequence())
+        for i in range(3):
+            crud.create_recipe(name=f"A{i}", instructions="...")
+        # The other worker commits a recipe it created before all of ours
+        self.other.write(
+            [storage.make_change(storage.RECIPE, other_recipe.recipe_id, other_recipe)]
+        )
+        crud.sync()
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], ["B0", "A0", "A1", "A2"]
+        )
+
+        first = crud.create_recipe(name="A3", instructions="...")
+        late = Recipe(name="B1", instructions="...", seq=first.seq - 1)
+        self.other.write([storage.make_change(storage.RECIPE, late.recipe_id, late)])
+        crud.sync()
+        names = ["B0", "A0", "A1", "A2", "B1", "A3"]
+        self.assertEqual([r.name for r in crud.list_recipes()], names)
+        page, cursor = crud.list_recipes_page(None, 3)
+        self.assertEqual([r.name for r in page], names[:3])
+
+        crud.use_backend(storage.SQLiteBackend(self.path))  # Another worker
+        self.assertEqual([r.name for r in crud.list_recipes()], names)
+        self.assertEqual(
+            [r.name for r in crud.list_recipes_page(cursor, 3)[0]], names[3:]
+        )
+
+    def test_workers_agree_on_etags(self):
+        """Test that another worker serving the same data sends the same ETags."""
+        recipe, meal_plan = self._create_plan()
+        shopping_list = crud.create_shopping_list(meal_plan.meal_plan_id)
+        crud.update_recipe(recipe.recipe_id, name="Crepes")
+        client = app.test_client()
+        urls = [
+            "/api/recipes",
+            f"/api/recipes/{recipe.recipe_id}",
+            "/api/ingredients",
+            "/api/locations",
+            "/api/shopping-lists",
+            f"/api/shopping-lists/{shopping_list.id}",
+            f"/meal-plans/{meal_plan.meal_plan_id}/shopping-list/pdf",
+        ]
+        etags = {url: client.get(url).headers["ETag"] for url in urls}
+
+        # Another worker: loaded from the file, so its counters differ
+        crud.use_backend(storage.SQLiteBackend(self.path))
+        crud.after_fork()
+        for url, etag in etags.items():
+            response = client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304, url)
+
+        self.other.write([storage.make_change(storage.RECIPE, recipe.recipe_id, None)])
+        response = client.get(
+            "/api/recipes", headers={"If-None-Match": etags["/api/recipes"]}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_old_database_is_migrated(self):
+        """Test that recipes stored without sequence numbers keep their order."""
+        crud.storage_backend.close()
+        self.other.close()
+        os.remove(self.path)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            "CREATE TABLE recipes (id TEXT PRIMARY KEY, name TEXT,"
+            " description TEXT, instructions TEXT, source_url TEXT);"
+        )
+        ids = [str(uuid.uuid4()) for _ in range(3)]
+        conn.executemany(
+            "INSERT INTO recipes VALUES (?, ?, NULL, '...', NULL)",
+            [(rid, f"Old {i}") for i, rid in enumerate(ids)],
+        )
+        conn.commit()
+        conn.close()
+
+        crud.use_backend(storage.SQLiteBackend(self.path))
+        self.other = storage.SQLiteBackend(self.path)
+        crud.create_recipe(name="New", instructions="...")
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], ["Old 0", "Old 1", "Old 2", "New"]
+        )
+        crud.use_backend(storage.SQLiteBackend(self.path))
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], ["Old 0", "Old 1", "Old 2", "New"]
+        )
+
+    def test_failed_write_leaves_memory_unchanged(self):
+        """Test that a write the database rejects is not applied in memory either."""
+        recipe, meal_plan = self._create_plan()
+        shopping_list = crud.create_shopping_list(meal_plan.meal_plan_id)
+        failure = mock.patch.object(
+            crud.storage_backend, "write", side_effect=sqlite3.OperationalError
+        )
+        with failure, self.assertRaises(sqlite3.OperationalError):
+            crud.create_recipe(name="Soup", instructions="Boil.")
+        with failure, self.assertRaises(sqlite3.OperationalError):
+            crud.update_recipe(recipe.recipe_id, name="Crepes")
+        with failure, self.assertRaises(sqlite3.OperationalError):
+            crud.delete_recipe(recipe.recipe_id)
+        with failure, self.assertRaises(sqlite3.OperationalError):
+            crud.update_meal_plan(meal_plan.meal_plan_id, name="Month")
+        with failure, self.assertRaises(sqlite3.OperationalError):
+            crud.update_shopping_list(shopping_list.id, items=[])
+
+        self.assertEqual(crud.list_recipes(), [recipe])
+        self.assertEqual(crud.rank_recipes("soup"), [])
+        self.assertEqual(crud.search_recipes("pancakes"), [recipe])
+        self.assertEqual(meal_plan.name, "Week")
+        self.assertEqual(meal_plan.recipe_ids, [recipe.recipe_id])
+        self.assertEqual(len(shopping_list.items), 2)
+
+        crud.use_backend(storage.SQLiteBackend(self.path))
+        self.assertEqual([r.name for r in crud.list_recipes()], ["Pancakes"])
+
+
+class TestJournalBackend(unittest.TestCase):
+    """Tests for the append-only journal with snapshot compaction."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        crud.storage_backend.close()
+        crud.use_backend(storage.MemoryBackend())
+        shutil.rmtree(self.tmpdir)
+
+    def _restart(self, crash=False):
+        """Reopens the journal; a crash skips the compaction done by close()."""
+        if crash:
+            crud.storage_backend._journal.close()  # pylint: disable=protected-access
+        else:
+            crud.storage_backend.close()
+        crud.use_backend(storage.JournalBackend(self.tmpdir))
+
+    def test_restart_replays_snapshot_and_journal(self):
+        """Test that state written before and after a compaction is restored."""
+        crud.use_backend(storage.JournalBackend(self.tmpdir, compact_every=3))
+        recipes = [
+            crud.create_recipe(name=f"R{i}", instructions="...") for i in range(5)
+        ]
+        meal_plan = crud.create_meal_plan("Week", recipe_ids=[recipes[0].recipe_id])
+        crud.update_recipe(recipes[0].recipe_id, name="First")
+        crud.delete_recipe(recipes[1].recipe_id)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.tmpdir, storage.JournalBackend.SNAPSHOT))
+        )
+
+        self._restart(crash=True)
+
+        self.assertEqual(
+            [r.name for r in crud.list_recipes()], ["First", "R2", "R3", "R4"]
+        )
+        self.assertEqual(
+            crud.get_meal_plan(meal_plan.meal_plan_id).recipe_ids,
+            [recipes[0].recipe_id],
+        )
+
+    def test_torn_last_entry_is_dropped(self):
+        """Test that a partially written journal entry is ignored and truncated."""
+        crud.use_backend(storage.JournalBackend(self.tmpdir))
+        crud.create_recipe(name="Kept", instructions="...")
+        journal = os.path.join(self.tmpdir, storage.JournalBackend.JOURNAL)
+        size = os.path.getsize(journal)
+        with open(journal, "ab") as f:
+            f.write(b"\xff\x00\x00\x00partial")
+
+        self._restart(crash=True)
+        self.assertEqual([r.name for r in crud.list_recipes()], ["Kept"])
+        self.assertEqual(os.path.getsize(journal), size)
+
+    def test_close_compacts(self):
+        """Test that closing the backend folds the journal into the snapshot."""
+        crud.use_backend(storage.JournalBackend(self.tmpdir))
+        crud.create_recipe(name="Soup", instructions="...")
+        self._restart()
+        journal = os.path.join(self.tmpdir, storage.JournalBackend.JOURNAL)
+        self.assertEqual(os.path.getsize(journal), 0)
+        self.assertEqual([r.name for r in crud.list_recipes()], ["Soup"])
+
+    def test_snapshot_ingredients_are_built_on_first_use(self):
+        """Test that recipes load from a packed snapshot with their ids and
+        ingredients intact, building the ingredients only when used."""
+        crud.use_backend(storage.JournalBackend(self.tmpdir))
+        recipe = crud.create_recipe(
+            name="Soup",
+            instructions="...",
+            ingredients_data=[
+                {"name": "Leek", "quantity": "2", "unit": "szt", "location": "Veg"}
+            ],
+        )
+        crud.storage_backend.close()
+
+        [(_, _, record)] = storage.JournalBackend(self.tmpdir).load()
+        loaded = storage.recipe_from_record(record)
+        self.assertIsNone(loaded._ingredients)  # pylint: disable=protected-access
+        self.assertEqual(
+            [(i.name, i.quantity, i.unit, i.location) for i in loaded.ingredients],
+            [("Leek", "2", "szt", "Veg")],
+        )
+        self.assertEqual(storage.recipe_record(loaded), storage.recipe_record(recipe))
+
+    def test_restart_serves_before_indexes_are_built(self):
+        """Test that writes made while the background index build runs leave
+        the indexes matching the recipes."""
+        crud.use_backend(storage.JournalBackend(self.tmpdir))
+        kept, updated, deleted = [
+            crud.create_recipe(
+                name=f"{name} soup",
+                instructions="...",
+                ingredients_data=[
+                    {"name": name, "quantity": "1", "unit": "kg", "location": "Veg"}
+                ],
+            )
+            for name in ("Leek", "Tomato", "Pea")
+        ]
+        crud.storage_backend.close()
+
+        with mock.patch.object(crud, "BACKGROUND_INDEX_MIN", 0):
+            with crud._write_lock:  # pylint: disable=protected-access
+                crud.use_backend(storage.JournalBackend(self.tmpdir))
+                self.assertEqual(len(crud.list_recipes()), 3)
+                self.assertFalse(crud.wait_for_indexes(timeout=0))
+                crud.update_recipe(
+                    updated.recipe_id,
+                    name="Carrot soup",
+                    ingredients_data=[
+                        {"name": "Carrot", "quantity": "1", "unit": "kg"}
+                    ],
+                )
+                crud.delete_recipe(deleted.recipe_id)
+            self.assertTrue(crud.wait_for_indexes(timeout=5))
+
+        self.assertEqual(
+            [r.recipe_id for r in crud.search_recipes("soup")],
+            [kept.recipe_id, updated.recipe_id],
+        )
+        self.assertEqual(crud.search_recipes("tomato"), [])
+        self.assertEqual(crud.list_unique_ingredient_names(), ["Carrot", "Leek"])
+
+
+if __name__ == "__main__":
+    unittest.main()
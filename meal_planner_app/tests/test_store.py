@@ -0,0 +1,158 @@
+"""
+Tests for the IndexedStore used by crud.py.
+"""
+
+import unittest
+import uuid
+
+from meal_planner_app.models.recipe import Recipe
+from meal_planner_app.store import IndexedStore, new_sequence
+
+
+class TestIndexedStore(unittest.TestCase):
+    """Tests for primary-key lookups and ordered iteration."""
+
+    def setUp(self):
+        self.store = IndexedStore("recipe_id")
+        self.recipes = [
+            self.store.add(Recipe(name=f"R{i}", instructions="...")) for i in range(5)
+        ]
+
+    def test_get_by_key(self):
+        """Test that records are found by their primary key."""
+        target = self.recipes[3]
+        self.assertIs(self.store.get(target.recipe_id), target)
+        self.assertIsNone(self.store.get(uuid.uuid4()))
+        self.assertIn(target.recipe_id, self.store)
+
+    def test_iteration_keeps_insertion_order(self):
+        """Test that iteration and to_list follow insertion order."""
+        self.assertEqual(list(self.store), self.recipes)
+        self.assertEqual(self.store.to_list(), self.recipes)
+
+    def test_remove_preserves_order_of_remaining(self):
+        """Test removing a record keeps the others in their original order."""
+        removed = self.store.remove(self.recipes[1].recipe_id)
+        self.assertIs(removed, self.recipes[1])
+        self.assertEqual(
+            [r.name for r in self.store.to_list()], ["R0", "R2", "R3", "R4"]
+        )
+        self.assertIsNone(self.store.remove(self.recipes[1].recipe_id))
+        self.assertEqual(len(self.store), 4)
+
+    def test_to_list_is_a_copy(self):
+        """Test that mutating the returned list does not affect the store."""
+        snapshot = self.store.to_list()
+        snapshot.clear()
+        self.assertEqual(len(self.store), 5)
+
+    def test_clear(self):
+        """Test that clear empties the store."""
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.to_list(), [])
+
+    def test_versions_track_writes(self):
+        """Test that touch and remove move the collection and record versions."""
+        first, second = self.recipes[0].recipe_id, self.recipes[1].recipe_id
+        before = self.store.version
+        first_version = self.store.version_of(first)
+        self.store.touch(second)
+        self.assertGreater(self.store.version, before)
+        self.assertEqual(self.store.version_of(second), self.store.version)
+        self.assertEqual(self.store.version_of(first), first_version)
+
+        self.store.remove(second)
+        self.assertIsNone(self.store.version_of(second))
+        self.store.clear()
+        self.assertIsNone(self.store.version_of(first))
+        self.assertGreater(self.store.version, before + 1)
+
+    def test_page_follows_cursors(self):
+        """Test paging through the store, including past a deleted cursor."""
+        first_page, cursor = self.store.page(None, 2)
+        self.assertEqual([r.name for r in first_page], ["R0", "R1"])
+        self.store.remove(self.recipes[1].recipe_id)  # the cursor record
+        self.store.remove(self.recipes[2].recipe_id)
+        second_page, cursor = self.store.page(cursor, 2)
+        self.assertEqual([r.name for r in second_page], ["R3", "R4"])
+        self.assertIsNone(cursor)
+        self.assertEqual(self.store.page(None, 10), (self.store.to_list(), None))
+
+    def test_page_after_compaction_and_updates(self):
+        """Test that tombstone compaction and replaced records keep the order."""
+        extra = [
+            self.store.add(Recipe(name=f"X{i}", instructions="...")) for i in range(200)
+        ]
+        _, cursor = self.store.page(None, 3)  # after R2
+        for recipe in extra[:150]:
+            self.store.remove(recipe.recipe_id)
+        self.store.add(
+            Recipe(
+                name="R3 v2", instructions="...", recipe_id=self.recipes[3].recipe_id
+            )
+        )
+        names = []
+        while True:
+            page, cursor = self.store.page(cursor, 7)
+            names.extend(r.name for r in page)
+            if cursor is None:
+                break
+        self.assertEqual(names, ["R3 v2", "R4"] + [f"X{i}" for i in range(150, 200)])
+
+
+class TestSequencedStore(unittest.TestCase):
+    """Tests for stores ordered by a sequence number the records carry."""
+
+    def setUp(self):
+        self.store = IndexedStore("recipe_id", seq_attr="seq")
+
+    def _add(self, name, seq):
+        return self.store.add(Recipe(name=name, instructions="...", seq=seq))
+
+    def test_records_follow_their_sequence_numbers(self):
+        """Test that records added out of order are listed and paged by seq."""
+        self._add("A0", 10)
+        self._add("A1", 20)
+        self._add("A2", 40)
+        self._add("B0", 30)  # Created elsewhere, learned about late
+        self.assertEqual([r.name for r in self.store], ["A0", "A1", "B0", "A2"])
+        self.store.reorder()
+        self.assertEqual([r.name for r in self.store], ["A0", "A1", "B0", "A2"])
+
+        page, cursor = self.store.page(None, 3)
+        self.assertEqual([r.name for r in page], ["A0", "A1", "B0"])
+        self.assertEqual(cursor, 30)
+        self.assertEqual([r.name for r in self.store.page(cursor, 3)[0]], ["A2"])
+
+    def test_cursor_survives_reload(self):
+        """Test that a cursor still points at the same place after a reload."""
+        recipes = [self._add(f"R{i}", new_sequence()) for i in range(4)]
+        _, cursor = self.store.page(None, 2)
+        self.store.clear()
+        for recipe in reversed(recipes):
+            self.store.add(recipe)
+        self.assertEqual([r.name for r in self.store.page(cursor, 5)[0]], ["R2", "R3"])
+
+    def test_add_many_merges_by_sequence(self):
+        """Test that a batch lands in sequence order around existing records."""
+        self._add("A0", 10)
+        self._add("A1", 30)
+        self.store.add_many(
+            Recipe(name=name, instructions="...", seq=seq)
+            for name, seq in [("B1", 40), ("B0", 20)]
+        )
+        self.assertEqual([r.name for r in self.store], ["A0", "B0", "A1", "B1"])
+        page, cursor = self.store.page(None, 2)
+        self.assertEqual([r.name for r in page], ["A0", "B0"])
+        self.assertEqual([r.name for r in self.store.page(cursor, 5)[0]], ["A1", "B1"])
+
+    def test_new_sequence_increases(self):
+        """Test that sequence numbers increase and fit an SQLite INTEGER."""
+        numbers = [new_sequence() for _ in range(1000)]
+        self.assertEqual(numbers, sorted(set(numbers)))
+        self.assertLess(numbers[-1], 2**63)
+
+
+if __name__ == "__main__":
+    unittest.main()
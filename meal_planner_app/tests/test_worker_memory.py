@@ -0,0 +1,54 @@
+"""
+Tests for the gunicorn worker memory report.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from meal_planner_app import worker_memory
+
+SMAPS_ROLLUP = """\
+55d0c2a00000-7ffd1e5f6000 ---p 00000000 00:00 0                          [rollup]
+Rss:              351536 kB
+Pss:               80312 kB
+Pss_Anon:          76044 kB
+Shared_Clean:       5180 kB
+Shared_Dirty:     333736 kB
+Private_Clean:       104 kB
+Private_Dirty:     12516 kB
+"""
+
+
+class TestWorkerMemory(unittest.TestCase):
+    """Tests for reading per-process memory figures."""
+
+    def test_parse_smaps_rollup(self):
+        """Test that USS is the sum of private clean and dirty pages."""
+        self.assertEqual(
+            worker_memory.parse_smaps_rollup(SMAPS_ROLLUP),
+            {
+                "Rss": 351536,
+                "Pss": 80312,
+                "Private_Clean": 104,
+                "Private_Dirty": 12516,
+                "Uss": 12620,
+            },
+        )
+
+    @unittest.skipUnless(os.path.exists("/proc/self/smaps_rollup"), "needs Linux /proc")
+    def test_child_pids_and_memory(self):
+        """Test that children are found and their memory can be read."""
+        with subprocess.Popen(
+            [sys.executable, "-c", "import time; time.sleep(30)"]
+        ) as child:
+            try:
+                self.assertIn(child.pid, worker_memory.child_pids(os.getpid()))
+                self.assertGreater(worker_memory.process_memory(child.pid)["Rss"], 0)
+            finally:
+                child.kill()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Reports the memory of a gunicorn master and its workers, to check how much of
+a preloaded (MEAL_PLANNER_PRELOAD=1) catalog stays shared after fork.
+
+Usage:
+    python -m meal_planner_app.worker_memory <master pid>
+
+USS (unique set size: Private_Clean + Private_Dirty) is what each process
+costs on its own; PSS splits shared pages evenly between the processes that
+map them. Linux only (reads /proc/<pid>/smaps_rollup).
+"""
+
+import os
+import sys
+from typing import Dict, List
+
+FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+
+def parse_smaps_rollup(text: str) -> Dict[str, int]:
+    """Returns {field: kB} for the FIELDS of an smaps_rollup dump, plus "Uss"."""
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        if name in FIELDS:
+            values[name] = int(rest.split()[0])
+    values["Uss"] = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return values
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """Returns the memory figures (kB) of one process."""
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        return parse_smaps_rollup(f.read())
+
+
+def child_pids(parent: int) -> List[int]:
+    """Returns the pids of the direct children of `parent`."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii") as f:
+                # "pid (comm) state ppid ..."; comm may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def main(argv: List[str]) -> int:
+    """Prints RSS / PSS / USS of the master and each worker, in MiB."""
+    if len(argv) != 2 or not argv[1].isdigit():
+        print(__doc__.strip())
+        return 2
+    master = int(argv[1])
+    print(f"{'process':>16} {'RSS':>9} {'PSS':>9} {'USS':>9}")
+    rows = [("master", master)] + [(f"worker {pid}", pid) for pid in child_pids(master)]
+    for label, pid in rows:
+        mem = process_memory(pid)
+        print(
+            f"{label:>16} {mem['Rss'] / 1024:9.1f} {mem['Pss'] / 1024:9.1f} "
+            f"{mem['Uss'] / 1024:9.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
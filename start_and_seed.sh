@@ -2,13 +2,45 @@
 set -e
 
 # NOTE: This script is for DEVELOPMENT only.
-# It starts Flask (debug) + Vite dev server (npm run dev) then seeds data.
+# It seeds data, then starts Flask (debug) + Vite dev server (npm run dev).
 # The production image (built from root Dockerfile) does NOT use this:
 #   - no Node/npm at runtime
 #   - uses gunicorn directly
 #   - serves React SPA from /ui/
 # For dev with full HMR use the devcontainer or run this on host with Node.
 
+# Persist data in an append-only journal (+ snapshots) so restarts do not
+# need to re-import anything (see meal_planner_app/storage.py). Setting
+# MEAL_PLANNER_DB selects the SQLite backend instead.
+export MEAL_PLANNER_JOURNAL="${MEAL_PLANNER_JOURNAL:-/app/data/journal}"
+# Ask the backend the app will use whether it holds recipes already: seeding
+# resets the recipes, so it must not run over persisted data.
+if python -c '
+import sys
+from meal_planner_app import crud
+has_data = bool(crud.list_recipes())
+crud.storage_backend.close()
+sys.exit(0 if has_data else 1)
+'; then
+  HAS_DATA=1
+else
+  HAS_DATA=""
+fi
+
+# Migrate from legacy data if present, straight into the journal before the
+# backend starts (no server or HTTP replay needed; it loads the result).
+# Preferred: place a clean UTF-8 recipes.csv (exported from Base via Calc).
+# Fallback: przepisy_tmp.odb (heuristic).
+if [ -n "$HAS_DATA" ]; then
+  echo "Restored data from ${MEAL_PLANNER_DB:-$MEAL_PLANNER_JOURNAL} - skipping import."
+elif [ -f /app/legacy/recipes.csv ] || [ -f /app/legacy/przepisy.csv ] || [ -f /app/legacy/przepisy_tmp.odb ]; then
+  echo "Legacy data found - running migration (prefers CSV if present)..."
+  python -m meal_planner_app.migrate_legacy --direct || python -m meal_planner_app.seed_db
+else
+  echo "Seeding database with defaults..."
+  python -m meal_planner_app.seed_db
+fi
+
 # Start the backend in the background
 echo "Starting Flask backend..."
 python -m meal_planner_app.main &
@@ -28,21 +60,6 @@ else
   FRONTEND_PID=""
 fi
 
-# Wait for the backend to be ready
-echo "Waiting for backend to start..."
-sleep 10
-
-# Migrate from legacy data if present.
-# Preferred: place a clean UTF-8 recipes.csv (exported from Base via Calc).
-# Fallback: przepisy_tmp.odb (heuristic).
-if [ -f /app/legacy/recipes.csv ] || [ -f /app/legacy/przepisy.csv ] || [ -f /app/legacy/przepisy_tmp.odb ]; then
-  echo "Legacy data found - running migration (prefers CSV if present)..."
-  python -m meal_planner_app.migrate_legacy || python -m meal_planner_app.seed_db
-else
-  echo "Seeding database with defaults..."
-  python -m meal_planner_app.seed_db
-fi
-
 # Keep the container running by waiting for the backend (and frontend if we started it)
 if [ -n "$FRONTEND_PID" ]; then
   wait $BACKEND_PID $FRONTEND_PID